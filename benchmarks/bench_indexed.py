@@ -0,0 +1,69 @@
+# Copyright 2019 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark: indexed file vs JSON file, load and read a few keys, and load
+# a small indexed overlay into a config with many keys.
+#
+# Usage: PYTHONPATH=src python benchmarks/bench_indexed.py [num keys]
+
+from __future__ import print_function
+import os
+import sys
+import json
+import shutil
+import tempfile
+import timeit
+from config_source import DictConfig, write_indexed
+
+
+def read_keys(source, filename, keys):
+    config = DictConfig()
+    config.load_from(source, filename)
+    for key in keys:
+        config[key]
+
+
+def main(n):
+    number = 10
+    data = dict(('KEY_%d' % i, {'value': i, 'name': 'value %d' % i})
+                for i in range(n))
+    keys = ['KEY_%d' % i for i in range(0, n, max(n // 10, 1))]
+
+    tmp = tempfile.mkdtemp()
+    try:
+        json_file = os.path.join(tmp, 'config.json')
+        with open(json_file, 'w') as f:
+            json.dump(data, f)
+        indexed_file = os.path.join(tmp, 'config.cfgidx')
+        write_indexed(data, indexed_file)
+
+        for source, filename in (('json', json_file),
+                                 ('indexed', indexed_file)):
+            call = lambda: read_keys(source, filename, keys)
+            t = timeit.timeit(call, number=number) / number
+            print('%-8s %d keys: %.3f ms' % (source, n, t * 1000))
+
+        overlay_file = os.path.join(tmp, 'overlay.cfgidx')
+        write_indexed(dict(KEY_0=0, OTHER=1), overlay_file)
+        config = DictConfig()
+        config.update(data)
+        call = lambda: config.load_from('indexed', overlay_file)
+        t = timeit.timeit(call, number=number) / number
+        print('overlay  %d keys: %.3f ms' % (n, t * 1000))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,102 @@
+# Copyright 2019 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark: .env, TOML and INI sources vs parse then filter approach.
+#
+# Usage: PYTHONPATH=src python benchmarks/bench_parsers.py [num keys]
+
+from __future__ import print_function
+import sys
+import timeit
+from config_source import (
+    load_to,
+    parse_dotenv,
+    parse_toml,
+    parse_ini,
+    KeySelector
+)
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    tomllib = None
+
+try:
+    from configparser import ConfigParser
+except ImportError:  # pragma: no cover
+    from ConfigParser import ConfigParser
+
+
+def make_dotenv(n):
+    return '\n'.join('KEY_%d="value \\"%d\\""' % (i, i) for i in range(n))
+
+
+def make_toml(n):
+    lines = []
+    for i in range(n):
+        lines.append('KEY_%d = [%d, "value %d", {A = 1.5, B = true}]'
+                     % (i, i, i))
+    return '\n'.join(lines)
+
+
+def make_ini(n):
+    lines = ['[APP]']
+    lines.extend('KEY_%d = value %d' % (i, i) for i in range(n))
+    return '\n'.join(lines)
+
+
+def naive_dotenv(text, select):
+    load_to({}, 'dict', 'dict', parse_dotenv(text), select=select)
+
+
+def naive_toml(text, select):
+    if tomllib is not None:
+        data = tomllib.loads(text)
+    else:  # pragma: no cover
+        data = parse_toml(text)
+    load_to({}, 'dict', 'dict', data, select=select)
+
+
+def naive_ini(text, select):
+    parser = ConfigParser()
+    parser.optionxform = str
+    parser.read_string(text)
+    load_to({}, 'dict', 'dict', dict(parser.items('APP')), select=select)
+
+
+def main(n):
+    number = 10
+    select = KeySelector(['KEY_%d' % i for i in range(0, n, n // 10)])
+
+    cases = [
+        ('dotenv', make_dotenv(n), naive_dotenv,
+         lambda text: parse_dotenv(text, select)),
+        ('toml', make_toml(n), naive_toml,
+         lambda text: parse_toml(text, select)),
+        ('ini', make_ini(n), naive_ini,
+         lambda text: parse_ini(text, 'APP', select)),
+    ]
+
+    for name, text, naive, single_pass in cases:
+        for kind, func in (('naive', naive), ('single-pass', single_pass)):
+            if kind == 'naive':
+                call = lambda: func(text, select)
+            else:
+                call = lambda: func(text)
+            t = timeit.timeit(call, number=number) / number
+            print('%-7s %-12s %d keys: %.3f ms' % (name, kind, n, t * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,75 @@
+# Copyright 2019 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark: full vs incremental validation of a large config.
+#
+# Usage: PYTHONPATH=src python benchmarks/bench_validation.py [num keys]
+
+from __future__ import print_function
+import sys
+import timeit
+from config_source import DictConfig, Schema
+
+
+def make_schema(n):
+    rules = {}
+    for i in range(n):
+        if i % 3 == 0:
+            rules['INT_%d' % i] = {'type': int, 'min': 0, 'max': 10 ** 9}
+        elif i % 3 == 1:
+            rules['STR_%d' % i] = {'type': str, 'regex': '^[a-z]+$'}
+        else:
+            rules['CHOICE_%d' % i] = {'choices': ['a', 'b', 'c']}
+    return Schema(rules)
+
+
+def make_values(n):
+    values = {}
+    for i in range(n):
+        if i % 3 == 0:
+            values['INT_%d' % i] = i
+        elif i % 3 == 1:
+            values['STR_%d' % i] = 'abc'
+        else:
+            values['CHOICE_%d' % i] = 'b'
+    return values
+
+
+def main(n):
+    number = 20
+    values = make_values(n)
+    changes = dict((key, values[key]) for key in sorted(values)[:10])
+
+    schema = make_schema(n)
+    config = DictConfig(schema=schema)
+    config.load_from('dict', values)
+    config.validate()
+
+    def full():
+        schema.validate(config)
+
+    def incremental():
+        config.load_from('dict', changes)
+        config.validate()
+
+    for name, func in (('full', full), ('incremental', incremental)):
+        t = timeit.timeit(func, number=number) / number
+        print('%-12s %d keys: %.3f ms' % (name, n, t * 1000))
+
+    t = timeit.timeit(lambda: make_schema(n), number=number) / number
+    print('%-12s %d keys: %.3f ms' % ('compile', n, t * 1000))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
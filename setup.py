@@ -48,6 +48,9 @@ setup(
     package_dir={'': 'src'},
     py_modules=['config_source'],
     install_requires=['future>=0.16.0'],
+    entry_points={
+        'console_scripts': ['config-source = config_source:main'],
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'License :: OSI Approved :: Apache Software License',
@@ -12,27 +12,71 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from __future__ import absolute_import
+from __future__ import absolute_import, print_function
 import os
 import os.path as op
+import re
+import sys
+import ast
+import datetime
+import hashlib
+import io
+import keyword
+import mmap
+import py_compile
+import random
+import time
+import socket
+import struct
+import threading
+import timeit
+import warnings
+import zlib
 from types import ModuleType
 from future.moves.collections import UserDict
+from future.moves.urllib.parse import urlsplit
 from future.utils import PY2, iteritems, string_types
+from future.builtins import chr as unichr
 import pkg_resources
 import json
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from fnmatch import translate as glob_to_regex
+
+try:
+    from collections.abc import Mapping, MutableMapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping, MutableMapping
 
 __version__ = '0.0.8'
 
 # Configuration sources registry.
 _config_sources = defaultdict(dict)
 
+# (config type, source) pairs for sources which support keys selection.
+_selectable_sources = set()
+
+# Marker for missing values.
+_missing = object()
+
 
 class ConfigSourceError(Exception):
     """Configuration source error."""
 
 
-def config_source(source, config_type='dict', force=False):
+class ValidationError(ConfigSourceError):
+    """Configuration validation error.
+
+    Args:
+        errors: List of ``(key, message)`` tuples.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super(ValidationError, self).__init__(
+            '; '.join('%s: %s' % x for x in errors))
+
+
+def config_source(source, config_type='dict', force=False, selectable=False):
     """Decorator to register config source.
 
     Configuration source is a callable with one required argument -
@@ -45,10 +89,15 @@ def config_source(source, config_type='dict', force=False):
         def load_from_json(config, filename, silent=True):
             ...
 
+    If source is ``selectable`` then it accepts ``select`` keyword argument -
+    :class:`KeySelector` or callable which returns ``True`` for keys to load.
+    Otherwise keys are filtered when they are stored to the config.
+
     Args:
         source: Config source name.
         force: Force override if source is already registered.
         config_type: Configuration object type.
+        selectable: Source supports keys selection.
 
     See Also:
         :func:`load_to`.
@@ -58,13 +107,244 @@ def config_source(source, config_type='dict', force=False):
         if source in group and not force:
             raise AssertionError('Already registered: %s' % source)
         group[source] = f
+        if selectable:
+            _selectable_sources.add((config_type, source))
+        else:
+            _selectable_sources.discard((config_type, source))
         return f
     return wrapper
 
 
+class KeySelector(object):
+    """Set of configuration keys to load.
+
+    Selector is constructed from patterns of three kinds:
+
+    * exact key names: ``SECRET_KEY``;
+    * prefixes: ``DB_*``;
+    * glob patterns: ``*_URL``, ``CACHE_?_SIZE``.
+
+    Selector is a callable which returns ``True`` for matching keys.
+
+    Args:
+        patterns: List of patterns.
+    """
+
+    def __init__(self, patterns):
+        names = set()
+        prefixes = []
+        globs = []
+        for pattern in patterns:
+            is_prefix = pattern.endswith('*')
+            head = pattern[:-1] if is_prefix else pattern
+            if any(c in head for c in '*?['):
+                globs.append(glob_to_regex(pattern))
+            elif is_prefix:
+                prefixes.append(head)
+            else:
+                names.add(pattern)
+
+        self.patterns = tuple(patterns)
+        self.prefixes = tuple(prefixes)
+        self._names = frozenset(names)
+        self._regex = re.compile('|'.join(globs)) if globs else None
+
+    def __repr__(self):
+        return 'KeySelector(%r)' % (list(self.patterns),)
+
+    def __call__(self, key):
+        return (key in self._names or key.startswith(self.prefixes)
+                or (self._regex is not None
+                    and self._regex.match(key) is not None))
+
+    @property
+    def names(self):
+        """Set of selected keys or ``None`` if selector has patterns."""
+        if self.prefixes or self._regex is not None:
+            return None
+        return self._names
+
+
+def apply_batch(config, values):
+    """Store multiple values in the config.
+
+    Sources should use this function instead of setting keys one by one.
+    If ``config`` has ``apply_batch(values)`` method then it's called,
+    otherwise ``config.update(values)`` is used. This allows configuration
+    objects to process loaded values at once.
+
+    Args:
+        config: Dict-like config.
+        values: :class:`dict` with values to store.
+    """
+    batch = getattr(config, 'apply_batch', None)
+    if batch is not None:
+        batch(values)
+    else:
+        config.update(values)
+
+
+def apply_lazy(config, values, select=None):
+    """Store values which are decoded on first access.
+
+    Sources with random access storage (see :class:`IndexedFile`) should use
+    this function to avoid decoding values which are never read. If
+    ``config`` has ``apply_lazy(values, select)`` method then it's called,
+    otherwise all selected values are stored with :func:`apply_batch`.
+
+    Args:
+        config: Dict-like config.
+        values: Read-only mapping with values to store.
+        select: Keys selector.
+    """
+    lazy = getattr(config, 'apply_lazy', None)
+    if lazy is not None:
+        lazy(values, select)
+    else:
+        apply_batch(config, dict((key, values[key]) for key in values
+                                 if select is None or select(key)))
+
+
+def make_selector(select):
+    """Construct keys selector.
+
+    Args:
+        select: ``None``, pattern string, list of patterns,
+            :class:`KeySelector` or callable.
+
+    Returns:
+        Selector callable or ``None`` if ``select`` is ``None``.
+
+    See Also:
+        :class:`KeySelector`.
+    """
+    if select is None or callable(select):
+        return select
+    if isinstance(select, string_types):
+        select = [select]
+    return KeySelector(select)
+
+
+def _selected_names(select):
+    # Explicit set of keys to load or None.
+    return getattr(select, 'names', None)
+
+
+class _SelectedConfig(MutableMapping):
+    # Config wrapper to filter keys for sources without selection support.
+
+    def __init__(self, config, select):
+        self.config = config
+        self.select = select
+
+    def __getitem__(self, key):
+        return self.config[key]
+
+    def __setitem__(self, key, value):
+        if self.select(key):
+            self.config[key] = value
+
+    def apply_batch(self, values):
+        select = self.select
+        apply_batch(self.config, dict(x for x in iteritems(values)
+                                      if select(x[0])))
+
+    def __delitem__(self, key):
+        del self.config[key]
+
+    def __iter__(self):
+        return iter(self.config)
+
+    def __len__(self):
+        return len(self.config)
+
+
+def deep_merge(base, override):
+    """Merge nested mappings.
+
+    Mappings are merged recursively, other values in ``override`` replace
+    ones in ``base``. Arguments are not modified: only mappings on the paths
+    to overridden values are copied, all other values and subtrees are
+    shared by the result, ``base`` and ``override``::
+
+        base = {'DB': {'HOST': 'localhost', 'OPTIONS': {...}}}
+        result = deep_merge(base, {'DB': {'HOST': 'db'}})
+
+        # {'DB': {'HOST': 'db', 'OPTIONS': {...}}}
+        assert result['DB']['OPTIONS'] is base['DB']['OPTIONS']
+
+    Args:
+        base: Base value.
+        override: Overriding value.
+
+    Returns:
+        Merged value.
+    """
+    if not isinstance(base, Mapping) or not isinstance(override, Mapping):
+        return override
+    result = dict(base)
+    for key, value in iteritems(override):
+        old = result.get(key, _missing)
+        result[key] = value if old is _missing else deep_merge(old, value)
+    return result
+
+
+class _DeepMergeConfig(MutableMapping):
+    # Config wrapper to merge nested values instead of replacing them.
+
+    def __init__(self, config):
+        self.config = config
+
+    def __getitem__(self, key):
+        return self.config[key]
+
+    def _current(self, key):
+        # Stored value, reading it from DictConfig is not an access.
+        if isinstance(self.config, DictConfig):
+            return self.config._stored_value(key)
+        return self.config.get(key)
+
+    def __setitem__(self, key, value):
+        self.config[key] = deep_merge(self._current(key), value)
+
+    def __delitem__(self, key):
+        del self.config[key]
+
+    def __iter__(self):
+        return iter(self.config)
+
+    def __len__(self):
+        return len(self.config)
+
+    def apply_batch(self, values):
+        get = self._current
+        apply_batch(self.config, dict((key, deep_merge(get(key), value))
+                                      for key, value in iteritems(values)))
+
+
+# Merge modes for load_to().
+_MERGE_MODES = {
+    None: None,
+    'replace': None,
+    'deep': _DeepMergeConfig,
+}
+
+
 def load_to(config, from_source, config_type, *args, **kwargs):
     """Load configuration from given source to ``config``.
 
+    Only keys accepted by the ``select`` keyword argument are loaded if it's
+    passed. It may be a pattern, list of patterns (see :class:`KeySelector`)
+    or callable::
+
+        load_to(config, 'env', 'dict', prefix='APP_',
+                select=['SECRET_KEY', 'DB_*'])
+
+    By default loaded values replace existing ones. With ``merge='deep'``
+    nested mappings are merged with existing values (see :func:`deep_merge`)::
+
+        load_to(config, 'json', 'dict', 'override.json', merge='deep')
+
     Args:
         config: Destination configuration object.
         from_source: Configuration source name.
@@ -80,8 +360,19 @@ def load_to(config, from_source, config_type, *args, **kwargs):
         ConfigError: if config type or source is not found.
 
     See Also:
-        :func:`config_source`.
+        :func:`config_source`, :func:`make_selector`.
     """
+    # Remember source of loaded values if access tracking is enabled.
+    # Nested loads keep the label of the outermost source.
+    target = _unwrap_config(config)
+    if (isinstance(target, DictConfig) and target._tracker is not None
+            and target._source is None):
+        target._source = _source_label(from_source, args, kwargs)
+        try:
+            return load_to(config, from_source, config_type, *args, **kwargs)
+        finally:
+            target._source = None
+
     group = _config_sources.get(config_type)
     if group is None:
         raise ConfigSourceError('Unknown config type: %s' % config_type)
@@ -91,10 +382,127 @@ def load_to(config, from_source, config_type, *args, **kwargs):
         raise ConfigSourceError('Unknown source: %s (config type: %s)'
                                 % (from_source, config_type))
 
+    merge = kwargs.pop('merge', None)
+    if merge not in _MERGE_MODES:
+        raise ConfigSourceError('Unknown merge mode: %s' % merge)
+    if _MERGE_MODES[merge] is not None:
+        config = _MERGE_MODES[merge](config)
+
+    select = make_selector(kwargs.pop('select', None))
+    if select is not None:
+        if (config_type, from_source) in _selectable_sources:
+            kwargs['select'] = select
+        else:
+            config = _SelectedConfig(config, select)
+
+    profiler = _load_profiler
+    if profiler is not None:
+        return profiler.call(from_source, loader, config, args, kwargs)
     return loader(config, *args, **kwargs)
 
 
-def load_multiple_to(config, sources):
+class _ReverseConfig(MutableMapping):
+    # Config wrapper for reverse loading: stores only keys which are not
+    # loaded yet and records stored keys. skipped is set if the current
+    # source has a key which is already loaded.
+
+    def __init__(self, config, loaded):
+        self.config = config
+        self.loaded = loaded
+        self.skipped = False
+
+    def __getitem__(self, key):
+        return self.config[key]
+
+    def __setitem__(self, key, value):
+        if key not in self.loaded:
+            self.loaded.add(key)
+            self.config[key] = value
+        else:
+            self.skipped = True
+
+    def apply_batch(self, values):
+        loaded = self.loaded
+        size = len(values)
+        values = dict(x for x in iteritems(values) if x[0] not in loaded)
+        if len(values) != size:
+            self.skipped = True
+        loaded.update(values)
+        apply_batch(self.config, values)
+
+    def __delitem__(self, key):
+        del self.config[key]
+
+    def __iter__(self):
+        return iter(self.config)
+
+    def __len__(self):
+        return len(self.config)
+
+
+class _ReverseSelector(object):
+    # Selector which skips keys loaded by sources with higher priority and
+    # marks the target config if it skips a selected key.
+
+    def __init__(self, select, target):
+        self.select = select
+        self.target = target
+
+    def __call__(self, key):
+        if self.select is not None and not self.select(key):
+            return False
+        if key in self.target.loaded:
+            self.target.skipped = True
+            return False
+        return True
+
+    @property
+    def names(self):
+        names = _selected_names(self.select)
+        if names is None:
+            return None
+        if not names.isdisjoint(self.target.loaded):
+            self.target.skipped = True
+        return names - self.target.loaded
+
+
+def _unwrap_config(config):
+    # Destination config wrapped by loading helpers.
+    while isinstance(config, (_SelectedConfig, _DeepMergeConfig,
+                              _ReverseConfig)):
+        config = config.config
+    return config
+
+
+def _load_reverse(config, sources, select, merge, required):
+    if required is None:
+        required = _selected_names(select)
+    required = None if required is None else frozenset(required)
+
+    ok = len(sources) != 0
+    loaded = set()
+    target = _ReverseConfig(config, loaded)
+    for params in reversed(sources):
+        if required is not None and required <= loaded:
+            break
+        src_name = params.pop('from')
+        config_type = params.pop('type', 'dict')
+        if params.get('merge', merge) == 'deep':
+            raise ConfigSourceError('Deep merge is not supported in reverse '
+                                    'mode: %s' % src_name)
+        params['select'] = _ReverseSelector(
+            make_selector(params.get('select', select)), target)
+        # Source which loads nothing only because its keys are already
+        # loaded is not failed, same as in forward mode.
+        target.skipped = False
+        if not load_to(target, src_name, config_type, **params) and (
+                not target.skipped):
+            ok = False
+    return ok
+
+
+def load_multiple_to(config, sources, select=None, merge=None, reverse=False,
+                     required=None):
     """Load configuration from multiple sources to ``config``.
 
     Loader parameters::
@@ -102,6 +510,8 @@ def load_multiple_to(config, sources):
         {
             'from': '<source name>',
             'type': '<optional config type>',  # 'dict' by default.
+            'select': <optional keys selection>,
+            'merge': <optional merge mode>,
             ... <source loader params>
         }
 
@@ -113,9 +523,30 @@ def load_multiple_to(config, sources):
             {'from': 'env', 'prefix': 'MYCFG'}
         ])
 
+    Sources are loaded in the given order, so later sources override earlier
+    ones. With ``reverse=True`` sources are loaded from the last one and keys
+    loaded by later sources are not loaded again: they are excluded from
+    sources' ``select``, so sources with selection support skip them while
+    parsing. If ``required`` keys (by default exact key names from
+    ``select``) are loaded then remaining sources are skipped::
+
+        load_multiple_to(config, [
+            {'from': 'json', 'filename': 'defaults.json'},
+            {'from': 'env', 'prefix': 'APP_'}
+        ], reverse=True, required=['SECRET_KEY', 'DB_URL'])
+
+    Result is the same as without ``reverse`` unless loading stops early.
+    Deep merge is not supported in reverse mode.
+
     Args:
         config: Destination configuration object.
         sources: List of dicts with loaders' parameters.
+        select: Keys to load from all sources (see :func:`load_to`).
+            Source's own ``select`` parameter takes precedence.
+        merge: Merge mode for all sources (see :func:`load_to`).
+            Source's own ``merge`` parameter takes precedence.
+        reverse: Load sources in reverse order.
+        required: Keys to stop loading after in reverse mode.
 
     Returns:
         ``True`` if configuration is successfully loaded from the source
@@ -127,10 +558,18 @@ def load_multiple_to(config, sources):
     See Also:
         :func:`load_to`.
     """
+    select = make_selector(select)
+    if reverse:
+        return _load_reverse(config, sources, select, merge, required)
+
     ok = len(sources) != 0
     for params in sources:
         src_name = params.pop('from')
         config_type = params.pop('type', 'dict')
+        if select is not None:
+            params.setdefault('select', select)
+        if merge is not None:
+            params.setdefault('merge', merge)
         if not load_to(config, src_name, config_type, **params):
             ok = False
     return ok
@@ -154,272 +593,3672 @@ def merge_kwargs(kwargs, defaults):
     return kw
 
 
-class DictConfig(UserDict):
-    """Dict-like configuration.
+# -- Validation.
 
-    This class provides API to populate itself with values from various sources.
+def _type_check(types):
+    if not isinstance(types, tuple):
+        types = (types,)
+    names = ' or '.join(x.__name__ for x in types)
 
-    Example usage::
+    def check(value):
+        if not isinstance(value, types):
+            return 'expected %s, got %s' % (names, type(value).__name__)
+    return check
 
-        config = DictConfig()
-        config.load_from('env', prefix='APP)
-        config.load_from('pyfile', 'config.py')
 
-    You may set default keyword arguments for various config sources::
+def _min_check(limit):
+    def check(value):
+        if value < limit:
+            return 'must be >= %r' % (limit,)
+    return check
 
-        config = DictConfig(defaults={
-            'env': {'prefix': 'APP', 'trim_prefix': False},
-            'pyfile: {'silent': True}
-        })
 
-        config.load_from('env')
-        config.load_from('pyfile', 'config.py')
+def _max_check(limit):
+    def check(value):
+        if value > limit:
+            return 'must be <= %r' % (limit,)
+    return check
 
-    Args:
-        defaults: :class:`dict` with default keyword arguments
-            for config sources. They merge with those that will be passed to
-            :meth:`load_from`.
-    """
 
-    def __init__(self, defaults=None):
-        # UserDict in py 2.X is old-style class so we can't use super().
-        if PY2:  # pragma: no cover
-            UserDict.__init__(self)
-        else:  # pragma: no cover
-            super(DictConfig, self).__init__()
-        self._defaults = defaults or dict()
+def _choices_check(choices):
+    choices = list(choices)
 
-    def load_from(self, source, *args, **kwargs):
-        """Load configuration from the given ``source``.
+    def check(value):
+        if value not in choices:
+            return 'must be one of %r' % (choices,)
+    return check
 
-        Args:
-            source: Config source name.
-            *args: Arguments for config source loader.
-            **kwargs: Keyword arguments for config source loader.
 
-        Returns:
-            ``True`` if configuration is successfully loaded from the source
-            and ``False`` otherwise.
+def _regex_check(pattern):
+    regex = re.compile(pattern)
 
-        See Also:
-            :func:`load_to`, :func:`merge_kwargs`.
-        """
-        kwargs = merge_kwargs(kwargs, self._defaults.get(source))
-        return load_to(self, source, 'dict', *args, **kwargs)
+    def check(value):
+        if regex.search(value) is None:
+            return "doesn't match %r" % (pattern,)
+    return check
 
 
-class DictConfigLoader(object):
-    """Loader for the :class:`DictConfig`.
+# Schema rule items and their check factories, in order of checking.
+_RULE_CHECKS = (
+    ('type', _type_check),
+    ('min', _min_check),
+    ('max', _max_check),
+    ('choices', _choices_check),
+    ('regex', _regex_check),
+    ('validator', lambda func: func),
+)
 
-    The loader auto-detects config source name by input configuration type.
+
+def _compile_rule(rule):
+    # Compile rule into a function which returns error message or None.
+    if isinstance(rule, (type, tuple)):
+        rule = {'type': rule}
+    elif callable(rule):
+        rule = {'validator': rule}
+
+    checks = [factory(rule[name]) for name, factory in _RULE_CHECKS
+              if name in rule]
+
+    def check(value):
+        try:
+            for func in checks:
+                msg = func(value)
+                if msg is not None:
+                    return msg
+        except (TypeError, ValueError) as e:
+            return str(e) or 'invalid value'
+        return None
+
+    return check
+
+
+class Schema(object):
+    """Compiled configuration schema.
+
+    Schema maps config keys to rules. Each rule is compiled once into
+    a validator function, so checking a key is a single call. Rule may be:
+
+    * a type or tuple of types;
+    * a callable which returns error message or ``None`` (it may also raise
+      :class:`ValueError` or :class:`TypeError`);
+    * a :class:`dict` with the following optional items: ``type``,
+      ``required``, ``min``, ``max``, ``choices``, ``regex`` (pattern to
+      search in the value), ``validator`` (callable, see above).
+
+    Example::
+
+        schema = Schema({
+            'DEBUG': bool,
+            'PORT': {'type': int, 'min': 1, 'max': 65535, 'required': True},
+            'LOG_LEVEL': {'choices': ['DEBUG', 'INFO', 'ERROR']},
+            'WORKERS': lambda x: None if x > 0 else 'must be positive',
+        })
+
+    Args:
+        rules: :class:`dict` mapping config keys to rules.
+        allow_unknown: Allow keys which are not in the schema.
     """
 
-    def __init__(self, config):
-        """Construct loader.
+    def __init__(self, rules, allow_unknown=True):
+        self.allow_unknown = allow_unknown
+        self._checks = dict((key, _compile_rule(rule))
+                            for key, rule in iteritems(rules))
+        self.required = frozenset(
+            key for key, rule in iteritems(rules)
+            if isinstance(rule, dict) and rule.get('required'))
+
+    def check(self, key, value):
+        """Validate single key.
 
         Args:
-            config: :class:`DictConfig` instance.
+            key: Config key.
+            value: Config value.
+
+        Returns:
+            Error message or ``None`` if the value is valid.
         """
-        self.config = config
+        check = self._checks.get(key)
+        if check is None:
+            return None if self.allow_unknown else 'unknown key'
+        return check(value)
 
-    def detect_source(self, config, *args, **kwargs):
-        """Detect config source name by input parameters.
+    def missing(self, config):
+        """Get required keys missing in the ``config``.
 
         Args:
-            config: Configuration source (like filename, dict or class).
-            args: Arguments for config source loader.
-            kwargs: Keyword arguments for config source loader.
+            config: Dict-like config.
 
         Returns:
-            Config source name.
+            List of ``(key, message)`` tuples.
         """
-        if isinstance(config, string_types):
-            parts = config.split('://')
-            if len(parts) == 2:
-                name = parts[0].strip()
-                if not name:
-                    raise ValueError('Invalid source: %s' % config)
-                return name
-            return 'json' if config.endswith('.json') else 'pyfile'
-        elif isinstance(config, dict):
-            return 'dict'
-        else:
-            return 'object'
+        return [(key, 'is required') for key in sorted(self.required)
+                if key not in config]
 
-    def load(self, config, *args, **kwargs):
-        """Load given configuration.
+    def validate(self, config, keys=None):
+        """Validate the ``config``.
 
-        ``config`` source name is auto-detected by its type:
+        Args:
+            config: Dict-like config.
+            keys: Keys to validate, all keys by default. Required keys are
+                always checked.
 
-        * ``json`` is used for filenames with ``.json`` extensions.
-        * ``pyfile`` is used for other filenames.
-        * ``dict`` is used for dictionaries.
-        * ``object`` is used in all other cases.
+        Returns:
+            List of ``(key, message)`` tuples, empty if config is valid.
+        """
+        errors = []
+        for key in (config if keys is None else keys):
+            if key in config:
+                msg = self.check(key, config[key])
+                if msg is not None:
+                    errors.append((key, msg))
+        errors.extend(self.missing(config))
+        return errors
+
+
+# -- Access tracking.
+
+class AccessTracker(object):
+    """Statistics of config keys access.
+
+    See Also:
+        :meth:`DictConfig.track_access`.
+    """
+
+    def __init__(self):
+        #: Number of reads of existing keys.
+        self.hits = defaultdict(int)
+        #: Number of reads of missing keys.
+        self.misses = defaultdict(int)
+        #: Sources which loaded keys.
+        self.sources = {}
+
+    def report(self, keys=()):
+        """Build access report.
 
         Args:
-            config: Configuration source (like filename, dict or class).
-            args: Arguments for config source loader.
-            kwargs: Keyword arguments for config source loader.
+            keys: Config keys to include to the report even if they were
+                never accessed.
+
+        Returns:
+            :class:`dict` with ``keys`` mapping config keys to
+            ``{'hits': <number>, 'source': <source or None>}`` and
+            ``misses`` mapping missing keys to number of reads.
         """
-        source = self.detect_source(config, *args, **kwargs)
-        self.config.load_from(source, config, *args, **kwargs)
+        hits = self.hits
+        sources = self.sources
+        names = set(keys)
+        names.update(hits)
+        return {
+            'keys': dict((key, {'hits': hits.get(key, 0),
+                                'source': sources.get(key)})
+                         for key in names),
+            'misses': dict(self.misses),
+        }
 
+    def export(self, file, keys=()):
+        """Write access report as JSON.
 
-# -- Default configuration sources.
+        Args:
+            file: Filename or file-like object.
+            keys: Config keys to include to the report.
 
-@config_source('object')
-def load_from_object(config, obj):
-    """Update ``config`` with values from the given ``object``.
+        See Also:
+            :meth:`report`.
+        """
+        if isinstance(file, string_types):
+            with open(file, 'w') as f:
+                return self.export(f, keys)
+        json.dump(self.report(keys), file, indent=2, sort_keys=True)
 
-    Only uppercase attributes will be loaded into ``config``.
 
-    Args:
-        config: Dict-like config.
-        obj: Object with configuration.
+def _source_label(source, args, kwargs):
+    # Source description for access tracking: name and the first string
+    # argument (filename, URL, prefix).
+    values = list(args[:1]) + [kwargs[name] for name in sorted(kwargs)
+                               if name not in ('select', 'merge')]
+    for value in values:
+        if isinstance(value, string_types):
+            return '%s:%s' % (source, value)
+    return source
 
-    Returns:
-        ``True`` if at least one attribute is loaded to ``config``.
-    """
-    has = False
-    for key in dir(obj):
-        if key.isupper():
-            has = True
-            config[key] = getattr(obj, key)
-    return has
 
+# -- Load profiling.
 
-@config_source('dict')
-def load_from_dict(config, obj, skip_none=False):
-    """Update ``config`` with values from the given dict-like object.
+class LoadProfiler(object):
+    """Profiler of slow loader calls.
 
-    Only uppercase keys will be loaded into ``config``.
+    Loader calls are profiled with :mod:`cProfile` and profiles of calls
+    taking ``threshold`` seconds or more are saved. ``sample`` percent of
+    calls are profiled and saved regardless of time. Use
+    :func:`profile_loads` to enable it for :func:`load_to`.
 
-    Args:
-        config: Dict-like config.
-        obj: Dict-like object.
-        skip_none: Skip configs with ``None`` values.
+    For each call ``<source>-<time>-<pid>-<n>.prof`` profile is written to
+    ``directory`` (use :mod:`pstats` or ``snakeviz`` to view it) along with
+    ``.json`` file with source name, arguments, time and reason of capture.
 
-    Returns:
-        ``True`` if at least one key is loaded to ``config``.
+    Only outermost calls are profiled, loads made by other loaders are
+    included in their profiles. If threshold is set then all calls are
+    profiled, which slows down loaders executing a lot of python code.
+
+    Args:
+        directory: Directory for profiles, created if missing.
+        threshold: Time in seconds, ``None`` disables it.
+        sample: Percent of calls to profile.
     """
-    has = False
-    for key, val in iteritems(obj):
-        if key.isupper() and (not skip_none or val is not None):
-            has = True
-            config[key] = val
-    return has
 
+    def __init__(self, directory, threshold=None, sample=0):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample = sample
+        self._random = random.Random()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._count = 0
 
-@config_source('env')
-def load_from_env(config, prefix, trim_prefix=True):
-    """Update ``config`` with values from current environment.
+    def call(self, source, loader, config, args, kwargs):
+        """Call loader and save its profile if needed.
 
-    Args:
+        Args:
+            source: Source name.
+            loader: Loader function.
+            config: Configuration object.
+            args: Loader arguments.
+            kwargs: Loader keyword arguments.
+
+        Returns:
+            Loader's result.
+        """
+        sampled = self.sample and self._random.random() * 100 < self.sample
+        if getattr(self._local, 'active', False) or (
+                not sampled and self.threshold is None):
+            return loader(config, *args, **kwargs)
+
+        import cProfile
+        profile = cProfile.Profile()
+        self._local.active = True
+        start = timeit.default_timer()
+        try:
+            profile.enable()
+        except ValueError:  # pragma: no cover
+            # Other profiler is active.
+            profile = None
+        try:
+            return loader(config, *args, **kwargs)
+        finally:
+            elapsed = timeit.default_timer() - start
+            self._local.active = False
+            if profile is not None:
+                profile.disable()
+                if sampled or elapsed >= self.threshold:
+                    reason = 'sample' if sampled else 'threshold'
+                    self._save(profile, source, args, kwargs, elapsed, reason)
+
+    def _save(self, profile, source, args, kwargs, elapsed, reason):
+        with self._lock:
+            self._count += 1
+            name = '%s-%s-%d-%d' % (
+                re.sub(r'[^\w.-]', '_', source),
+                datetime.datetime.now().strftime('%Y%m%d%H%M%S%f'),
+                os.getpid(), self._count)
+        path = op.join(self.directory, name)
+        info = {
+            'source': source,
+            'args': [repr(x) for x in args],
+            'kwargs': dict((k, repr(v)) for k, v in iteritems(kwargs)),
+            'time': elapsed,
+            'reason': reason,
+        }
+        try:
+            if not op.isdir(self.directory):
+                os.makedirs(self.directory)
+            profile.dump_stats(path + '.prof')
+            with open(path + '.json', 'w') as f:
+                json.dump(info, f, indent=2, sort_keys=True)
+        except (IOError, OSError) as e:
+            warnings.warn('Failed to save load profile: %s' % e)
+
+
+# Profiler used by load_to().
+_load_profiler = None
+
+
+def profile_loads(directory=None, threshold=None, sample=0):
+    """Enable or disable profiling of slow :func:`load_to` calls.
+
+    Example::
+
+        # Capture loads taking 0.5 second or more and 1% of all loads.
+        profile_loads('/var/tmp/config-profiles', threshold=0.5, sample=1)
+
+        profile_loads()     # Disable.
+
+    Args:
+        directory: Directory for profiles, ``None`` disables profiling.
+        threshold: Time in seconds, profiles of calls taking longer are
+            saved.
+        sample: Percent of calls to profile regardless of time.
+
+    Returns:
+        :class:`LoadProfiler` or ``None`` if profiling is disabled.
+    """
+    global _load_profiler
+    if directory is None:
+        _load_profiler = None
+    else:
+        _load_profiler = LoadProfiler(directory, threshold, sample)
+    return _load_profiler
+
+
+# -- Derived keys.
+
+def _same_value(a, b):
+    # Check if value is not changed.
+    if a is b:
+        return True
+    try:
+        return bool(type(a) is type(b) and a == b)
+    except ValueError:  # pragma: no cover
+        # Objects like numpy arrays can't be compared this way.
+        return False
+
+
+class _DependencyRecorder(Mapping):
+    # Config view which records accessed keys.
+
+    def __init__(self, config, deps):
+        self._config = config
+        self._deps = deps
+
+    def __getitem__(self, key):
+        self._deps.add(key)
+        return self._config[key]
+
+    def __iter__(self):
+        return iter(self._config)
+
+    def __len__(self):
+        return len(self._config)
+
+
+# -- Fingerprint.
+
+# Fingerprint is a sum of items' hashes modulo 2^160.
+_FINGERPRINT_MASK = (1 << 160) - 1
+
+
+def _item_hash(key, value):
+    # Hash of a config item which is stable across processes.
+    try:
+        text = json.dumps([key, value], sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        text = repr((key, value))
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest(), 16)
+
+
+# -- Interpolation.
+
+_TEMPLATE_RE = re.compile(r'\$(\$?)\{([^{}]*)\}')
+
+
+def _compile_template(text):
+    # Compile string with ${KEY} references into (format, references).
+    # Format is None if the string is a single reference, then the value
+    # is the referenced one as is. $${KEY} is a literal ${KEY}.
+    parts = []
+    refs = []
+    pos = 0
+    for m in _TEMPLATE_RE.finditer(text):
+        parts.append(text[pos:m.start()].replace('%', '%%'))
+        if m.group(1):
+            parts.append(m.group(0)[1:].replace('%', '%%'))
+        else:
+            parts.append('%s')
+            refs.append(m.group(2).strip())
+        pos = m.end()
+    parts.append(text[pos:].replace('%', '%%'))
+    if parts == ['', '%s', '']:
+        return None, tuple(refs)
+    return ''.join(parts), tuple(refs)
+
+
+def _find_cycle(keys, refs_of):
+    # Find references cycle reachable from the given keys.
+    # refs_of(key) returns key's references or None if key is not a template.
+    state = {}
+    for root in keys:
+        if root in state:
+            continue
+        path = [root]
+        stack = [iter(refs_of(root))]
+        state[root] = False
+        while stack:
+            for ref in stack[-1]:
+                refs = refs_of(ref)
+                if refs is None or state.get(ref) is True:
+                    continue
+                if ref in state:
+                    return path[path.index(ref):] + [ref]
+                state[ref] = False
+                path.append(ref)
+                stack.append(iter(refs))
+                break
+            else:
+                state[path.pop()] = True
+                stack.pop()
+    return None
+
+
+class DictConfig(UserDict):
+    """Dict-like configuration.
+
+    This class provides API to populate itself with values from various sources.
+
+    Example usage::
+
+        config = DictConfig()
+        config.load_from('env', prefix='APP)
+        config.load_from('pyfile', 'config.py')
+
+    You may set default keyword arguments for various config sources::
+
+        config = DictConfig(defaults={
+            'env': {'prefix': 'APP', 'trim_prefix': False},
+            'pyfile: {'silent': True}
+        })
+
+        config.load_from('env')
+        config.load_from('pyfile', 'config.py')
+
+    Configuration may be validated with a :class:`Schema`. Only keys changed
+    since the last validation are checked again::
+
+        config = DictConfig(schema={'PORT': {'type': int, 'required': True}})
+        config.load_from('pyfile', 'config.py')
+        config.validate()
+
+    Keys may be derived from other keys, see :meth:`derive`.
+
+    Reads of keys may be tracked to find out which keys are used, see
+    :meth:`track_access`.
+
+    Sources may be loaded lazily on first access to their keys, see
+    :meth:`add_namespace`, and values may be decoded on first access, see
+    :meth:`apply_lazy`.
+
+    With ``interpolate=True`` string values may reference other keys::
+
+        config = DictConfig(interpolate=True)
+        config['HOST'] = 'localhost'
+        config['URL'] = 'http://${HOST}:${PORT}/'
+        config['PORT'] = 8000
+
+        config['URL']       # 'http://localhost:8000/'
+        config.data['URL']  # 'http://${HOST}:${PORT}/'
+
+    Templates are compiled when they are stored and circular references are
+    rejected with :class:`ConfigSourceError`. Resolved values are memoized
+    and computed again only if referenced keys are changed. A value which is
+    a single reference (``'${PORT}'``) is the referenced value as is, other
+    templates are strings. ``$${KEY}`` is a literal ``${KEY}``.
+
+    Args:
+        defaults: :class:`dict` with default keyword arguments
+            for config sources. They merge with those that will be passed to
+            :meth:`load_from`.
+        schema: :class:`Schema` or rules to construct it.
+        interpolate: Resolve ``${KEY}`` references in string values.
+    """
+
+    def __init__(self, defaults=None, schema=None, interpolate=False):
+        # UserDict in py 2.X is old-style class so we can't use super().
+        if PY2:  # pragma: no cover
+            UserDict.__init__(self)
+        else:  # pragma: no cover
+            super(DictConfig, self).__init__()
+        self._defaults = defaults or dict()
+        self._schema = None
+        self._dirty = None
+        self._errors = {}
+
+        # Derived keys: functions, memoized values, keys each one reads
+        # and derived keys depending on a key.
+        self._derived = {}
+        self._derived_values = {}
+        self._derived_deps = {}
+        self._dependents = defaultdict(set)
+        self._computing = set()
+
+        # Access tracker and label of currently loading source.
+        self._tracker = None
+        self._source = None
+
+        # Lazy namespaces: sources by key prefix, tuple of prefixes which are
+        # not loaded yet and prefixes which are being loaded.
+        self._namespaces = OrderedDict()
+        self._ns_prefixes = ()
+        self._ns_loading = set()
+        self._ns_lock = threading.RLock()
+
+        # Lazy values: list of (mapping, selector, source label, sequence
+        # number), newest last, and sequence numbers of the newest layer at
+        # the time keys are taken from the layers or set explicitly. Key's
+        # value in the layers which are newer overrides the stored one.
+        self._lazy = []
+        self._lazy_seq = 0
+        self._lazy_done = {}
+
+        # Compiled templates: (format, references) by key, or None if
+        # interpolation is disabled. Resolved values are memoized along
+        # with derived ones and references are registered as dependencies.
+        self._templates = {} if interpolate else None
+
+        # Items' hashes and their sum, maintained after first fingerprint()
+        # call.
+        self._hashes = None
+        self._fingerprint = 0
+
+        if schema is not None:
+            self.set_schema(schema)
+
+    def __getstate__(self):
+        # Locks can't be pickled or copied, they are created again.
+        state = self.__dict__.copy()
+        del state['_ns_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._ns_lock = threading.RLock()
+
+    def __copy__(self):
+        # Values are shared, but bookkeeping of the copy is its own.
+        other = self.__class__.__new__(self.__class__)
+        other.__setstate__(self.__getstate__())
+        other.data = dict(self.data)
+        other._errors = dict(self._errors)
+        other._derived = dict(self._derived)
+        other._derived_values = dict(self._derived_values)
+        other._derived_deps = dict(self._derived_deps)
+        other._dependents = defaultdict(set, (
+            (k, set(v)) for k, v in iteritems(self._dependents)))
+        other._computing = set()
+        if self._dirty is not None:
+            other._dirty = set(self._dirty)
+        if self._tracker is not None:
+            other._tracker = AccessTracker()
+            other._tracker.hits.update(self._tracker.hits)
+            other._tracker.misses.update(self._tracker.misses)
+            other._tracker.sources.update(self._tracker.sources)
+        other._namespaces = OrderedDict(
+            (k, list(v)) for k, v in iteritems(self._namespaces))
+        other._ns_loading = set()
+        other._lazy = list(self._lazy)
+        other._lazy_done = dict(self._lazy_done)
+        if self._templates is not None:
+            other._templates = dict(self._templates)
+        if self._hashes is not None:
+            other._hashes = dict(self._hashes)
+        return other
+
+    def copy(self):
+        """Copy of the config.
+
+        Values are not copied, pending namespaces and lazy values are
+        loaded by the copy independently.
+        """
+        return self.__copy__()
+
+    def __getitem__(self, key):
+        if self._ns_prefixes:
+            self._load_namespaces(key)
+        if self._tracker is not None:
+            return self._tracked_getitem(key)
+        if self._lazy and self._lazy_done.get(key, 0) != self._lazy_seq:
+            self._lazy_get(key)
+        try:
+            value = self.data[key]
+        except KeyError:
+            return self.__missing__(key)
+        if self._templates and key in self._templates:
+            return self._resolve(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _stored_value(self, key):
+        # Stored value or None, derived keys and references are not resolved
+        # and access is not tracked.
+        if self._ns_prefixes:
+            self._load_namespaces(key)
+        if self._lazy:
+            self._lazy_get(key)
+        return self.data.get(key)
+
+    def __setitem__(self, key, value):
+        if self._ns_prefixes:
+            self._load_namespaces(key)
+        if self._templates is not None:
+            self._update_templates({key: value})
+        if self._lazy:
+            self._lazy_done[key] = self._lazy_seq
+        if self._dependents and key in self._dependents:
+            if not _same_value(self.data.get(key, _missing), value):
+                self._invalidate((key,))
+        self.data[key] = value
+        if self._hashes is not None:
+            self._update_hash(key, value)
+        if self._dirty is not None:
+            self._dirty.add(key)
+        if self._tracker is not None:
+            self._tracker.sources[key] = self._source
+
+    def __delitem__(self, key):
+        if self._ns_prefixes:
+            self._load_namespaces(key)
+        if self._lazy:
+            self._lazy_get(key)
+            self._lazy_done[key] = self._lazy_seq
+        del self.data[key]
+        if self._hashes is not None:
+            self._update_hash(key, _missing)
+        if self._templates:
+            self._update_templates({key: None})
+        if self._dirty is not None:
+            self._dirty.add(key)
+        if self._dependents:
+            self._invalidate((key,))
+
+    def apply_batch(self, values):
+        """Store multiple values.
+
+        Values are stored at once and bookkeeping (validation, derived keys)
+        is done once for the whole batch. Sources call it via
+        :func:`apply_batch`.
+
+        Args:
+            values: :class:`dict` with values to store.
+        """
+        if self._ns_prefixes:
+            self._load_namespaces_of(values)
+        if self._templates is not None:
+            self._update_templates(values)
+        dependents = self._dependents
+        if dependents:
+            data = self.data
+            changed = [key for key, value in iteritems(values)
+                       if key in dependents
+                       and not _same_value(data.get(key, _missing), value)]
+            if changed:
+                self._invalidate(changed)
+        self.data.update(values)
+        if self._hashes is not None:
+            for key, value in iteritems(values):
+                self._update_hash(key, value)
+        if self._lazy:
+            self._lazy_done.update(dict.fromkeys(values, self._lazy_seq))
+        if self._dirty is not None:
+            self._dirty.update(values)
+        if self._tracker is not None:
+            self._tracker.sources.update(dict.fromkeys(values, self._source))
+
+    def apply_lazy(self, values, select=None):
+        """Store values which are decoded on first access.
+
+        ``values`` is a read-only mapping, a value is taken from it when the
+        key is read for the first time and then stored in the config. Keys
+        of ``values`` override keys set before, stored values are replaced
+        on first access, so applying takes constant time regardless of
+        number of stored keys. Iteration over the config takes all values,
+        use :meth:`warmup` to take them explicitly. Sources call it via
+        :func:`apply_lazy`.
+
+        Args:
+            values: Read-only mapping with values to store.
+            select: Keys selector.
+        """
+        with self._ns_lock:
+            if self._ns_prefixes:
+                self._load_namespaces_of(
+                    key for key in values if select is None or select(key))
+            # Stored keys are not checked here, they are overridden on
+            # first access (see _lazy_layer()).
+            self._lazy_seq += 1
+            self._lazy.append((values, select, self._source, self._lazy_seq))
+
+            dependents = [key for key in self._dependents if key in values
+                          and (select is None or select(key))]
+            if dependents:
+                self._invalidate(dependents)
+            if self._schema is not None:
+                self._take_lazy()
+
+    def _lazy_layer(self, key):
+        # Newest lazy layer with the key if it's added after the key is
+        # stored.
+        done = self._lazy_done.get(key, 0)
+        if done == self._lazy_seq:
+            return None
+        for layer in reversed(self._lazy):
+            values, select, _, seq = layer
+            if seq <= done:
+                break
+            if key in values and (select is None or select(key)):
+                return layer
+        return None
+
+    def _lazy_get(self, key):
+        # Take the key's value from lazy layers if it overrides stored one.
+        layer = self._lazy_layer(key)
+        if layer is None:
+            # Stored key doesn't need to be checked again.
+            if key in self.data:
+                self._lazy_done[key] = self._lazy_seq
+            return _missing
+        value = layer[0][key]
+        if self._templates is not None:
+            self._update_templates({key: value})
+        self.data[key] = value
+        if self._hashes is not None:
+            self._update_hash(key, value)
+        self._lazy_done[key] = self._lazy_seq
+        if self._dirty is not None:
+            self._dirty.add(key)
+        if self._tracker is not None:
+            self._tracker.sources[key] = layer[2]
+        return value
+
+    def _take_lazy(self):
+        # Take all lazy values, the config becomes a plain one.
+        for values, select, _, _ in self._lazy:
+            for key in values:
+                if select is None or select(key):
+                    self._lazy_get(key)
+        self._lazy = []
+        self._lazy_seq = 0
+        self._lazy_done = {}
+
+    def fingerprint(self):
+        """Content fingerprint.
+
+        Fingerprint is an order-independent hash of all items, equal configs
+        have equal fingerprints in any process. It's computed on first call
+        and then maintained on each change at a cost of hashing the changed
+        item, so comparing configs or detecting no-op reloads is cheap::
+
+            before = config.fingerprint()
+            config.load_from('json', 'config.json')
+            if config.fingerprint() != before:
+                restart_workers()
+
+        Values are hashed by their JSON representation (``repr()`` is used
+        for other objects). Stored (not interpolated) values are hashed and
+        derived keys are not included. Lazy namespaces and values are loaded
+        first.
+
+        Returns:
+            Hex digest string.
+        """
+        if self._ns_prefixes or self._lazy:
+            self.warmup()
+        if self._hashes is None:
+            self._hashes = dict((key, _item_hash(key, value))
+                                for key, value in iteritems(self.data))
+            self._fingerprint = sum(self._hashes.values()) & _FINGERPRINT_MASK
+        return '%040x' % self._fingerprint
+
+    def _update_hash(self, key, value):
+        # Replace item's hash in the fingerprint, _missing removes it.
+        total = self._fingerprint - self._hashes.pop(key, 0)
+        if value is not _missing:
+            self._hashes[key] = item = _item_hash(key, value)
+            total += item
+        self._fingerprint = total & _FINGERPRINT_MASK
+
+    def __iter__(self):
+        if self._ns_prefixes or self._lazy:
+            self.warmup()
+        return iter(self.data)
+
+    def __len__(self):
+        if self._ns_prefixes or self._lazy:
+            self.warmup()
+        return len(self.data)
+
+    def __contains__(self, key):
+        if self._ns_prefixes:
+            self._load_namespaces(key)
+        has = (key in self.data or key in self._derived or
+               (self._lazy and self._lazy_layer(key) is not None))
+        if self._tracker is not None:
+            if has:
+                self._tracker.hits[key] += 1
+            else:
+                self._tracker.misses[key] += 1
+        return has
+
+    def add_namespace(self, prefix, source, *args, **kwargs):
+        """Load source lazily on first access to keys with the given prefix.
+
+        The source is loaded with :meth:`load_from` when a key starting with
+        ``prefix`` is read for the first time (with ``[]``, :meth:`get` or
+        ``in``). Only keys with the prefix are loaded unless ``select`` is
+        passed. Multiple sources may be added for the same prefix, they are
+        loaded in the order they are added::
+
+            config.add_namespace('DB_', 'json', '/etc/app/db.json')
+            config.add_namespace('DB_', 'env', prefix='APP_')
+            config.add_namespace('CACHE_', 'toml', '/etc/app/cache.toml')
+
+            config['DB_HOST']   # Loads 'DB_' namespace.
+
+        Loading is thread-safe and happens once. Lazily loaded values
+        override values of the same keys which were set before the namespace
+        is added. Storing or deleting a key of the namespace loads it first,
+        so values stored later are kept. Iteration over the config loads all
+        namespaces, use :meth:`warmup` to load them explicitly.
+
+        Args:
+            prefix: Keys prefix.
+            source: Config source name.
+            *args: Arguments for config source loader.
+            **kwargs: Keyword arguments for config source loader.
+        """
+        kwargs.setdefault('select', prefix + '*')
+        with self._ns_lock:
+            self._namespaces.setdefault(prefix, []).append(
+                (source, args, kwargs))
+            self._ns_prefixes = tuple(self._namespaces)
+
+    def warmup(self, prefixes=None):
+        """Load lazy namespaces and take lazy values.
+
+        Args:
+            prefixes: Namespace prefixes to load, all by default. Lazy
+                values are taken only if prefixes are not set.
+
+        See Also:
+            :meth:`add_namespace`, :meth:`apply_lazy`.
+        """
+        with self._ns_lock:
+            for prefix in list(self._namespaces):
+                if prefixes is None or prefix in prefixes:
+                    self._load_namespace(prefix)
+            if prefixes is None and self._lazy:
+                self._take_lazy()
+
+    def _load_namespaces(self, key):
+        if not isinstance(key, string_types) or not key.startswith(
+                self._ns_prefixes):
+            return
+        with self._ns_lock:
+            # Other thread may load the namespace while we are waiting.
+            for prefix in list(self._namespaces):
+                if key.startswith(prefix):
+                    self._load_namespace(prefix)
+
+    def _load_namespaces_of(self, keys):
+        # Load namespaces of keys which are about to be stored, so the keys
+        # are not overridden by the namespaces later.
+        prefixes = self._ns_prefixes
+        pending = set(prefix for key in keys if isinstance(key, string_types)
+                      for prefix in prefixes if key.startswith(prefix))
+        if pending:
+            self.warmup(pending)
+
+    def _load_namespace(self, prefix):
+        # Namespace is accessed by its own sources.
+        if prefix in self._ns_loading or prefix not in self._namespaces:
+            return
+
+        self._ns_loading.add(prefix)
+        try:
+            for source, args, kwargs in self._namespaces[prefix]:
+                self.load_from(source, *args, **kwargs)
+            del self._namespaces[prefix]
+            self._ns_prefixes = tuple(self._namespaces)
+        finally:
+            self._ns_loading.discard(prefix)
+
+    def track_access(self, enable=True):
+        """Enable or disable keys access tracking.
+
+        When enabled, reads with ``[]``, :meth:`get` and ``in`` are counted
+        per key, and the source of each loaded value is remembered::
+
+            config.track_access()
+            config.load_from('json', 'config.json')
+            ...
+            config.access_tracker.export('access.json', config)
+
+        Tracking is disabled by default and costs nothing then.
+
+        Args:
+            enable: Enable or disable tracking.
+
+        Returns:
+            :class:`AccessTracker` or ``None`` if tracking is disabled.
+        """
+        if not enable:
+            self._tracker = None
+        elif self._tracker is None:
+            self._tracker = AccessTracker()
+        return self._tracker
+
+    @property
+    def access_tracker(self):
+        """:class:`AccessTracker` or ``None`` if tracking is disabled."""
+        return self._tracker
+
+    def _tracked_getitem(self, key):
+        if self._lazy and self._lazy_done.get(key, 0) != self._lazy_seq:
+            self._lazy_get(key)
+        try:
+            value = self.data[key]
+        except KeyError:
+            try:
+                value = self.__missing__(key)
+            except KeyError:
+                self._tracker.misses[key] += 1
+                raise
+        else:
+            if self._templates and key in self._templates:
+                value = self._resolve(key)
+        self._tracker.hits[key] += 1
+        return value
+
+    def _update_templates(self, values):
+        # Compile templates of the given values before they are stored.
+        templates = self._templates
+        changed = {}
+        for key, value in iteritems(values):
+            if isinstance(value, string_types) and '${' in value:
+                changed[key] = _compile_template(value)
+            elif key in templates:
+                changed[key] = None
+        if not changed:
+            return
+        self._check_cycles(changed)
+
+        for key, template in iteritems(changed):
+            old = templates.pop(key, None)
+            if old is not None:
+                for ref in old[1]:
+                    self._dependents[ref].discard(key)
+            if template is not None:
+                templates[key] = template
+                for ref in template[1]:
+                    self._dependents[ref].add(key)
+            self._derived_values.pop(key, None)
+
+    def _check_cycles(self, changed):
+        # Raise error if changed templates make circular references.
+        templates = self._templates
+
+        def refs_of(key):
+            template = changed[key] if key in changed else templates.get(key)
+            return None if template is None else template[1]
+
+        cycle = _find_cycle([k for k, v in iteritems(changed) if v], refs_of)
+        if cycle is not None:
+            raise ConfigSourceError('Circular reference: %s'
+                                    % ' -> '.join(cycle))
+
+    def _resolve(self, key):
+        values = self._derived_values
+        try:
+            return values[key]
+        except KeyError:
+            pass
+
+        # Unresolved templates the key depends on, in topological order.
+        templates = self._templates
+        order = []
+        seen = set([key])
+        stack = [(key, iter(templates[key][1]))]
+        while stack:
+            for ref in stack[-1][1]:
+                if ref in templates and ref not in values and ref not in seen:
+                    seen.add(ref)
+                    stack.append((ref, iter(templates[ref][1])))
+                    break
+            else:
+                order.append(stack.pop()[0])
+
+        for name in order:
+            fmt, refs = templates[name]
+            try:
+                args = tuple(self[ref] for ref in refs)
+            except KeyError as e:
+                raise ConfigSourceError('Undefined reference in %s: %s'
+                                        % (name, e.args[0]))
+            values[name] = args[0] if fmt is None else fmt % args
+        return values[key]
+
+    def __missing__(self, key):
+        func = self._derived.get(key)
+        if func is None:
+            raise KeyError(key)
+        try:
+            return self._derived_values[key]
+        except KeyError:
+            return self._compute(key, func)
+
+    def derive(self, key, func=None):
+        """Register derived key.
+
+        Derived value is computed by ``func`` on first access and memoized.
+        The function accepts config view and keys it reads are tracked, so
+        the value is computed again only if one of them is changed::
+
+            config.derive('DB_DSN', lambda c: 'postgres://%s:%d/%s' % (
+                c['DB_HOST'], c['DB_PORT'], c['DB_NAME']))
+
+            @config.derive('POOL_SIZE')
+            def pool_size(c):
+                return c['WORKERS'] * c.get('THREADS', 1)
+
+        Derived keys are not stored in the config, so they are not listed in
+        iteration. A key explicitly set in the config overrides derived one.
+
+        Args:
+            key: Config key.
+            func: Callable to compute the value, if not set then decorator
+                is returned.
+        """
+        if func is None:
+            def decorator(f):
+                self.derive(key, f)
+                return f
+            return decorator
+
+        self._derived[key] = func
+        self._invalidate((key,))
+
+    def _compute(self, key, func):
+        if key in self._computing:
+            raise ConfigSourceError('Circular derived key: %s' % key)
+
+        deps = set()
+        self._computing.add(key)
+        try:
+            value = func(_DependencyRecorder(self, deps))
+        finally:
+            self._computing.discard(key)
+
+        for dep in self._derived_deps.get(key, ()):
+            self._dependents[dep].discard(key)
+        for dep in deps:
+            self._dependents[dep].add(key)
+        self._derived_deps[key] = deps
+        self._derived_values[key] = value
+        return value
+
+    def _invalidate(self, keys):
+        # Drop memoized values depending on the given keys.
+        stack = list(keys)
+        values = self._derived_values
+        while stack:
+            key = stack.pop()
+            values.pop(key, None)
+            for derived in self._dependents.get(key, ()):
+                if derived in values:
+                    stack.append(derived)
+
+    def set_schema(self, schema):
+        """Set validation schema.
+
+        All keys will be checked on next :meth:`validate` call.
+
+        Args:
+            schema: :class:`Schema` or rules to construct it, or ``None`` to
+                disable validation.
+        """
+        if schema is not None and not isinstance(schema, Schema):
+            schema = Schema(schema)
+        if schema is not None and self._lazy:
+            self._take_lazy()
+        self._schema = schema
+        self._dirty = set(self.data) if schema is not None else None
+        self._errors = {}
+
+    def validate(self, raise_error=True):
+        """Validate configuration.
+
+        Only keys changed since the last call are checked, errors for other
+        keys are remembered from previous calls. Templates are checked by
+        their resolved values and again when referenced keys are changed.
+
+        Args:
+            raise_error: Raise :class:`ValidationError` if configuration is
+                invalid.
+
+        Returns:
+            List of ``(key, message)`` tuples, empty if config is valid.
+
+        Raises:
+            ValidationError: if configuration is invalid and ``raise_error``
+                is set.
+        """
+        if self._schema is None:
+            return []
+
+        # Required keys may be in namespaces which are not loaded yet.
+        if self._ns_prefixes:
+            self._load_namespaces_of(self._schema.required)
+        dirty, self._dirty = self._dirty, set()
+        data = self.data
+        errors = self._errors
+        for key in self._with_templates(dirty):
+            msg = self._check_stored(key)
+            if msg is None:
+                errors.pop(key, None)
+            else:
+                errors[key] = msg
+
+        result = sorted(iteritems(errors)) + self._schema.missing(data)
+        if result and raise_error:
+            raise ValidationError(result)
+        return result
+
+    def _with_templates(self, keys):
+        # Add templates which depend on the keys directly or via other
+        # templates and derived keys.
+        if not self._templates:
+            return keys
+        keys = set(keys)
+        stack = list(keys)
+        dependents = self._dependents
+        while stack:
+            for key in dependents.get(stack.pop(), ()):
+                if key not in keys:
+                    keys.add(key)
+                    stack.append(key)
+        return keys
+
+    def _check_stored(self, key):
+        # Validate stored value, references are resolved.
+        value = self.data.get(key, _missing)
+        if value is _missing:
+            return None
+        if self._templates and key in self._templates:
+            try:
+                value = self._resolve(key)
+            except ConfigSourceError as e:
+                return str(e)
+        return self._schema.check(key, value)
+
+    def load_from(self, source, *args, **kwargs):
+        """Load configuration from the given ``source``.
+
+        Args:
+            source: Config source name.
+            *args: Arguments for config source loader.
+            **kwargs: Keyword arguments for config source loader,
+                including ``select`` and ``merge`` (see :func:`load_to`).
+
+        Returns:
+            ``True`` if configuration is successfully loaded from the source
+            and ``False`` otherwise.
+
+        See Also:
+            :func:`load_to`, :func:`merge_kwargs`.
+        """
+        kwargs = merge_kwargs(kwargs, self._defaults.get(source))
+        return load_to(self, source, 'dict', *args, **kwargs)
+
+
+class DictConfigLoader(object):
+    """Loader for the :class:`DictConfig`.
+
+    The loader auto-detects config source name by input configuration type.
+    """
+
+    #: Source names by filename extension.
+    extensions = {
+        '.json': 'json',
+        '.env': 'dotenv',
+        '.toml': 'toml',
+        '.ini': 'ini',
+        '.cfgidx': 'indexed',
+    }
+
+    def __init__(self, config):
+        """Construct loader.
+
+        Args:
+            config: :class:`DictConfig` instance.
+        """
+        self.config = config
+
+    def detect_source(self, config, *args, **kwargs):
+        """Detect config source name by input parameters.
+
+        Args:
+            config: Configuration source (like filename, dict or class).
+            args: Arguments for config source loader.
+            kwargs: Keyword arguments for config source loader.
+
+        Returns:
+            Config source name.
+        """
+        if isinstance(config, string_types):
+            parts = config.split('://')
+            if len(parts) == 2:
+                name = parts[0].strip()
+                if not name:
+                    raise ValueError('Invalid source: %s' % config)
+                return name
+            # NOTE: for files like '.env' extension is the whole name.
+            ext = op.splitext(config)[1] or op.basename(config)
+            return self.extensions.get(ext, 'pyfile')
+        elif isinstance(config, dict):
+            return 'dict'
+        else:
+            return 'object'
+
+    def load(self, config, *args, **kwargs):
+        """Load given configuration.
+
+        ``config`` source name is auto-detected by its type:
+
+        * ``json`` is used for filenames with ``.json`` extensions.
+        * ``dotenv`` is used for ``.env`` files.
+        * ``toml`` is used for filenames with ``.toml`` extensions.
+        * ``ini`` is used for filenames with ``.ini`` extensions.
+        * ``<scheme>`` is used for ``<scheme>://...`` strings.
+        * ``pyfile`` is used for other filenames.
+        * ``dict`` is used for dictionaries.
+        * ``object`` is used in all other cases.
+
+        Args:
+            config: Configuration source (like filename, dict or class).
+            args: Arguments for config source loader.
+            kwargs: Keyword arguments for config source loader.
+        """
+        source = self.detect_source(config, *args, **kwargs)
+        self.config.load_from(source, config, *args, **kwargs)
+
+
+# -- Configuration pool.
+
+def _import_path(obj):
+    # Import path of a module, class or function, or None if the object
+    # can't be imported by it (like classes defined in functions).
+    if isinstance(obj, ModuleType):
+        name = obj.__name__
+        return name if sys.modules.get(name) is obj else None
+    module = getattr(obj, '__module__', None)
+    name = getattr(obj, '__qualname__', None) or getattr(obj, '__name__', None)
+    if not module or not name:
+        return None
+    target = sys.modules.get(module)
+    for part in name.split('.'):
+        target = getattr(target, part, None)
+    return '%s:%s' % (module, name) if target is obj else None
+
+
+def _spec_default(obj):
+    # Stable representation of non-JSON values in source specs.
+    # Modules, classes and functions are identified by their import path,
+    # other objects have no stable identity.
+    path = _import_path(obj)
+    if path is None:
+        raise ConfigSourceError(
+            "Can't build key for the sources, object has no import path: %r"
+            % (obj,))
+    return path
+
+
+def make_source_key(sources):
+    """Build canonical key for the list of sources.
+
+    Sources are the same as for :func:`load_multiple_to`. The key doesn't
+    depend on the order of loader parameters, so it may be used to identify
+    configurations built from equal source lists.
+
+    Modules, classes and functions in parameters are identified by their
+    import path. Other objects (instances, classes defined in functions)
+    have no stable identity, so they are rejected.
+
+    Args:
+        sources: List of dicts with loaders' parameters.
+
+    Returns:
+        Key string.
+
+    Raises:
+        ConfigSourceError: if parameters contain objects without import path.
+    """
+    return json.dumps(sources, sort_keys=True, default=_spec_default)
+
+
+def _estimate_size(config):
+    # Shallow estimation of memory used by the config values.
+    data = getattr(config, 'data', config)
+    size = sys.getsizeof(data)
+    for key, value in iteritems(data):
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+def _pool_key(sources, key):
+    # Explicit keys are wrapped so they don't clash with generated ones.
+    return make_source_key(sources) if key is None else ('key', key)
+
+
+class _PoolEntry(object):
+    __slots__ = ('config', 'nbytes', 'expires')
+
+    def __init__(self, config, nbytes, expires):
+        self.config = config
+        self.nbytes = nbytes
+        self.expires = expires
+
+
+class _PendingBuild(object):
+    # Configuration which is being built by another thread.
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.config = None
+        self.error = None
+
+    def finish(self, config=None, error=None):
+        self.config = config
+        self.error = error
+        self.event.set()
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.config
+
+
+class ConfigPool(object):
+    """Bounded pool of configurations built from source lists.
+
+    The pool builds configuration on first request with
+    :func:`load_multiple_to` and returns the same object for equal source
+    lists until it's evicted. Concurrent requests for the same sources are
+    deduplicated: only one thread builds the configuration, others wait for
+    the result.
+
+    Example::
+
+        pool = ConfigPool(maxsize=100, ttl=300)
+
+        config = pool.get([
+            {'from': 'json', 'filename': '/etc/app/%s.json' % tenant},
+            {'from': 'env', 'prefix': 'APP_'}
+        ])
+
+    **Note**: configurations are shared between callers, so don't modify them.
+
+    Source lists are identified by :func:`make_source_key`. If they contain
+    objects without import path then pass an explicit ``key``::
+
+        config = pool.get([{'from': 'object', 'obj': settings}],
+                          key='tenant-%s' % tenant)
+
+    Args:
+        maxsize: Max number of configurations in the pool.
+        maxbytes: Max estimated size of the pooled configurations
+            (``None`` means no limit).
+        ttl: Time in seconds after which configuration is rebuilt
+            (``None`` means configurations never expire).
+        factory: Callable to construct empty configuration object.
+        timer: Callable returning current time in seconds.
+    """
+
+    def __init__(self, maxsize=128, maxbytes=None, ttl=None,
+                 factory=DictConfig, timer=time.time):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.factory = factory
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._stats = dict(hits=0, misses=0, waits=0, evictions=0,
+                           expirations=0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, sources):
+        with self._lock:
+            return self._lookup(make_source_key(sources)) is not None
+
+    def get(self, sources, key=None):
+        """Get configuration for the given sources.
+
+        Configuration is built if it's not in the pool yet.
+
+        Args:
+            sources: List of dicts with loaders' parameters
+                (see :func:`load_multiple_to`).
+            key: Key identifying the sources, by default it's built by
+                :func:`make_source_key`.
+
+        Returns:
+            Configuration object.
+
+        Raises:
+            ConfigSourceError: if key can't be built for the sources.
+        """
+        key = _pool_key(sources, key)
+
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._stats['hits'] += 1
+                return entry.config
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                self._stats['waits'] += 1
+            else:
+                self._stats['misses'] += 1
+                self._pending[key] = _PendingBuild()
+
+        if pending is not None:
+            return pending.wait()
+        return self._build(key, sources)
+
+    def invalidate(self, sources, key=None):
+        """Remove configuration for the given sources from the pool.
+
+        Args:
+            sources: List of dicts with loaders' parameters.
+            key: Key identifying the sources (see :meth:`get`).
+
+        Returns:
+            ``True`` if configuration was in the pool.
+        """
+        key = _pool_key(sources, key)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._nbytes -= entry.nbytes
+            return True
+
+    def clear(self):
+        """Remove all configurations from the pool."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        """Get pool statistics.
+
+        Returns:
+            :class:`dict` with ``hits``, ``misses``, ``waits`` (requests
+            which waited for a build in another thread), ``evictions``,
+            ``expirations``, ``size`` and ``nbytes``.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['nbytes'] = self._nbytes
+        return stats
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= self.timer():
+            del self._entries[key]
+            self._nbytes -= entry.nbytes
+            self._stats['expirations'] += 1
+            return None
+        # Mark as most recently used.
+        del self._entries[key]
+        self._entries[key] = entry
+        return entry
+
+    def _build(self, key, sources):
+        try:
+            config = self.factory()
+            # load_multiple_to() modifies parameters, so pass copies.
+            load_multiple_to(config, [dict(x) for x in sources])
+            nbytes = (_estimate_size(config) if self.maxbytes is not None
+                      else 0)
+            expires = self.timer() + self.ttl if self.ttl is not None else None
+        except BaseException as e:
+            # Waiters must not hang even if the build is interrupted.
+            with self._lock:
+                pending = self._pending.pop(key)
+            if not isinstance(e, Exception):
+                e = ConfigSourceError('Configuration build is interrupted: '
+                                      '%r' % (e,))
+            pending.finish(error=e)
+            raise
+
+        with self._lock:
+            pending = self._pending.pop(key)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[key] = _PoolEntry(config, nbytes, expires)
+            self._nbytes += nbytes
+            self._evict()
+
+        pending.finish(config=config)
+        return config
+
+    def _evict(self):
+        # Drop least recently used configurations until limits are met.
+        # The most recent one is always kept.
+        while len(self._entries) > 1 and (
+                len(self._entries) > self.maxsize
+                or (self.maxbytes is not None
+                    and self._nbytes > self.maxbytes)):
+            _, entry = self._entries.popitem(last=False)
+            self._nbytes -= entry.nbytes
+            self._stats['evictions'] += 1
+
+
+# -- Configuration compilation.
+
+# Generated module header.
+_COMPILED_HEADER = '''# Generated by config-source, don't edit.
+#
+# Sources: %s
+
+__config_source_stamp__ = %r
+'''
+
+_STAMP_RE = re.compile(r"^__config_source_stamp__ = '([0-9a-f]+)'$", re.M)
+
+
+def _sources_stamp(sources):
+    # Hash of the source list and state of files and environment it reads.
+    h = hashlib.sha1(make_source_key(sources).encode('utf-8'))
+
+    for params in sources:
+        for name, value in sorted(iteritems(params)):
+            if not isinstance(value, string_types) or name in ('from', 'type'):
+                continue
+            path = strip_type_prefix(value, params.get('from', ''))
+            path = op.expanduser(path)
+            if op.isfile(path):
+                st = os.stat(path)
+                h.update(('%s:%r:%d\n' % (path, st.st_mtime, st.st_size))
+                         .encode('utf-8'))
+
+        if params.get('from') == 'env':
+            prefix = params.get('prefix', '').upper()
+            env = sorted(x for x in iteritems(os.environ)
+                         if x[0].startswith(prefix))
+            h.update(json.dumps(env).encode('utf-8'))
+
+    return h.hexdigest()
+
+
+def is_compiled_stale(filename, sources):
+    """Check if compiled configuration module is outdated.
+
+    Module is outdated if it doesn't exist, or the source list is changed, or
+    files or environment variables the sources read are changed.
+
+    Args:
+        filename: Compiled module filename.
+        sources: List of dicts with loaders' parameters
+            (see :func:`load_multiple_to`).
+
+    Returns:
+        ``True`` if module needs to be compiled again.
+
+    See Also:
+        :func:`compile_config`.
+    """
+    try:
+        with open(filename) as f:
+            match = _STAMP_RE.search(f.read())
+    except (IOError, OSError):
+        return True
+    return match is None or match.group(1) != _sources_stamp(sources)
+
+
+_IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _compiled_file(filename):
+    # Byte-compiled file name for the module.
+    try:
+        from importlib.util import cache_from_source
+    except ImportError:  # pragma: no cover
+        return filename + 'c'
+    return cache_from_source(filename)  # pragma: no cover
+
+
+def _format_value(key, value):
+    if (not isinstance(key, string_types) or not _IDENTIFIER_RE.match(key)
+            or keyword.iskeyword(key)):
+        raise ConfigSourceError('Key is not a python identifier: %s' % key)
+    text = repr(value)
+    try:
+        valid = ast.literal_eval(text) == value
+    except (ValueError, SyntaxError):
+        valid = False
+    if not valid:
+        raise ConfigSourceError('Value is not a literal: %s' % key)
+    return text
+
+
+def _replace_file(tmp, filename):
+    # Atomically replace filename with tmp file.
+    if PY2:  # pragma: no cover
+        if op.exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+    else:  # pragma: no cover
+        os.replace(tmp, filename)
+
+
+def compile_config(sources, filename, force=False):
+    """Compile configuration into a python module.
+
+    Configuration is loaded from the given sources with
+    :func:`load_multiple_to` and its keys are written to the module as
+    constants. The module is also byte-compiled, so it can be imported or
+    loaded without parsing the original sources::
+
+        compile_config([
+            {'from': 'json', 'filename': '/etc/app/config.json'},
+            {'from': 'env', 'prefix': 'APP_'}
+        ], 'app_config.py')
+
+        import app_config
+        config.load_from('object', app_config)
+
+    Only files and environment variables are checked to detect if the module
+    is outdated, other sources (like HTTP) are not tracked.
+
+    Args:
+        sources: List of dicts with loaders' parameters.
+        filename: Output module filename.
+        force: Compile even if the module is up to date.
+
+    Returns:
+        ``True`` if module is compiled and ``False`` if it's up to date.
+
+    Raises:
+        ConfigSourceError: if a config key is not a python identifier or a
+            value can't be written as a literal.
+
+    See Also:
+        :func:`is_compiled_stale`.
+    """
+    if not force and not is_compiled_stale(filename, sources):
+        return False
+
+    stamp = _sources_stamp(sources)
+    config = {}
+    # load_multiple_to() modifies parameters, so pass copies.
+    load_multiple_to(config, [dict(x) for x in sources])
+
+    lines = [_COMPILED_HEADER % (make_source_key(sources), stamp)]
+    for key in sorted(config):
+        lines.append('%s = %s\n' % (key, _format_value(key, config[key])))
+
+    # The module is replaced only if it's compiled successfully.
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            f.writelines(lines)
+        py_compile.compile(tmp, cfile=_compiled_file(filename),
+                           dfile=filename, doraise=True)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    _replace_file(tmp, filename)
+    return True
+
+
+# -- Default configuration sources.
+
+@config_source('object', selectable=True)
+def load_from_object(config, obj, select=None):
+    """Update ``config`` with values from the given ``object``.
+
+    Only uppercase attributes will be loaded into ``config``.
+
+    Args:
+        config: Dict-like config.
+        obj: Object with configuration.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one attribute is loaded to ``config``.
+    """
+    names = _selected_names(select)
+    if names is not None:
+        keys = [x for x in names if hasattr(obj, x)]
+        select = None
+    else:
+        keys = dir(obj)
+
+    values = dict((key, getattr(obj, key)) for key in keys
+                  if key.isupper() and (select is None or select(key)))
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+def _iter_selected(obj, select):
+    # Iterate over dict items which may be selected.
+    names = _selected_names(select)
+    if names is not None and len(names) < len(obj):
+        return ((x, obj[x]) for x in names if x in obj)
+    return iteritems(obj)
+
+
+@config_source('dict', selectable=True)
+def load_from_dict(config, obj, skip_none=False, select=None):
+    """Update ``config`` with values from the given dict-like object.
+
+    Only uppercase keys will be loaded into ``config``.
+
+    Args:
+        config: Dict-like config.
+        obj: Dict-like object.
+        skip_none: Skip configs with ``None`` values.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one key is loaded to ``config``.
+    """
+    values = dict((key, val) for key, val in _iter_selected(obj, select)
+                  if key.isupper() and (select is None or select(key))
+                  and (not skip_none or val is not None))
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+def _iter_env(prefix, trim_prefix, select):
+    # Iterate over (config key, value) for environment variables
+    # with the given prefix.
+    names = _selected_names(select)
+    if names is not None:
+        for key in names:
+            name = prefix + key if trim_prefix else key
+            if name.startswith(prefix) and name in os.environ:
+                yield key, os.environ[name]
+        return
+
+    for key, value in iteritems(os.environ):
+        if key.startswith(prefix):
+            # Drop prefix: <prefix><name>
+            if trim_prefix:
+                key = key[len(prefix):]
+            if select is None or select(key):
+                yield key, value
+
+
+@config_source('env', selectable=True)
+def load_from_env(config, prefix, trim_prefix=True, select=None):
+    """Update ``config`` with values from current environment.
+
+    Args:
+        config: Dict-like config.
+        prefix: Environment variables prefix.
+        trim_prefix: Include or not prefix to result config name.
+        select: Keys selector (applies to result config names).
+
+    Returns:
+        ``True`` if at least one environment variable is loaded.
+    """
+    values = dict(_iter_env(prefix.upper(), trim_prefix, select))
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+def strip_type_prefix(path, prefix):
+    """Strip source type prefix from the path.
+
+    This function strips prefix from strings like::
+
+        [<prefix>]://<path>
+
+    For example::
+
+        pyfile://home/me/config.py -> /home/me/config.py
+        json://path/to/some.cfg -> /path/to/some.cfg
+
+    Args:
+        path: Path string.
+        prefix: Prefix to strip.
+
+    Returns:
+        Path string.
+    """
+    path = path.lstrip()
+    if path.startswith(prefix + '://'):
+        path = path[len(prefix) + 2:]
+    return path
+
+
+@config_source('pyfile', selectable=True)
+def load_from_pyfile(config, source, silent=False, select=None):
+    """Update ``config`` with values from the python file or file-like object.
+
+    Args:
+        config: Dict-like config.
+        source: Python filename or file-like object.
+        silent: Don't raise an error on missing files.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the file is loaded.
+    """
+    is_obj = hasattr(source, 'read')
+
+    d = ModuleType('config')
+
+    if is_obj:
+        d.__file__ = 'config'
+        exec(compile(source.read(), 'config', 'exec'), d.__dict__)
+    else:
+        d.__file__ = source
+
+        source = strip_type_prefix(source, 'pyfile')
+        if not op.exists(source):
+            if not silent:
+                raise IOError('File is not found: %s' % source)
+            return False
+
+        with open(source, mode='rb') as config_file:
+            exec(compile(config_file.read(), source, 'exec'), d.__dict__)
+
+    return load_to(config, 'object', 'dict', d, select=select)
+
+
+@config_source('json', selectable=True)
+def load_from_json(config, filename, silent=False, select=None):
+    """Update ``config`` with values from the given JSON file.
+
+    Args:
+        config: Dict-like config.
+        filename: JSON filename.
+        silent: Don't raise an error on missing files.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the file is loaded.
+    """
+    filename = strip_type_prefix(filename, 'json')
+    if not op.exists(filename):
+        if not silent:
+            raise IOError('File is not found: %s' % filename)
+        return False
+
+    with open(filename) as f:
+        d = json.load(f)
+
+    return load_to(config, 'dict', 'dict', d, select=select)
+
+
+def _read_text(filename, prefix, silent):
+    # Read text file for a source, returns None if it's missing.
+    filename = strip_type_prefix(filename, prefix)
+    if not op.exists(filename):
+        if not silent:
+            raise IOError('File is not found: %s' % filename)
+        return None
+    with io.open(filename, encoding='utf-8') as f:
+        return f.read()
+
+
+def _is_selected(key, select):
+    return key.isupper() and (select is None or select(key))
+
+
+def _line_number(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+# -- .env parser.
+
+_DOTENV_KEY_RE = re.compile(
+    r'[ \t]*(?:export[ \t]+)?([A-Za-z_][A-Za-z0-9_.]*)[ \t]*=[ \t]*')
+_DOTENV_VALUE_RE = re.compile(
+    r'"((?:[^"\\]|\\.)*)"|\'([^\']*)\'|([^\n]*)', re.S)
+_DOTENV_TAIL_RE = re.compile(r'[ \t\r]*(?:#[^\n]*)?(?:\n|$)')
+_DOTENV_COMMENT_RE = re.compile(r'[ \t]#')
+_DOTENV_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t'}
+_DOTENV_ESCAPE_RE = re.compile(r'\\(.)', re.S)
+
+
+def _dotenv_unescape(value):
+    return _DOTENV_ESCAPE_RE.sub(
+        lambda m: _DOTENV_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def parse_dotenv(text, select=None):
+    r"""Parse ``.env`` file contents.
+
+    Supported syntax::
+
+        # Comment.
+        KEY=value           # Trailing comment.
+        export KEY=value
+        KEY="double quoted\nvalue with escapes,
+        may span multiple lines"
+        KEY='single quoted value'
+
+    Keys are filtered while parsing: values of lowercase and not selected keys
+    are skipped without processing.
+
+    Args:
+        text: File contents.
+        select: Keys selector (see :func:`make_selector`).
+
+    Returns:
+        :class:`dict` with selected uppercase keys.
+
+    Raises:
+        ConfigSourceError: on syntax errors.
+    """
+    select = make_selector(select)
+    result = {}
+    pos = 0
+    size = len(text)
+    key_match = _DOTENV_KEY_RE.match
+    value_match = _DOTENV_VALUE_RE.match
+    tail_match = _DOTENV_TAIL_RE.match
+
+    while pos < size:
+        m = key_match(text, pos)
+        if m is None:
+            # Blank line or comment.
+            m = tail_match(text, pos)
+            if m is None or m.end() == pos and pos < size:
+                raise ConfigSourceError('Invalid .env syntax at line %d'
+                                        % _line_number(text, pos))
+            pos = m.end()
+            continue
+
+        key = m.group(1)
+        m = value_match(text, m.end())
+        double, single, raw = m.groups()
+        pos = m.end()
+
+        if raw is not None:
+            # Unquoted value ends at the line end or trailing comment.
+            if _is_selected(key, select):
+                result[key] = _DOTENV_COMMENT_RE.split(raw, 1)[0].strip()
+            continue
+
+        if _is_selected(key, select):
+            result[key] = (single if double is None
+                           else _dotenv_unescape(double))
+        m = tail_match(text, pos)
+        if m is None:
+            raise ConfigSourceError('Invalid .env syntax at line %d'
+                                    % _line_number(text, pos))
+        pos = m.end()
+
+    return result
+
+
+# -- TOML parser.
+
+try:
+    _utc = datetime.timezone.utc
+    _fixed_timezone = datetime.timezone
+except AttributeError:  # pragma: no cover
+    class _fixed_timezone(datetime.tzinfo):
+        def __init__(self, offset):
+            self._offset = offset
+
+        def utcoffset(self, dt):
+            return self._offset
+
+        def dst(self, dt):
+            return datetime.timedelta(0)
+
+        def tzname(self, dt):
+            return None
+
+    _utc = _fixed_timezone(datetime.timedelta(0))
+
+_TOML_WS_RE = re.compile(r'[ \t]*')
+_TOML_BLANK_RE = re.compile(r'(?:[ \t\r\n]+|#[^\n]*)*')
+_TOML_EOL_RE = re.compile(r'[ \t]*(?:#[^\n]*)?(?:\r?\n|$)')
+_TOML_BARE_KEY_RE = re.compile(r'[A-Za-z0-9_-]+')
+_TOML_BASIC_RE = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+_TOML_LITERAL_RE = re.compile(r"'([^'\n]*)'")
+_TOML_ML_BASIC_RE = re.compile(r'"""((?:[^"\\]|\\.|"(?!""))*)("{3,5})', re.S)
+_TOML_ML_LITERAL_RE = re.compile(r"'''((?:[^']|'(?!''))*)('{3,5})", re.S)
+_TOML_BOOL_RE = re.compile(r'true|false')
+# Tokens to skip a value: strings, brackets, newlines and other text.
+_TOML_SKIP_RE = re.compile(
+    r'"""(?:[^"\\]|\\.|"(?!""))*"{3,5}'
+    r"|'''(?:[^']|'(?!''))*'{3,5}"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'[^'\n]*'"
+    r'|#[^\n]*'
+    r'|[^"\'\[\]{}\n#]+|[\[{]|[\]}]|\n|.', re.S)
+_TOML_DATETIME_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2})'
+    r'(?:[Tt ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?'
+    r'(?:([Zz])|([+-])(\d{2}):(\d{2}))?)?'
+    r'|(\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?')
+_TOML_NUMBER_RE = re.compile(
+    r'[+-]?(?:0x[0-9A-Fa-f_]+|0o[0-7_]+|0b[01_]+|inf|nan'
+    r'|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d[\d_]*)?)')
+_TOML_ESCAPE_RE = re.compile(
+    r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|([btnfr"\\])'
+    r'|[ \t]*\r?\n[ \t\r\n]*)')
+_TOML_ESCAPES = {'b': '\b', 't': '\t', 'n': '\n', 'f': '\f', 'r': '\r',
+                 '"': '"', '\\': '\\'}
+_TOML_INT_BASES = {'0x': 16, '0o': 8, '0b': 2}
+
+
+def _toml_unescape(m):
+    code = m.group(1) or m.group(2)
+    if code is not None:
+        return unichr(int(code, 16))
+    if m.group(3) is not None:
+        return _TOML_ESCAPES[m.group(3)]
+    # Line ending backslash: trim whitespace and newlines.
+    return ''
+
+
+def _toml_number(text):
+    text = text.replace('_', '')
+    sign = -1 if text.startswith('-') else 1
+    digits = text.lstrip('+-')
+    base = _TOML_INT_BASES.get(digits[:2])
+    if base is not None:
+        return sign * int(digits[2:], base)
+    if digits in ('inf', 'nan') or any(c in digits for c in '.eE'):
+        return float(text)
+    return int(text)
+
+
+def _toml_datetime(m):
+    if m.group(12) is not None:
+        return datetime.time(*_toml_time(m.group(12, 13, 14, 15)))
+
+    date = tuple(int(x) for x in m.group(1, 2, 3))
+    if m.group(4) is None:
+        return datetime.date(*date)
+
+    tz = None
+    if m.group(8) is not None:
+        tz = _utc
+    elif m.group(9) is not None:
+        offset = datetime.timedelta(hours=int(m.group(10)),
+                                    minutes=int(m.group(11)))
+        tz = _fixed_timezone(-offset if m.group(9) == '-' else offset)
+    return datetime.datetime(*(date + _toml_time(m.group(4, 5, 6, 7))),
+                             tzinfo=tz)
+
+
+def _toml_time(groups):
+    hour, minute, second, fraction = groups
+    micro = int((fraction or '0')[:6].ljust(6, '0'))
+    return int(hour), int(minute), int(second), micro
+
+
+class _TomlParser(object):
+    # Recursive descent TOML parser.
+    #
+    # Values of not selected top-level keys and tables are only scanned to
+    # find their end: they are not validated, unescaped, converted or stored.
+
+    def __init__(self, text, select):
+        self.text = text
+        self.pos = 0
+        self.select = make_selector(select)
+        self.result = {}
+
+    def error(self, msg):
+        raise ConfigSourceError('Invalid TOML: %s at line %d'
+                                % (msg, _line_number(self.text, self.pos)))
+
+    def skip(self, regex):
+        self.pos = regex.match(self.text, self.pos).end()
+
+    def expect(self, char):
+        if not self.text.startswith(char, self.pos):
+            self.error('expected %r' % char)
+        self.pos += len(char)
+
+    def parse(self):
+        text = self.text
+        table = self.result
+        while True:
+            self.skip(_TOML_BLANK_RE)
+            if self.pos >= len(text):
+                return self.result
+            if text[self.pos] == '[':
+                table = self.header()
+            else:
+                self.key_value(table)
+            m = _TOML_EOL_RE.match(text, self.pos)
+            if m is None:
+                self.error('expected end of line')
+            self.pos = m.end()
+
+    def is_selected(self, table, key):
+        if table is None:
+            return False
+        return table is not self.result or _is_selected(key, self.select)
+
+    def key_value(self, table):
+        keys = self.key()
+        self.skip(_TOML_WS_RE)
+        self.expect('=')
+        self.skip(_TOML_WS_RE)
+        if self.is_selected(table, keys[0]):
+            self.assign(table, keys, self.value(True))
+        else:
+            self.skip_value()
+
+    def skip_value(self):
+        # Skip tokens until newline outside of brackets.
+        depth = 0
+        for m in _TOML_SKIP_RE.finditer(self.text, self.pos):
+            char = m.group(0)[0]
+            if char in '[{':
+                depth += 1
+            elif char in ']}':
+                depth -= 1
+            elif char == '\n' and depth <= 0:
+                self.pos = m.start()
+                return
+        self.pos = len(self.text)
+
+    def header(self):
+        is_array = self.text.startswith('[[', self.pos)
+        self.pos += 2 if is_array else 1
+        self.skip(_TOML_WS_RE)
+        keys = self.key()
+        self.skip(_TOML_WS_RE)
+        self.expect(']]' if is_array else ']')
+
+        if not self.is_selected(self.result, keys[0]):
+            return None
+        if not is_array:
+            return self.table(self.result, keys)
+
+        parent = self.table(self.result, keys[:-1])
+        tables = parent.setdefault(keys[-1], [])
+        if not isinstance(tables, list):
+            self.error('duplicate key %s' % keys[-1])
+        tables.append({})
+        return tables[-1]
+
+    def table(self, table, keys):
+        for key in keys:
+            table = table.setdefault(key, {})
+            if isinstance(table, list) and table:
+                table = table[-1]
+            if not isinstance(table, dict):
+                self.error('duplicate key %s' % key)
+        return table
+
+    def assign(self, table, keys, value):
+        table = self.table(table, keys[:-1])
+        if keys[-1] in table:
+            self.error('duplicate key %s' % keys[-1])
+        table[keys[-1]] = value
+
+    def key(self):
+        keys = [self.simple_key()]
+        while True:
+            self.skip(_TOML_WS_RE)
+            if not self.text.startswith('.', self.pos):
+                return keys
+            self.pos += 1
+            self.skip(_TOML_WS_RE)
+            keys.append(self.simple_key())
+
+    def simple_key(self):
+        for regex in (_TOML_BARE_KEY_RE, _TOML_BASIC_RE, _TOML_LITERAL_RE):
+            m = regex.match(self.text, self.pos)
+            if m is not None:
+                self.pos = m.end()
+                if regex is _TOML_BASIC_RE:
+                    return _TOML_ESCAPE_RE.sub(_toml_unescape, m.group(1))
+                return m.group(m.lastindex or 0)
+        self.error('invalid key')
+
+    def value(self, build):
+        char = self.text[self.pos:self.pos + 1]
+        if char == '"' or char == "'":
+            return self.string(build)
+        if char == '[':
+            return self.array(build)
+        if char == '{':
+            return self.inline_table(build)
+        return self.scalar(build)
+
+    def string(self, build):
+        text = self.text
+        if text.startswith('"""', self.pos):
+            regex, escapes, multiline = _TOML_ML_BASIC_RE, True, True
+        elif text.startswith("'''", self.pos):
+            regex, escapes, multiline = _TOML_ML_LITERAL_RE, False, True
+        elif text.startswith('"', self.pos):
+            regex, escapes, multiline = _TOML_BASIC_RE, True, False
+        else:
+            regex, escapes, multiline = _TOML_LITERAL_RE, False, False
+
+        m = regex.match(text, self.pos)
+        if m is None:
+            self.error('invalid string')
+        self.pos = m.end()
+        if not build:
+            return None
+
+        value = m.group(1)
+        if multiline:
+            # Closing delimiter may be preceded by one or two quotes.
+            value += m.group(2)[3:]
+            if value.startswith('\r\n'):
+                value = value[2:]
+            elif value.startswith('\n'):
+                value = value[1:]
+        if escapes:
+            value = _TOML_ESCAPE_RE.sub(_toml_unescape, value)
+        return value
+
+    def scalar(self, build):
+        for regex in (_TOML_BOOL_RE, _TOML_DATETIME_RE, _TOML_NUMBER_RE):
+            m = regex.match(self.text, self.pos)
+            if m is not None:
+                break
+        else:
+            self.error('invalid value')
+
+        self.pos = m.end()
+        if not build:
+            return None
+        if regex is _TOML_BOOL_RE:
+            return m.group(0) == 'true'
+        if regex is _TOML_DATETIME_RE:
+            return _toml_datetime(m)
+        return _toml_number(m.group(0))
+
+    def array(self, build):
+        self.pos += 1
+        items = [] if build else None
+        while True:
+            self.skip(_TOML_BLANK_RE)
+            if self.text.startswith(']', self.pos):
+                break
+            item = self.value(build)
+            if build:
+                items.append(item)
+            self.skip(_TOML_BLANK_RE)
+            if not self.text.startswith(',', self.pos):
+                break
+            self.pos += 1
+        self.expect(']')
+        return items
+
+    def inline_table(self, build):
+        self.pos += 1
+        table = {} if build else None
+        self.skip(_TOML_WS_RE)
+        while not self.text.startswith('}', self.pos):
+            keys = self.key()
+            self.skip(_TOML_WS_RE)
+            self.expect('=')
+            self.skip(_TOML_WS_RE)
+            value = self.value(build)
+            if build:
+                self.assign(table, keys, value)
+            self.skip(_TOML_WS_RE)
+            if not self.text.startswith(',', self.pos):
+                break
+            self.pos += 1
+            self.skip(_TOML_WS_RE)
+        self.expect('}')
+        return table
+
+
+def parse_toml(text, select=None):
+    """Parse TOML document.
+
+    Tables are loaded as nested dicts. Keys are filtered while parsing:
+    values of lowercase and not selected top-level keys and tables are
+    scanned but not decoded or stored.
+
+    Args:
+        text: Document.
+        select: Keys selector (see :func:`make_selector`), applies to
+            top-level keys.
+
+    Returns:
+        :class:`dict` with selected uppercase top-level keys.
+
+    Raises:
+        ConfigSourceError: on syntax errors.
+    """
+    return _TomlParser(text, select).parse()
+
+
+# -- INI parser.
+
+_INI_SECTION_RE = re.compile(r'\[([^\]]+)\][ \t]*$')
+_INI_OPTION_RE = re.compile(r'([^=:\s][^=:]*?)[ \t]*[=:][ \t]*(.*)$')
+
+
+def _ini_section(result, name, section, select):
+    # Get dict to store options of the section (None to skip them) and
+    # flag if options are top-level keys.
+    if section is not None:
+        return (result, True) if name == section else (None, False)
+    if _is_selected(name, select):
+        return result.setdefault(name, {}), False
+    return None, False
+
+
+def parse_ini(text, section=None, select=None):
+    """Parse INI file contents.
+
+    Options before the first section are loaded as top-level keys. Sections
+    with uppercase names are loaded as dicts of their options. If
+    ``section`` is set then only options of that section are loaded as
+    top-level keys. Values are strings, indented lines continue the value of
+    the previous option.
+
+    Keys are filtered while parsing: lines of not selected options and
+    sections are not processed.
+
+    Args:
+        text: File contents.
+        section: Name of the section to load.
+        select: Keys selector (see :func:`make_selector`), applies to
+            top-level keys.
+
+    Returns:
+        :class:`dict` with selected uppercase top-level keys.
+
+    Raises:
+        ConfigSourceError: on syntax errors.
+    """
+    select = make_selector(select)
+    result = {}
+    # Where to store options of the current section (None to skip).
+    target = None if section is not None else result
+    top_level = True
+    last = None
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        stripped = line.strip()
+        if not stripped or stripped[0] in '#;':
+            continue
+
+        if line[0] in ' \t' and last is not None:
+            # Continuation of the previous option value.
+            if last:
+                target[last] += '\n' + stripped
+            continue
+
+        m = _INI_SECTION_RE.match(stripped)
+        if m is not None:
+            target, top_level = _ini_section(result, m.group(1).strip(),
+                                             section, select)
+            last = None
+            continue
+
+        if target is None:
+            last = ''
+            continue
+
+        m = _INI_OPTION_RE.match(stripped)
+        if m is None:
+            raise ConfigSourceError('Invalid INI syntax at line %d' % lineno)
+        key = m.group(1)
+        if top_level and not _is_selected(key, select):
+            last = ''
+            continue
+        target[key] = m.group(2)
+        last = key
+
+    return result
+
+
+@config_source('dotenv', selectable=True)
+def load_from_dotenv(config, filename, silent=False, select=None):
+    """Update ``config`` with values from the given ``.env`` file.
+
+    Args:
+        config: Dict-like config.
+        filename: File name.
+        silent: Don't raise an error on missing files.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the file is loaded.
+
+    See Also:
+        :func:`parse_dotenv`.
+    """
+    text = _read_text(filename, 'dotenv', silent)
+    if text is None:
+        return False
+    values = parse_dotenv(text, select)
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+@config_source('toml', selectable=True)
+def load_from_toml(config, filename, silent=False, select=None):
+    """Update ``config`` with values from the given TOML file.
+
+    Args:
+        config: Dict-like config.
+        filename: File name.
+        silent: Don't raise an error on missing files.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the file is loaded.
+
+    See Also:
+        :func:`parse_toml`.
+    """
+    text = _read_text(filename, 'toml', silent)
+    if text is None:
+        return False
+    values = parse_toml(text, select)
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+@config_source('ini', selectable=True)
+def load_from_ini(config, filename, section=None, silent=False, select=None):
+    """Update ``config`` with values from the given INI file.
+
+    Args:
+        config: Dict-like config.
+        filename: File name.
+        section: Name of the section to load as top-level keys.
+        silent: Don't raise an error on missing files.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the file is loaded.
+
+    See Also:
+        :func:`parse_ini`.
+    """
+    text = _read_text(filename, 'ini', silent)
+    if text is None:
+        return False
+    values = parse_ini(text, section, select)
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+class FileBlob(object):
+    """Read-only file contents mapped into memory.
+
+    File is memory-mapped on first access to the contents, so its pages are
+    shared between processes by the OS page cache and no copy is made until
+    :meth:`tobytes` or :meth:`decode` is called::
+
+        blob = config['CA_BUNDLE']
+        header = blob[:64]          # memoryview, no copy.
+        data = bytes(blob)          # copy.
+
+    Before python 3.12 python classes can't implement the buffer protocol,
+    so pass :attr:`view` to functions which require bytes-like objects::
+
+        hashlib.sha256(blob.view)
+        ssl.create_default_context(cadata=blob.view.tobytes())
+
+    Args:
+        filename: File to map.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._view = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'FileBlob(%r)' % self.filename
+
+    @property
+    def view(self):
+        """Read-only :class:`memoryview` of the file contents."""
+        if self._view is None:
+            with self._lock:
+                if self._view is None:
+                    self._view = self._map()
+        return self._view
+
+    def _map(self):
+        with open(self.filename, 'rb') as f:
+            # Empty files can't be mapped.
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(b'')
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if PY2:  # pragma: no cover
+            return buffer(data)  # noqa: F821
+        return memoryview(data)  # pragma: no cover
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, index):
+        return self.view[index]
+
+    def __buffer__(self, flags):  # pragma: no cover
+        # Buffer protocol for python 3.12+ (PEP 688).
+        return self.view.__buffer__(flags)
+
+    def __eq__(self, other):
+        if isinstance(other, FileBlob):
+            other = other.view
+        return self.view == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def tobytes(self):
+        """Copy file contents into :class:`bytes`."""
+        return bytes(self.view)
+
+    __bytes__ = tobytes
+
+    def decode(self, encoding='utf-8', errors='strict'):
+        """Decode file contents into string."""
+        return self.tobytes().decode(encoding, errors)
+
+
+def _iter_blob_files(files):
+    # Iterate over (key, filename) from mapping or directory.
+    if not isinstance(files, string_types):
+        for key, filename in iteritems(files):
+            yield key, strip_type_prefix(filename, 'file')
+        return
+
+    dirname = strip_type_prefix(files, 'blob')
+    if not op.isdir(dirname):
+        raise IOError('Directory is not found: %s' % dirname)
+    for name in os.listdir(dirname):
+        filename = op.join(dirname, name)
+        if op.isfile(filename):
+            yield name, filename
+
+
+@config_source('blob', selectable=True)
+def load_from_blob(config, files, silent=False, select=None):
+    """Update ``config`` with memory-mapped files.
+
+    Values are :class:`FileBlob` objects, files are not read until their
+    contents are accessed. Only uppercase keys are loaded.
+
+    Example::
+
+        # Load /run/secrets/CA_BUNDLE, /run/secrets/MODEL, ...
+        config.load_from('blob', '/run/secrets')
+
+        config.load_from('blob', {'CA_BUNDLE': 'file:///etc/ssl/ca.pem'})
+
+    Args:
+        config: Dict-like config.
+        files: Directory with files named by config keys or mapping of
+            config keys to filenames.
+        silent: Don't raise an error on missing files or directory.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one file is loaded.
+    """
+    values = {}
+    try:
+        for key, filename in _iter_blob_files(files):
+            if not key.isupper() or (select is not None and not select(key)):
+                continue
+            if not op.isfile(filename):
+                if silent:
+                    continue
+                raise IOError('File is not found: %s' % filename)
+            values[key] = FileBlob(filename)
+    except IOError:
+        if not silent:
+            raise
+    apply_batch(config, values)
+    return len(values) != 0
+
+
+# -- Indexed files.
+#
+# Layout (little-endian):
+#
+#   header:  magic, version, number of keys, number of slots
+#   slots:   (crc32 of key, entry offset) hash table with linear probing,
+#            offset 0 marks an empty slot
+#   entries: (key length, value length, key, JSON value) in insertion order
+
+_INDEXED_MAGIC = b'CFGIDX'
+_INDEXED_VERSION = 1
+_INDEXED_HEADER = struct.Struct('<6sHII')
+_INDEXED_SLOT = struct.Struct('<IQ')
+_INDEXED_ENTRY = struct.Struct('<HI')
+
+
+def _key_hash(raw):
+    return zlib.crc32(raw) & 0xffffffff
+
+
+def _encode_entry(key, value):
+    try:
+        data = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    except (TypeError, ValueError):
+        raise ConfigSourceError('Value is not JSON serializable: %s' % key)
+    raw = key.encode('utf-8')
+    return raw, _INDEXED_ENTRY.pack(len(raw), len(data)) + raw + data
+
+
+def write_indexed(config, filename):
+    """Write configuration into indexed file.
+
+    Indexed file contains a hash index over keys and JSON encoded values.
+    It's loaded by ``indexed`` source without parsing, values are decoded
+    on first access (see :class:`IndexedFile`)::
+
+        write_indexed(config, 'config.cfgidx')
+
+        config = DictConfig()
+        config.load_from('indexed', 'config.cfgidx')
+
+    Args:
+        config: Dict-like config with string keys.
+        filename: Output filename.
+
+    Raises:
+        ConfigSourceError: if a value can't be encoded to JSON.
+    """
+    entries = [_encode_entry(key, value) for key, value in iteritems(config)]
+    slots = 1
+    while slots < len(entries) * 2:
+        slots *= 2
+
+    table = [(0, 0)] * slots
+    offset = _INDEXED_HEADER.size + _INDEXED_SLOT.size * slots
+    for raw, entry in entries:
+        h = _key_hash(raw)
+        i = h & (slots - 1)
+        while table[i][1]:
+            i = (i + 1) & (slots - 1)
+        table[i] = (h, offset)
+        offset += len(entry)
+
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_INDEXED_HEADER.pack(_INDEXED_MAGIC, _INDEXED_VERSION,
+                                     len(entries), slots))
+        f.write(b''.join(_INDEXED_SLOT.pack(*x) for x in table))
+        f.writelines(entry for _, entry in entries)
+    _replace_file(tmp, filename)
+
+
+class IndexedFile(Mapping):
+    """Read-only mapping over indexed file.
+
+    The file is memory-mapped, so opening takes constant time regardless of
+    number of keys. Lookup hashes the key and reads its entry directly, a
+    value is decoded on first access and memoized. Values not accessed are
+    never decoded.
+
+    Args:
+        filename: Indexed file created by :func:`write_indexed`.
+
+    Raises:
+        IOError: if file is not found.
+        ConfigSourceError: if file is not an indexed file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._blob = FileBlob(filename)
+        self._view = view = self._blob.view
+        if len(view) < _INDEXED_HEADER.size:
+            raise ConfigSourceError('Invalid indexed file: %s' % filename)
+        magic, version, self._count, self._slots = (
+            _INDEXED_HEADER.unpack_from(view, 0))
+        if magic != _INDEXED_MAGIC or version != _INDEXED_VERSION:
+            raise ConfigSourceError('Invalid indexed file: %s' % filename)
+        self._entries = (_INDEXED_HEADER.size +
+                         _INDEXED_SLOT.size * self._slots)
+        self._values = {}
+
+    def __repr__(self):
+        return 'IndexedFile(%r)' % self.filename
+
+    def _find(self, key):
+        # Offset and length of the key's value or None.
+        if not isinstance(key, string_types):
+            return None
+        raw = key.encode('utf-8')
+        h = _key_hash(raw)
+        view = self._view
+        mask = self._slots - 1
+        i = h & mask
+        while True:
+            slot_hash, offset = _INDEXED_SLOT.unpack_from(
+                view, _INDEXED_HEADER.size + _INDEXED_SLOT.size * i)
+            if not offset:
+                return None
+            if slot_hash == h:
+                size, length = _INDEXED_ENTRY.unpack_from(view, offset)
+                start = offset + _INDEXED_ENTRY.size
+                if bytes(view[start:start + size]) == raw:
+                    return start + size, length
+            i = (i + 1) & mask
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except (KeyError, TypeError):
+            pass
+        pos = self._find(key)
+        if pos is None:
+            raise KeyError(key)
+        start, length = pos
+        data = bytes(self._view[start:start + length])
+        value = self._values[key] = json.loads(data.decode('utf-8'))
+        return value
+
+    def __contains__(self, key):
+        return key in self._values or self._find(key) is not None
+
+    def __iter__(self):
+        view = self._view
+        offset = self._entries
+        for _ in range(self._count):
+            size, length = _INDEXED_ENTRY.unpack_from(view, offset)
+            start = offset + _INDEXED_ENTRY.size
+            yield bytes(view[start:start + size]).decode('utf-8')
+            offset = start + size + length
+
+    def __len__(self):
+        return self._count
+
+
+@config_source('indexed', selectable=True)
+def load_from_indexed(config, filename, silent=False, select=None):
+    """Update ``config`` from indexed file.
+
+    Values are decoded on first access if ``config`` supports it (see
+    :func:`apply_lazy`). If only exact key names are selected then only
+    they are looked up.
+
+    Example::
+
+        config.load_from('indexed', '/etc/app/config.cfgidx')
+
+    Args:
         config: Dict-like config.
-        prefix: Environment variables prefix.
-        trim_prefix: Include or not prefix to result config name.
+        filename: Indexed file created by :func:`write_indexed`.
+        silent: Don't raise an error on missing file.
+        select: Keys selector.
 
     Returns:
-        ``True`` if at least one environment variable is loaded.
+        ``True`` if file contains selected keys.
     """
-    has = False
-    prefix = prefix.upper()
+    try:
+        values = IndexedFile(strip_type_prefix(filename, 'indexed'))
+    except (IOError, OSError):
+        if silent:
+            return False
+        raise
 
-    for key, value in iteritems(os.environ):
-        if key.startswith(prefix):
-            # Drop prefix: <prefix><name>
-            if trim_prefix:
-                key = key[len(prefix):]
-            config[key] = value
-            has = True
+    names = _selected_names(select)
+    if names is not None:
+        batch = dict((key, values[key]) for key in names if key in values)
+        apply_batch(config, batch)
+        return len(batch) != 0
 
-    return has
+    apply_lazy(config, values, select)
+    if select is None:
+        return len(values) != 0
+    # Keys are scanned until the first selected one.
+    return any(select(key) for key in values)
 
 
-def strip_type_prefix(path, prefix):
-    """Strip source type prefix from the path.
+# -- Archives.
 
-    This function strips prefix from strings like::
+def _parse_archive_json(text, name, section, select):
+    return 'dict', json.loads(text)
 
-        [<prefix>]://<path>
 
-    For example::
+def _parse_archive_pyfile(text, name, section, select):
+    module = ModuleType('config')
+    module.__file__ = name
+    exec(compile(text, name, 'exec'), module.__dict__)
+    return 'object', module
+
+
+# Parsers of archive members by source name, they return a source and
+# an object to load from it.
+_ARCHIVE_PARSERS = {
+    'json': _parse_archive_json,
+    'pyfile': _parse_archive_pyfile,
+    'dotenv': lambda text, name, section, select: (
+        'dict', parse_dotenv(text, select)),
+    'toml': lambda text, name, section, select: (
+        'dict', parse_toml(text, select)),
+    'ini': lambda text, name, section, select: (
+        'dict', parse_ini(text, section, select)),
+}
+
+
+class _Archive(object):
+    # Opened archive with index of members.
+
+    def __init__(self, filename, kind, stamp):
+        import tarfile
+        import zipfile
+        self.filename = filename
+        self.stamp = stamp
+        self.lock = threading.Lock()
+        try:
+            if kind == 'zip':
+                self.handle = zipfile.ZipFile(filename)
+                # ZipFile reads central directory once and keeps name index.
+                self.members = None
+            else:
+                self.handle = tarfile.open(filename)
+                self.members = dict((x.name, x)
+                                    for x in self.handle.getmembers()
+                                    if x.isfile())
+        except (zipfile.BadZipfile, tarfile.TarError) as e:
+            raise IOError('Invalid archive %s: %s' % (filename, e))
+
+    def read(self, name):
+        # Returns None if the archive is closed by the cache.
+        with self.lock:
+            if self.handle is None:
+                return None
+            if self.members is None:
+                try:
+                    return self.handle.read(name)
+                except KeyError:
+                    raise IOError('Archive member is not found: %s!%s'
+                                  % (self.filename, name))
+            info = self.members.get(name) or self.members.get('./' + name)
+            if info is None:
+                raise IOError('Archive member is not found: %s!%s'
+                              % (self.filename, name))
+            f = self.handle.extractfile(info)
+            try:
+                return f.read()
+            finally:
+                f.close()
+
+    def close(self):
+        # Wait for a read in progress.
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
 
-        pyfile://home/me/config.py -> /home/me/config.py
-        json://path/to/some.cfg -> /path/to/some.cfg
+
+class _ArchiveCache(object):
+    """Cache of opened archives.
+
+    Archives are opened once and their members index is reused for all
+    members. An archive is opened again if its file is changed.
 
     Args:
-        path: Path string.
-        prefix: Prefix to strip.
+        size: Max number of opened archives.
+    """
+
+    def __init__(self, size=16):
+        self.size = size
+        self._archives = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Close all archives."""
+        with self._lock:
+            archives = list(self._archives.values())
+            self._archives.clear()
+        for archive in archives:
+            archive.close()
+
+    def get(self, filename, kind):
+        """Get opened archive.
+
+        Args:
+            filename: Archive filename.
+            kind: ``zip`` or ``tar``.
+
+        Raises:
+            IOError: if archive is not found or invalid.
+        """
+        st = os.stat(filename)
+        stamp = (st.st_mtime, st.st_size)
+        key = (op.abspath(filename), kind)
+        # Dropped archives are closed outside of the cache lock, closing
+        # waits for reads in progress.
+        dropped = []
+        try:
+            with self._lock:
+                archive = self._archives.pop(key, None)
+                if archive is not None and archive.stamp != stamp:
+                    dropped.append(archive)
+                    archive = None
+                if archive is None:
+                    archive = _Archive(filename, kind, stamp)
+                self._archives[key] = archive
+                while len(self._archives) > self.size:
+                    dropped.append(self._archives.popitem(last=False)[1])
+        finally:
+            for x in dropped:
+                x.close()
+        return archive
+
+    def read(self, filename, kind, name):
+        """Read archive member.
+
+        Args:
+            filename: Archive filename.
+            kind: ``zip`` or ``tar``.
+            name: Member name.
+
+        Raises:
+            IOError: if archive or member is not found or archive is invalid.
+        """
+        while True:
+            # Archive may be closed by other thread after get(), then it's
+            # taken again.
+            data = self.get(filename, kind).read(name)
+            if data is not None:
+                return data
+
+
+_archive_cache = _ArchiveCache()
+
+
+def _load_from_archive(config, kind, url, member_source, section, silent,
+                       select):
+    path = strip_type_prefix(url, kind)
+    filename, sep, name = path.rpartition('!')
+    if not sep or not filename or not name.strip('/'):
+        raise ValueError('Invalid archive URL: %s' % url)
+    name = name.lstrip('/')
+
+    source = member_source
+    if source is None:
+        ext = op.splitext(name)[1] or op.basename(name)
+        source = DictConfigLoader.extensions.get(ext, 'pyfile')
+    parser = _ARCHIVE_PARSERS.get(source)
+    if parser is None:
+        raise ConfigSourceError('Unsupported archive member source: %s'
+                                % source)
+
+    try:
+        data = _archive_cache.read(filename, kind, name)
+    except (IOError, OSError):
+        if not silent:
+            raise
+        return False
+
+    text = data if source == 'pyfile' else data.decode('utf-8')
+    from_source, obj = parser(text, '%s!/%s' % (filename, name), section,
+                              select)
+    return load_to(config, from_source, 'dict', obj, select=select)
+
+
+@config_source('zip', selectable=True)
+def load_from_zip(config, url, member_source=None, section=None,
+                  silent=False, select=None):
+    """Update ``config`` from a file in a zip archive.
+
+    The file is read without extraction. Its format is detected by extension
+    like in :class:`DictConfigLoader` or given by ``member_source``: ``json``,
+    ``pyfile``, ``dotenv``, ``toml`` or ``ini``. Archives are opened once
+    and reused while they are not changed.
+
+    Example::
+
+        config.load_from('zip', 'zip://bundle.zip!/app/config.json')
+        config.load_from('zip', 'bundle.zip!/app/settings',
+                         member_source='pyfile')
+
+    Args:
+        config: Dict-like config.
+        url: ``<archive>!/<member>``, ``zip://`` prefix is optional.
+        member_source: Member source name.
+        section: Section to load for ``ini`` members.
+        silent: Don't raise an error on missing archive or member.
+        select: Keys selector.
 
     Returns:
-        Path string.
+        ``True`` if at least one variable from the file is loaded.
     """
-    path = path.lstrip()
-    if path.startswith(prefix + '://'):
-        path = path[len(prefix) + 2:]
-    return path
+    return _load_from_archive(config, 'zip', url, member_source, section,
+                              silent, select)
 
 
-@config_source('pyfile')
-def load_from_pyfile(config, source, silent=False):
-    """Update ``config`` with values from the python file or file-like object.
+@config_source('tar', selectable=True)
+def load_from_tar(config, url, member_source=None, section=None,
+                  silent=False, select=None):
+    """Update ``config`` from a file in a tar archive.
+
+    Same as :func:`load_from_zip` but for tar archives (optionally
+    compressed). Compressed archives are read from the start for each
+    member, so prefer uncompressed ones for random access.
+
+    Example::
+
+        config.load_from('tar', 'tar://bundle.tar!/app/config.toml')
 
     Args:
         config: Dict-like config.
-        source: Python filename or file-like object.
-        silent: Don't raise an error on missing files.
+        url: ``<archive>!/<member>``, ``tar://`` prefix is optional.
+        member_source: Member source name.
+        section: Section to load for ``ini`` members.
+        silent: Don't raise an error on missing archive or member.
+        select: Keys selector.
 
     Returns:
         ``True`` if at least one variable from the file is loaded.
     """
-    is_obj = hasattr(source, 'read')
+    return _load_from_archive(config, 'tar', url, member_source, section,
+                              silent, select)
 
-    d = ModuleType('config')
 
-    if is_obj:
-        d.__file__ = 'config'
-        exec(compile(source.read(), 'config', 'exec'), d.__dict__)
-    else:
-        d.__file__ = source
+class _HttpClient(object):
+    """HTTP client for configuration sources.
 
-        source = strip_type_prefix(source, 'pyfile')
-        if not op.exists(source):
-            if not silent:
-                raise IOError('File is not found: %s' % source)
+    It keeps idle connections to reuse them in subsequent requests and
+    remembers ``ETag`` and ``Last-Modified`` headers of the responses to make
+    conditional requests. If server responds with ``304 Not Modified`` then
+    previously parsed data is returned.
+    """
+
+    def __init__(self):
+        self._idle = defaultdict(list)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Close idle connections and drop cached responses."""
+        with self._lock:
+            for connections in self._idle.values():
+                for conn in connections:
+                    conn.close()
+            self._idle.clear()
+            self._cache.clear()
+
+    def _connect(self, scheme, netloc, timeout):
+        from future.moves.http import client as http_client
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        if scheme == 'https':
+            cls = http_client.HTTPSConnection
+        else:
+            cls = http_client.HTTPConnection
+        return cls(netloc, timeout=timeout), False
+
+    def _release(self, scheme, netloc, conn, response):
+        if response.will_close:
+            conn.close()
+        else:
+            with self._lock:
+                self._idle[(scheme, netloc)].append(conn)
+
+    def _request(self, url, headers, timeout):
+        from future.moves.http import client as http_client
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError('Invalid URL: %s' % url)
+
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        while True:
+            conn, reused = self._connect(parts.scheme, parts.netloc, timeout)
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http_client.HTTPException, socket.error):
+                conn.close()
+                # Retry with a new connection if the idle one is dropped.
+                if reused:
+                    continue
+                raise
+            self._release(parts.scheme, parts.netloc, conn, response)
+            return response, body
+
+    def get_json(self, url, headers=None, timeout=None):
+        """Get JSON data from the given URL.
+
+        Args:
+            url: HTTP or HTTPS URL.
+            headers: Extra request headers.
+            timeout: Connection timeout in seconds.
+
+        Returns:
+            Parsed data.
+
+        Raises:
+            IOError: on connection errors and unexpected HTTP statuses.
+        """
+        headers = dict(headers or {})
+        cached = self._cache.get(url)
+        if cached is not None:
+            etag, modified, data = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if modified:
+                headers['If-Modified-Since'] = modified
+
+        response, body = self._request(url, headers, timeout)
+
+        if response.status == 304 and cached is not None:
+            return cached[2]
+        if response.status != 200:
+            raise IOError('HTTP %d %s: %s'
+                          % (response.status, response.reason, url))
+
+        data = json.loads(body.decode('utf-8'))
+        etag = response.getheader('ETag')
+        modified = response.getheader('Last-Modified')
+        if etag or modified:
+            self._cache[url] = (etag, modified, data)
+        else:
+            self._cache.pop(url, None)
+        return data
+
+
+_http_client = _HttpClient()
+
+
+@config_source('https', selectable=True)
+@config_source('http', selectable=True)
+def load_from_http(config, url, headers=None, timeout=10, silent=False,
+                   select=None):
+    """Update ``config`` with values from the JSON document at the given URL.
+
+    Connections are reused between calls and conditional requests are sent
+    for the URLs loaded before, so unchanged documents are not downloaded
+    and parsed again.
+
+    Args:
+        config: Dict-like config.
+        url: HTTP or HTTPS URL.
+        headers: Extra request headers.
+        timeout: Connection timeout in seconds.
+        silent: Don't raise an error if the document can't be loaded.
+        select: Keys selector.
+
+    Returns:
+        ``True`` if at least one variable from the document is loaded.
+    """
+    from future.moves.http import client as http_client
+    try:
+        data = _http_client.get_json(url, headers, timeout)
+    except (IOError, socket.error, http_client.HTTPException):
+        if not silent:
+            raise
+        return False
+
+    return load_to(config, 'dict', 'dict', data, select=select)
+
+
+# -- Configuration daemon.
+#
+# Protocol: newline-delimited JSON over a Unix stream socket. Client sends
+# 'get' line and receives {"version": N, "data": {...}} snapshot, after that
+# the server pushes {"version": N} line to the connection on each change.
+
+def _serve_daemon_connection(server, sock):
+    # Read commands from the connection until it's closed.
+    server._connect(sock)
+    buf = b''
+    try:
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            buf += chunk
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                server._handle(sock, line.strip())
+    except socket.error:
+        pass
+    finally:
+        server._unsubscribe(sock)
+
+
+def _make_daemon_socket_server(server):
+    # socketserver is imported only when the daemon is started.
+    from future.moves import socketserver
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            _serve_daemon_connection(server, self.request)
+
+    class SocketServer(socketserver.ThreadingMixIn,
+                       socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    return SocketServer(server.path, Handler)
+
+
+class ConfigServer(object):
+    """Configuration daemon.
+
+    Loads configuration from the given sources once and serves it to local
+    processes over a Unix domain socket, so hundreds of workers on a host
+    don't parse the same files. Sources are checked for changes (files and
+    environment variables, see :func:`is_compiled_stale`) every
+    ``interval`` seconds and clients are notified when configuration is
+    changed::
+
+        server = ConfigServer([
+            {'from': 'json', 'filename': '/etc/app/config.json'},
+            {'from': 'env', 'prefix': 'APP_'}
+        ], '/run/app/config.sock')
+        server.serve_forever()
+
+        # In workers:
+        config.load_from('daemon', '/run/app/config.sock')
+
+    Values must be JSON serializable. If reload fails then the last loaded
+    configuration is served and the error is stored in :attr:`last_error`.
+
+    Args:
+        sources: List of dicts with loaders' parameters
+            (see :func:`load_multiple_to`).
+        path: Unix socket path.
+        interval: Interval in seconds between changes checks.
+        send_timeout: Timeout in seconds to send configuration to a client.
+    """
+
+    def __init__(self, sources, path, interval=1.0, send_timeout=5.0):
+        self.sources = sources
+        self.path = path
+        self.interval = interval
+        self.send_timeout = send_timeout
+
+        #: Configuration version, incremented on each change.
+        self.version = 0
+
+        #: Exception raised by the last reload or ``None``.
+        self.last_error = None
+
+        self._stamp = None
+        self._data = None
+        self._snapshot = None
+        self._connections = set()
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = None
+        self._threads = []
+
+    def reload(self, force=False):
+        """Load configuration if sources are changed.
+
+        Clients are notified if loaded configuration differs from the
+        previous one.
+
+        Args:
+            force: Load even if sources are not changed.
+
+        Returns:
+            ``True`` if configuration is changed.
+
+        Raises:
+            ConfigSourceError: if a value can't be encoded to JSON.
+        """
+        stamp = _sources_stamp(self.sources)
+        if not force and stamp == self._stamp:
             return False
 
-        with open(source, mode='rb') as config_file:
-            exec(compile(config_file.read(), source, 'exec'), d.__dict__)
+        config = {}
+        # load_multiple_to() modifies parameters, so pass copies.
+        load_multiple_to(config, [dict(x) for x in self.sources])
+        try:
+            data = json.dumps(config, sort_keys=True)
+        except (TypeError, ValueError) as e:
+            raise ConfigSourceError('Config is not JSON serializable: %s' % e)
 
-    return load_to(config, 'object', 'dict', d)
+        with self._lock:
+            self._stamp = stamp
+            if data == self._data:
+                return False
+            self.version += 1
+            self._data = data
+            self._snapshot = ('{"version": %d, "data": %s}\n'
+                              % (self.version, data)).encode('utf-8')
+            self._notify(('{"version": %d}\n' % self.version)
+                         .encode('utf-8'))
+        return True
 
+    def _notify(self, message):
+        for sock in list(self._clients):
+            self._push(sock, message)
 
-@config_source('json')
-def load_from_json(config, filename, silent=False):
-    """Update ``config`` with values from the given JSON file.
+    def _push(self, sock, message):
+        # Send without blocking under the lock. A client which doesn't read
+        # notifications fills the socket buffer, it's disconnected and
+        # reconnects on next load.
+        try:
+            sent = sock.send(message, socket.MSG_DONTWAIT)
+        except socket.error:
+            sent = 0
+        if sent != len(message):
+            self._clients.discard(sock)
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:  # pragma: no cover
+                pass
+
+    def _handle(self, sock, line):
+        if line != b'get':
+            sock.sendall(b'{"error": "unknown command"}\n')
+            return
+
+        # Snapshot is sent and the client is subscribed at once, so it
+        # doesn't miss changes. Timeout limits the time the lock is held by
+        # a client which doesn't read, on timeout it's disconnected. It's
+        # safe to change the timeout here since the socket is read in this
+        # thread.
+        with self._lock:
+            sock.settimeout(self.send_timeout)
+            try:
+                sock.sendall(self._snapshot)
+            finally:
+                sock.settimeout(None)
+            self._clients.add(sock)
+
+    def _connect(self, sock):
+        # Connections are tracked to be closed on close(), including ones
+        # which are not subscribed yet.
+        with self._lock:
+            if self._stopped.is_set():
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except socket.error:  # pragma: no cover
+                    pass
+            else:
+                self._connections.add(sock)
+
+    def _unsubscribe(self, sock):
+        with self._lock:
+            self._clients.discard(sock)
+            self._connections.discard(sock)
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.reload()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+    def start(self):
+        """Load configuration and start serving in background threads."""
+        self.reload(force=True)
+        if op.exists(self.path):
+            os.remove(self.path)
+        self._stopped.clear()
+        self._server = _make_daemon_socket_server(self)
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever,
+                             kwargs=dict(poll_interval=0.1)),
+            threading.Thread(target=self._watch),
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def serve_forever(self):
+        """Load configuration and serve until :meth:`close` is called."""
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop serving and remove the socket."""
+        self._stopped.set()
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for sock in self._connections:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except socket.error:  # pragma: no cover
+                    pass
+            self._connections.clear()
+            self._clients.clear()
+        for thread in self._threads:
+            thread.join()
+        self._server = None
+        if op.exists(self.path):
+            os.remove(self.path)
+
+
+class _DaemonClient(object):
+    """Client for :class:`ConfigServer`.
+
+    It keeps connection to the daemon and caches received snapshot until
+    the daemon notifies about a change.
+    """
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self.version = None
+        self._sock = None
+        self._buf = b''
+        self._data = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close connection and drop cached snapshot."""
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._buf = b''
+        self._data = None
+
+    def _read_line(self):
+        while b'\n' not in self._buf:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise IOError('Connection is closed: %s' % self.path)
+            self._buf += chunk
+        line, self._buf = self._buf.split(b'\n', 1)
+        return json.loads(line.decode('utf-8'))
+
+    def _check_pushed(self):
+        # Drop cached snapshot if the daemon notified about a change.
+        import select
+        while b'\n' in self._buf or select.select([self._sock], [], [], 0)[0]:
+            message = self._read_line()
+            if message.get('version') != self.version:
+                self._data = None
+
+    def _fetch(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except socket.error:
+                sock.close()
+                raise
+            self._sock = sock
+        else:
+            self._check_pushed()
+            if self._data is not None:
+                return self._data
+
+        self._sock.sendall(b'get\n')
+        while True:
+            message = self._read_line()
+            if 'error' in message:
+                raise IOError('Daemon error: %s' % message['error'])
+            if 'data' in message:
+                self.version = message['version']
+                self._data = message['data']
+                return self._data
+
+    def get(self):
+        """Get configuration snapshot.
+
+        Returns:
+            Configuration :class:`dict`.
+
+        Raises:
+            IOError: if the daemon is not available.
+        """
+        with self._lock:
+            # Cached connection may be closed by the daemon (restart or slow
+            # reader), so it's retried once with a new connection.
+            for retry in (self._sock is not None, False):
+                try:
+                    return self._fetch()
+                except (IOError, socket.error, ValueError):
+                    self.close()
+                    if not retry:
+                        raise
+
+
+_daemon_clients = {}
+_daemon_clients_lock = threading.Lock()
+
+
+@config_source('daemon', selectable=True)
+def load_from_daemon(config, path, timeout=10, silent=False, select=None):
+    """Update ``config`` with values from configuration daemon.
+
+    Connection to the daemon is kept open and the received configuration is
+    cached until the daemon notifies about a change, so repeated loads don't
+    transfer and decode it again.
 
     Args:
         config: Dict-like config.
-        filename: JSON filename.
-        silent: Don't raise an error on missing files.
+        path: Daemon's Unix socket path (see :class:`ConfigServer`).
+        timeout: Socket timeout in seconds.
+        silent: Don't raise an error if the daemon is not available.
+        select: Keys selector.
 
     Returns:
-        ``True`` if at least one variable from the file is loaded.
+        ``True`` if at least one variable is loaded.
     """
-    filename = strip_type_prefix(filename, 'json')
-    if not op.exists(filename):
+    path = strip_type_prefix(path, 'daemon')
+    with _daemon_clients_lock:
+        client = _daemon_clients.get(path)
+        if client is None:
+            client = _daemon_clients[path] = _DaemonClient(path, timeout)
+    try:
+        data = client.get()
+    except (IOError, socket.error):
         if not silent:
-            raise IOError('File is not found: %s' % filename)
+            raise
         return False
 
-    with open(filename) as f:
-        d = json.load(f)
+    return load_to(config, 'dict', 'dict', data, select=select)
+
+
+# -- Command line interface.
+
+def _cmd_compile(args):
+    with open(args.spec) as f:
+        sources = json.load(f)
 
-    return load_to(config, 'dict', 'dict', d)
+    if args.check:
+        stale = is_compiled_stale(args.output, sources)
+        if stale:
+            print('%s is outdated' % args.output)
+        return 1 if stale else 0
+
+    if compile_config(sources, args.output, force=args.force):
+        print('%s is compiled' % args.output)
+    else:
+        print('%s is up to date' % args.output)
+    return 0
+
+
+def _cmd_serve(args):
+    with open(args.spec) as f:
+        sources = json.load(f)
+    server = ConfigServer(sources, args.socket, interval=args.interval)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv: Command line arguments (``sys.argv`` is used by default).
+
+    Returns:
+        Exit code.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog='config-source')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    cmd = commands.add_parser(
+        'compile', help='Compile configuration into a python module.')
+    cmd.add_argument('spec', help='JSON file with list of sources.')
+    cmd.add_argument('output', help='Output module filename.')
+    cmd.add_argument('--force', action='store_true',
+                     help='Compile even if the module is up to date.')
+    cmd.add_argument('--check', action='store_true',
+                     help="Don't compile, exit with code 1 if outdated.")
+    cmd.set_defaults(func=_cmd_compile)
+
+    cmd = commands.add_parser(
+        'serve', help='Serve configuration over a Unix socket.')
+    cmd.add_argument('spec', help='JSON file with list of sources.')
+    cmd.add_argument('socket', help='Unix socket path.')
+    cmd.add_argument('--interval', type=float, default=1.0,
+                     help='Interval in seconds between changes checks.')
+    cmd.set_defaults(func=_cmd_serve)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
 
 
 # -- Configuration sources from plugins.
 
 for entry_point in pkg_resources.iter_entry_points('config_source.sources'):  # noqa pragma: nocover
     entry_point.load()
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
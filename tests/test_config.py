@@ -20,17 +20,50 @@ except ImportError:
 import pytest
 from io import StringIO
 import config_source as configsource
+from future.utils import PY2
 from config_source import (
     _config_sources,
+    _http_client,
     config_source,
     load_to,
     load_multiple_to,
     merge_kwargs,
     strip_type_prefix,
+    make_source_key,
+    parse_dotenv,
+    parse_toml,
+    parse_ini,
+    deep_merge,
+    apply_batch,
+    apply_lazy,
+    write_indexed,
+    compile_config,
+    is_compiled_stale,
+    main,
+    make_selector,
+    KeySelector,
     ConfigSourceError,
+    ValidationError,
+    Schema,
+    ConfigPool,
+    FileBlob,
+    ConfigServer,
+    LoadProfiler,
+    profile_loads,
+    load_from_zip,
+    IndexedFile,
     DictConfig,
     DictConfigLoader
 )
+import os
+import sys
+import threading
+import datetime
+import time
+import json
+import pstats
+import os.path as op
+from future.moves.http import server as http_server
 
 # TODO: test 'config_source.sources' entrypoints loading.
 
@@ -109,6 +142,14 @@ class TestConfigSource(object):
         assert 'object' in default
         assert 'pyfile' in default
         assert 'json' in default
+        assert 'http' in default
+        assert 'dotenv' in default
+        assert 'toml' in default
+        assert 'ini' in default
+        assert 'indexed' in default
+        assert 'zip' in default
+        assert 'tar' in default
+        assert 'https' in default
 
 
 # Test: merge_kwargs() function.
@@ -577,6 +618,12 @@ class TestDictConfigLoader(object):
     @pytest.mark.parametrize('name,config', [
         ('pyfile', '/path/to/file.cfg'),
         ('pyfile', '/path/to/file.py'),
+        ('pyfile', '/path/to/file'),
+        ('dotenv', '/path/to/.env'),
+        ('dotenv', '/path/to/prod.env'),
+        ('toml', '/path/to/file.toml'),
+        ('ini', '/path/to/file.ini'),
+        ('indexed', '/path/to/file.cfgidx'),
         ('json', '/path/to/file.json'),
         ('s3', 's3://path/to/file.json'),
         ('json', 'json://path/to/file.json'),
@@ -610,3 +657,2501 @@ class TestDictConfigLoader(object):
         assert loader.config.method_calls == [
             call.load_from('pyfile', '/path/to/file.py', 1, 2, kw=3)
         ]
+
+
+# Test: make_source_key() function.
+class TestMakeSourceKey(object):
+    # Test: key doesn't depend on order of loader parameters.
+    def test_order(self):
+        a = make_source_key([{'from': 'env', 'prefix': 'A', 'trim': 1}])
+        b = make_source_key([{'trim': 1, 'prefix': 'A', 'from': 'env'}])
+        assert a == b
+
+    # Test: different sources give different keys.
+    def test_differ(self):
+        a = make_source_key([{'from': 'env', 'prefix': 'A'}])
+        b = make_source_key([{'from': 'env', 'prefix': 'B'}])
+        assert a != b
+
+    # Test: objects are identified by import path.
+    def test_object(self):
+        key = make_source_key([{'from': 'object', 'obj': DictConfig}])
+        assert 'config_source:DictConfig' in key
+        key = make_source_key([{'from': 'object', 'obj': configsource}])
+        assert '"config_source"' in key
+
+    # Test: objects without import path are rejected.
+    def test_no_import_path(self):
+        def make():
+            class Config(object):
+                X = 1
+            return Config
+
+        for obj in [make(), make()(), object(), lambda: None]:
+            with pytest.raises(ConfigSourceError):
+                make_source_key([{'from': 'object', 'obj': obj}])
+
+
+# Test: ConfigPool class.
+@patch.dict('config_source._config_sources', clear=True)
+class TestConfigPool(object):
+    def register(self):
+        calls = []
+
+        @config_source('count')
+        def loader(config, value=None):
+            calls.append(value)
+            config['VALUE'] = value
+            return True
+
+        return calls
+
+    # Test: configuration is built once.
+    def test_get(self):
+        calls = self.register()
+        pool = ConfigPool()
+        sources = [{'from': 'count', 'value': 1}]
+
+        config = pool.get(sources)
+        assert isinstance(config, DictConfig)
+        assert config == dict(VALUE=1)
+        assert pool.get([{'value': 1, 'from': 'count'}]) is config
+        assert calls == [1]
+        # Sources must stay unchanged.
+        assert sources == [{'from': 'count', 'value': 1}]
+        assert sources in pool
+
+        stats = pool.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['size'] == 1
+
+    # Test: least recently used configuration is evicted.
+    def test_lru(self):
+        calls = self.register()
+        pool = ConfigPool(maxsize=2)
+
+        pool.get([{'from': 'count', 'value': 1}])
+        pool.get([{'from': 'count', 'value': 2}])
+        pool.get([{'from': 'count', 'value': 1}])
+        pool.get([{'from': 'count', 'value': 3}])
+
+        assert len(pool) == 2
+        assert [{'from': 'count', 'value': 2}] not in pool
+        assert [{'from': 'count', 'value': 1}] in pool
+        assert pool.stats()['evictions'] == 1
+
+        pool.get([{'from': 'count', 'value': 2}])
+        assert calls == [1, 2, 3, 2]
+
+    # Test: memory limit.
+    def test_maxbytes(self):
+        self.register()
+        pool = ConfigPool(maxbytes=1)
+
+        pool.get([{'from': 'count', 'value': 1}])
+        pool.get([{'from': 'count', 'value': 2}])
+
+        # The most recent configuration is kept even if it exceeds the limit.
+        assert len(pool) == 1
+        assert pool.stats()['nbytes'] > 0
+        assert pool.stats()['evictions'] == 1
+
+    # Test: expired configurations are rebuilt.
+    def test_ttl(self):
+        calls = self.register()
+        now = [100]
+        pool = ConfigPool(ttl=10, timer=lambda: now[0])
+
+        config = pool.get([{'from': 'count', 'value': 1}])
+        now[0] = 109
+        assert pool.get([{'from': 'count', 'value': 1}]) is config
+        now[0] = 110
+        assert pool.get([{'from': 'count', 'value': 1}]) is not config
+        assert calls == [1, 1]
+        assert pool.stats()['expirations'] == 1
+
+    # Test: invalidate and clear.
+    def test_invalidate(self):
+        self.register()
+        pool = ConfigPool()
+        pool.get([{'from': 'count', 'value': 1}])
+        pool.get([{'from': 'count', 'value': 2}])
+
+        assert pool.invalidate([{'from': 'count', 'value': 1}]) is True
+        assert pool.invalidate([{'from': 'count', 'value': 1}]) is False
+        assert len(pool) == 1
+
+        pool.clear()
+        assert len(pool) == 0
+
+    # Test: concurrent requests build configuration once.
+    def test_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        @config_source('slow')
+        def loader(config):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            config['X'] = 1
+            return True
+
+        pool = ConfigPool()
+        results = []
+
+        def worker():
+            results.append(pool.get([{'from': 'slow'}]))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+
+        # Wait until all threads are blocked on the build.
+        while pool.stats()['waits'] != 3:
+            time.sleep(0.001)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert calls == [1]
+        assert len(results) == 4
+        assert all(x is results[0] for x in results)
+
+    # Test: build errors are not cached.
+    def test_error(self):
+        @config_source('fail')
+        def loader(config):
+            raise ValueError('boom')
+
+        pool = ConfigPool()
+        with pytest.raises(ValueError):
+            pool.get([{'from': 'fail'}])
+        assert len(pool) == 0
+        with pytest.raises(ValueError):
+            pool.get([{'from': 'fail'}])
+
+    # Test: interrupted build doesn't block waiters.
+    def test_interrupted(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        @config_source('interrupted')
+        def loader(config):
+            started.set()
+            release.wait(5)
+            raise KeyboardInterrupt
+
+        pool = ConfigPool()
+        errors = []
+
+        def build():
+            try:
+                pool.get([{'from': 'interrupted'}])
+            except KeyboardInterrupt:
+                errors.append('interrupt')
+
+        def wait():
+            try:
+                pool.get([{'from': 'interrupted'}])
+            except ConfigSourceError:
+                errors.append('error')
+
+        builder = threading.Thread(target=build)
+        builder.start()
+        started.wait(5)
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        while pool.stats()['waits'] != 1:
+            time.sleep(0.001)
+        release.set()
+        builder.join(5)
+        waiter.join(5)
+
+        assert sorted(errors) == ['error', 'interrupt']
+        assert pool._pending == {}
+
+    # Test: explicit keys for sources without import path.
+    def test_key(self):
+        def make(value):
+            class Config(object):
+                X = value
+            return Config
+
+        pool = ConfigPool()
+        with pytest.raises(ConfigSourceError):
+            pool.get([{'from': 'object', 'obj': make(1)}])
+
+        config_source('object', selectable=True)(
+            configsource.load_from_object)
+        first = pool.get([{'from': 'object', 'obj': make(1)}], key='t1')
+        second = pool.get([{'from': 'object', 'obj': make(2)}], key='t2')
+        assert first == dict(X=1)
+        assert second == dict(X=2)
+        assert pool.get([], key='t1') is first
+        assert pool.invalidate([], key='t1') is True
+        assert len(pool) == 1
+
+
+class _ConfigHandler(http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('If-None-Match'))
+        server.clients.add(self.client_address)
+
+        if self.path != '/config.json':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        etag = '"%d"' % server.version
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps(server.data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_config():
+    server = http_server.HTTPServer(('127.0.0.1', 0), _ConfigHandler)
+    server.data = {'ONE': 1, 'TWO': 'hello', 'three': 3}
+    server.version = 1
+    server.requests = []
+    server.clients = set()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,))
+    thread.daemon = True
+    thread.start()
+    _http_client.clear()
+    yield server
+    _http_client.clear()
+    server.shutdown()
+    server.server_close()
+
+
+# Test: load from HTTP source.
+class TestHttpSource(object):
+    def url(self, server, path='/config.json'):
+        return 'http://127.0.0.1:%d%s' % (server.server_address[1], path)
+
+    # Test: modules of optional features are imported on use.
+    def test_import(self):
+        import subprocess
+        modules = ['http.client', 'tarfile', 'cProfile', 'argparse']
+        code = ('import sys, config_source;'
+                'print(" ".join(m for m in %r if m in sys.modules))'
+                % modules)
+        out = subprocess.check_output([sys.executable, '-c', code])
+        assert out.decode().strip() == ''
+
+    # Test: load JSON document.
+    def test_load(self, http_config):
+        config = DictConfig()
+        res = config.load_from('http', self.url(http_config))
+
+        assert res is True
+        # three won't load because it's lowercase.
+        assert config == dict(ONE=1, TWO='hello')
+
+    # Test: conditional requests and connection reuse.
+    def test_not_modified(self, http_config):
+        url = self.url(http_config)
+        config = DictConfig()
+        config.load_from('http', url)
+        config = DictConfig()
+        config.load_from('http', url)
+
+        assert config == dict(ONE=1, TWO='hello')
+        assert http_config.requests == [None, '"1"']
+        assert len(http_config.clients) == 1
+
+        # Document is changed.
+        http_config.version = 2
+        http_config.data = {'ONE': 2}
+        config = DictConfig()
+        config.load_from('http', url)
+
+        assert config == dict(ONE=2)
+        assert http_config.requests == [None, '"1"', '"1"']
+
+    # Test: source is detected by URL scheme.
+    def test_detect(self, http_config):
+        config = DictConfig()
+        DictConfigLoader(config).load(self.url(http_config))
+        assert config == dict(ONE=1, TWO='hello')
+
+    # Test: missing document.
+    def test_missing(self, http_config):
+        url = self.url(http_config, '/missing.json')
+        config = DictConfig()
+
+        assert config.load_from('http', url, silent=True) is False
+        with pytest.raises(IOError) as e:
+            config.load_from('http', url)
+        assert str(e.value) == 'HTTP 404 Not Found: %s' % url
+
+    # Test: reconnect if idle connection is closed by the server.
+    def test_reconnect(self, http_config):
+        url = self.url(http_config)
+        load_to({}, 'http', 'dict', url)
+        for connections in _http_client._idle.values():
+            for conn in connections:
+                conn.sock.close()
+
+        config = {}
+        assert load_to(config, 'http', 'dict', url) is True
+        assert config == dict(ONE=1, TWO='hello')
+
+
+# Test: KeySelector class.
+class TestKeySelector(object):
+    @pytest.mark.parametrize('key,result', [
+        ('SECRET_KEY', True),
+        ('SECRET_KEY2', False),
+        ('DB_HOST', True),
+        ('DB_', True),
+        ('DBX', False),
+        ('CACHE_URL', True),
+        ('CACHE_URL_X', False),
+        ('POOL_1_SIZE', True),
+        ('POOL_12_SIZE', False),
+    ])
+    def test_match(self, key, result):
+        select = KeySelector(['SECRET_KEY', 'DB_*', '*_URL', 'POOL_?_SIZE'])
+        assert select(key) is result
+
+    # Test: explicit names.
+    def test_names(self):
+        assert KeySelector(['A', 'B']).names == {'A', 'B'}
+        assert KeySelector(['A', 'B*']).names is None
+        assert KeySelector(['A', '*B']).names is None
+
+    # Test: construct selector.
+    def test_make_selector(self):
+        func = lambda key: True
+        assert make_selector(None) is None
+        assert make_selector(func) is func
+        assert make_selector('A*').prefixes == ('A',)
+        assert make_selector(['A', 'B']).names == {'A', 'B'}
+
+
+# Test: load with keys selection.
+class TestSelect(object):
+    # Test: select from dict.
+    @pytest.mark.parametrize('select', [
+        ['ONE', 'THREE'],
+        ['ONE', 'T*E*'],
+        lambda key: key in ('ONE', 'THREE'),
+    ])
+    def test_dict(self, select):
+        config = {}
+        src = dict(ONE=1, TWO=2, THREE=3, four=4)
+        res = load_to(config, 'dict', 'dict', src, select=select)
+
+        assert res is True
+        assert config == dict(ONE=1, THREE=3)
+
+    # Test: nothing is selected.
+    def test_dict_empty(self):
+        config = {}
+        res = load_to(config, 'dict', 'dict', dict(ONE=1), select='X')
+
+        assert res is False
+        assert config == {}
+
+    # Test: select from object, unselected attributes are not accessed.
+    def test_object(self):
+        class Cfg(object):
+            ONE = 1
+
+            @property
+            def TWO(self):
+                raise AssertionError('must not be accessed')
+
+        config = {}
+        load_to(config, 'object', 'dict', Cfg(), select=['ONE', 'THREE'])
+        assert config == dict(ONE=1)
+
+        config = {}
+        load_to(config, 'object', 'dict', Cfg(), select='O*')
+        assert config == dict(ONE=1)
+
+    # Test: select from env.
+    @patch.dict('os.environ', MYTEST_ONE='12', MYTEST_TWO='hello', MYTESTX='1')
+    def test_env(self):
+        config = {}
+        load_to(config, 'env', 'dict', prefix='MYTEST_', select='ONE')
+        assert config == dict(ONE='12')
+
+        config = {}
+        load_to(config, 'env', 'dict', prefix='MYTEST_', select='T*')
+        assert config == dict(TWO='hello')
+
+        config = {}
+        load_to(config, 'env', 'dict', prefix='MYTEST_', trim_prefix=False,
+                select=['MYTEST_ONE', 'MYTESTX'])
+        assert config == dict(MYTEST_ONE='12')
+
+    # Test: select from pyfile and json.
+    def test_files(self, tmpdir):
+        pyfile = tmpdir.join('myconfig.py')
+        pyfile.write('ONE = 1\nTWO = "hello"\nthree = 3')
+        jsonfile = tmpdir.join('myconfig.json')
+        jsonfile.write('{"ONE": 1, "TWO": "hello", "three": 3}')
+
+        config = DictConfig()
+        config.load_from('pyfile', str(pyfile), select='TWO')
+        assert config == dict(TWO='hello')
+
+        config = DictConfig()
+        config.load_from('json', str(jsonfile), select=['ONE'])
+        assert config == dict(ONE=1)
+
+    # Test: select for source without selection support.
+    @patch.dict('config_source._config_sources', clear=True)
+    def test_not_selectable(self):
+        @config_source('my')
+        def loader(config):
+            config['ONE'] = 1
+            config['TWO'] = 2
+            return True
+
+        config = DictConfig()
+        config.load_from('my', select='ONE')
+        assert config == dict(ONE=1)
+
+    # Test: select in load_multiple_to().
+    @patch.dict('os.environ', MYTEST_ONE='12', MYTEST_TWO='hello')
+    def test_multiple(self):
+        config = {}
+        load_multiple_to(config, [
+            {'from': 'dict', 'obj': dict(ONE=1, THREE=3)},
+            {'from': 'env', 'prefix': 'MYTEST_', 'select': 'TWO'},
+        ], select=['ONE', 'TWO'])
+
+        assert config == dict(ONE=1, TWO='hello')
+
+
+class _NotLiteralConfig(object):
+    OBJ = object()
+
+
+# Test: compile_config() function.
+class TestCompileConfig(object):
+    def sources(self, tmpdir):
+        jsonfile = tmpdir.join('config.json')
+        if not jsonfile.exists():
+            jsonfile.write('{"ONE": 1, "TWO": [1, "2"], "three": 3}')
+        return [
+            {'from': 'json', 'filename': str(jsonfile)},
+            {'from': 'env', 'prefix': 'MYTEST_'},
+        ]
+
+    # Test: compile and load the module.
+    @patch.dict('os.environ', MYTEST_ONE='12')
+    def test_compile(self, tmpdir):
+        sources = self.sources(tmpdir)
+        output = str(tmpdir.join('compiled_config.py'))
+
+        assert compile_config(sources, output) is True
+        # Sources must stay unchanged.
+        assert sources[1] == {'from': 'env', 'prefix': 'MYTEST_'}
+        if not PY2:
+            assert tmpdir.join('__pycache__').listdir()
+
+        config = DictConfig()
+        config.load_from('pyfile', output)
+        assert config == dict(ONE='12', TWO=[1, '2'])
+
+        sys.path.insert(0, str(tmpdir))
+        try:
+            import compiled_config
+        finally:
+            sys.path.pop(0)
+            sys.modules.pop('compiled_config', None)
+        config = DictConfig()
+        config.load_from('object', compiled_config)
+        assert config == dict(ONE='12', TWO=[1, '2'])
+
+    # Test: staleness check.
+    @patch.dict('os.environ', MYTEST_ONE='12')
+    def test_stale(self, tmpdir):
+        sources = self.sources(tmpdir)
+        output = str(tmpdir.join('compiled_config.py'))
+
+        assert is_compiled_stale(output, sources) is True
+        compile_config(sources, output)
+        assert is_compiled_stale(output, sources) is False
+        assert compile_config(sources, output) is False
+        assert compile_config(sources, output, force=True) is True
+
+        # Source list is changed.
+        assert is_compiled_stale(output, sources[:1]) is True
+
+        # Environment is changed.
+        os.environ['MYTEST_TWO'] = '2'
+        assert is_compiled_stale(output, sources) is True
+        compile_config(sources, output)
+
+        # File is changed.
+        tmpdir.join('config.json').write('{"ONE": 2}')
+        os.utime(sources[0]['filename'], (1, 1))
+        assert is_compiled_stale(output, sources) is True
+
+    # Test: values which can't be compiled.
+    def test_not_literal(self, tmpdir):
+        output = str(tmpdir.join('compiled_config.py'))
+        sources = [{'from': 'object', 'obj': _NotLiteralConfig}]
+
+        with pytest.raises(ConfigSourceError) as e:
+            compile_config(sources, output)
+        assert str(e.value) == 'Value is not a literal: OBJ'
+
+        sources = [{'from': 'dict', 'obj': {'OBJ': object()}}]
+        with pytest.raises(ConfigSourceError) as e:
+            compile_config(sources, output)
+        assert 'no import path' in str(e.value)
+        assert not os.path.exists(output)
+
+    # Test: keys which are not identifiers keep the previous module.
+    @patch.dict('os.environ', MYTEST_ONE='12')
+    def test_not_identifier(self, tmpdir):
+        sources = self.sources(tmpdir)
+        output = str(tmpdir.join('compiled_config.py'))
+        compile_config(sources, output)
+        with open(output) as f:
+            text = f.read()
+
+        for key in ['1X', 'None', 'A-B']:
+            os.environ['MYTEST_' + key] = '1'
+            try:
+                with pytest.raises(ConfigSourceError) as e:
+                    compile_config(sources, output)
+                assert str(e.value) == 'Key is not a python identifier: ' + key
+            finally:
+                del os.environ['MYTEST_' + key]
+
+        with open(output) as f:
+            assert f.read() == text
+        assert sorted(tmpdir.listdir(lambda x: x.ext == '.tmp')) == []
+
+    # Test: module is replaced only if it's byte-compiled.
+    def test_compile_error(self, tmpdir):
+        output = str(tmpdir.join('compiled_config.py'))
+        tmpdir.join('compiled_config.py').write('ONE = 1\n')
+        with patch('py_compile.compile', side_effect=ValueError):
+            with pytest.raises(ValueError):
+                compile_config([{'from': 'dict', 'obj': {'ONE': 2}}], output)
+        assert tmpdir.join('compiled_config.py').read() == 'ONE = 1\n'
+        assert len(tmpdir.listdir()) == 1
+
+        compile_config([{'from': 'dict', 'obj': {'ONE': 2}}], output)
+        if not PY2:
+            from importlib.util import cache_from_source
+            assert os.path.exists(cache_from_source(output))
+
+    # Test: command line interface.
+    @patch.dict('os.environ', MYTEST_ONE='12')
+    def test_main(self, tmpdir, capsys):
+        spec = tmpdir.join('spec.json')
+        spec.write(json.dumps(self.sources(tmpdir)))
+        output = str(tmpdir.join('compiled_config.py'))
+        args = ['compile', str(spec), output]
+
+        assert main(args + ['--check']) == 1
+        assert main(args) == 0
+        assert main(args + ['--check']) == 0
+        assert main(args) == 0
+
+        out = capsys.readouterr().out.splitlines()
+        assert out == [
+            '%s is outdated' % output,
+            '%s is compiled' % output,
+            '%s is up to date' % output,
+        ]
+
+
+# Test: FileBlob class and blob source.
+class TestBlob(object):
+    # Test: view is accepted as bytes-like object.
+    def test_view(self, tmpdir):
+        import hashlib
+        f = tmpdir.join('data.bin')
+        f.write_binary(b'hello world')
+        blob = FileBlob(str(f))
+        assert (hashlib.sha256(blob.view).digest() ==
+                hashlib.sha256(b'hello world').digest())
+        assert b''.join([blob.view, b'!']) == b'hello world!'
+        if sys.version_info >= (3, 12):  # pragma: no cover
+            assert hashlib.sha256(blob).digest() == hashlib.sha256(
+                b'hello world').digest()
+
+    # Test: file is mapped on first access.
+    def test_blob(self, tmpdir):
+        f = tmpdir.join('data.bin')
+        f.write_binary(b'hello world')
+        blob = FileBlob(str(f))
+
+        assert blob._view is None
+        assert len(blob) == 11
+        assert isinstance(blob[:5], memoryview)
+        assert blob[:5] == b'hello'
+        assert blob == b'hello world'
+        assert blob != b'hello'
+        assert blob == FileBlob(str(f))
+        assert bytes(blob) == b'hello world'
+        assert blob.decode() == u'hello world'
+        assert blob.view.readonly
+
+    # Test: empty file.
+    def test_empty(self, tmpdir):
+        f = tmpdir.join('data.bin')
+        f.write_binary(b'')
+        assert FileBlob(str(f)) == b''
+
+    # Test: load files from directory.
+    def test_load_dir(self, tmpdir):
+        tmpdir.join('CA_BUNDLE').write_binary(b'ca')
+        tmpdir.join('MODEL').write_binary(b'model')
+        tmpdir.join('readme').write_binary(b'readme')
+        tmpdir.mkdir('SUBDIR')
+
+        config = DictConfig()
+        res = config.load_from('blob', 'blob://' + str(tmpdir))
+
+        assert res is True
+        assert sorted(config) == ['CA_BUNDLE', 'MODEL']
+        assert isinstance(config['MODEL'], FileBlob)
+        assert config['MODEL'] == b'model'
+
+        config = DictConfig()
+        config.load_from('blob', str(tmpdir), select='CA_*')
+        assert list(config) == ['CA_BUNDLE']
+
+    # Test: load files from mapping.
+    def test_load_mapping(self, tmpdir):
+        f = tmpdir.join('ca.pem')
+        f.write_binary(b'ca')
+
+        config = DictConfig()
+        res = config.load_from('blob', {'CA': 'file:/' + str(f),
+                                        'ca': str(f)})
+
+        assert res is True
+        assert config == dict(CA=b'ca')
+
+    # Test: missing files.
+    def test_missing(self, tmpdir):
+        missing = str(tmpdir.join('missing'))
+        config = DictConfig()
+
+        assert config.load_from('blob', missing, silent=True) is False
+        assert config.load_from('blob', {'X': missing}, silent=True) is False
+        with pytest.raises(IOError):
+            config.load_from('blob', missing)
+        with pytest.raises(IOError):
+            config.load_from('blob', {'X': missing})
+
+    # Test: missing files are skipped in any order.
+    def test_missing_order(self, tmpdir):
+        from collections import OrderedDict
+        missing = str(tmpdir.join('missing'))
+        f = tmpdir.join('b')
+        f.write('b')
+        items = [('MISSING', missing), ('B', str(f))]
+
+        for files in (OrderedDict(items), OrderedDict(items[::-1])):
+            config = DictConfig()
+            assert config.load_from('blob', files, silent=True) is True
+            assert config == dict(B=b'b')
+
+
+# Test: Schema class.
+def _check_ratio(value):
+    if not 0 <= value <= 1:
+        raise ValueError('bad ratio')
+
+
+class TestSchema(object):
+    schema = Schema({
+        'DEBUG': bool,
+        'PORT': {'type': int, 'min': 1, 'max': 65535, 'required': True},
+        'HOST': (str, type(None)),
+        'LEVEL': {'choices': ['DEBUG', 'INFO']},
+        'URL': {'type': str, 'regex': '^https?://'},
+        'WORKERS': lambda x: None if x > 0 else 'must be positive',
+        'RATIO': {'validator': _check_ratio},
+    })
+
+    @pytest.mark.parametrize('key,value,msg', [
+        ('DEBUG', True, None),
+        ('DEBUG', 1, 'expected bool, got int'),
+        ('PORT', 80, None),
+        ('PORT', 0, 'must be >= 1'),
+        ('PORT', 65536, 'must be <= 65535'),
+        ('PORT', '80', 'expected int, got str'),
+        ('HOST', None, None),
+        ('HOST', 1, 'expected str or NoneType, got int'),
+        ('LEVEL', 'INFO', None),
+        ('LEVEL', 'X', "must be one of ['DEBUG', 'INFO']"),
+        ('URL', 'http://x', None),
+        ('URL', 'ftp://x', "doesn't match '^https?://'"),
+        ('WORKERS', 1, None),
+        ('WORKERS', 0, 'must be positive'),
+        ('RATIO', 0.5, None),
+        ('RATIO', 2, 'bad ratio'),
+        ('UNKNOWN', 1, None),
+    ])
+    def test_check(self, key, value, msg):
+        assert self.schema.check(key, value) == msg
+
+    # Test: validate whole config.
+    def test_validate(self):
+        errors = self.schema.validate(dict(DEBUG=1, LEVEL='X', HOST='h'))
+        assert errors == [
+            ('DEBUG', 'expected bool, got int'),
+            ('LEVEL', "must be one of ['DEBUG', 'INFO']"),
+            ('PORT', 'is required'),
+        ]
+        assert self.schema.validate(dict(PORT=1)) == []
+
+    # Test: unknown keys.
+    def test_unknown(self):
+        schema = Schema({'ONE': int}, allow_unknown=False)
+        assert schema.validate(dict(ONE=1, TWO=2)) == [('TWO', 'unknown key')]
+
+
+# Test: DictConfig validation.
+class TestDictConfigValidate(object):
+    rules = {'PORT': {'type': int, 'required': True}, 'DEBUG': bool}
+
+    # Test: no schema.
+    def test_no_schema(self):
+        config = DictConfig()
+        config['PORT'] = 'x'
+        assert config.validate() == []
+
+    # Test: validation errors.
+    def test_errors(self):
+        config = DictConfig(schema=self.rules)
+        config.load_from('dict', dict(DEBUG=1))
+
+        with pytest.raises(ValidationError) as e:
+            config.validate()
+        assert str(e.value) == ('DEBUG: expected bool, got int; '
+                                'PORT: is required')
+        assert e.value.errors == [('DEBUG', 'expected bool, got int'),
+                                  ('PORT', 'is required')]
+
+        # Errors are remembered.
+        assert config.validate(raise_error=False) == e.value.errors
+
+        config.load_from('dict', dict(DEBUG=True, PORT=1))
+        assert config.validate() == []
+
+        del config['PORT']
+        assert config.validate(False) == [('PORT', 'is required')]
+
+    # Test: only changed keys are validated.
+    def test_incremental(self):
+        calls = []
+
+        def check(value):
+            calls.append(value)
+
+        config = DictConfig()
+        config.update(dict(ONE=1, TWO=2))
+        config.set_schema({'ONE': check, 'TWO': check})
+
+        config.validate()
+        assert sorted(calls) == [1, 2]
+
+        config.load_from('dict', dict(TWO=3))
+        config.validate()
+        assert sorted(calls) == [1, 2, 3]
+
+        config.validate()
+        assert sorted(calls) == [1, 2, 3]
+
+        config.set_schema(None)
+        assert config.validate() == []
+
+
+# Test: DictConfig derived keys.
+class TestDerived(object):
+    def make(self):
+        calls = []
+        config = DictConfig()
+        config.update(dict(HOST='localhost', PORT=5432, NAME='db'))
+
+        @config.derive('DSN')
+        def dsn(c):
+            calls.append('DSN')
+            return '%s:%d/%s' % (c['HOST'], c['PORT'], c['NAME'])
+
+        return config, calls
+
+    # Test: copies memoize derived values independently.
+    def test_copy(self):
+        config = DictConfig(interpolate=True)
+        config['X'] = 1
+        config['Z'] = '${X}'
+        config.derive('Y', lambda c: c['X'] + 1)
+        assert config['Y'] == 2 and config['Z'] == 1
+
+        other = config.copy()
+        other['X'] = 10
+        assert other['Y'] == 11 and other['Z'] == 10
+        assert config['Y'] == 2 and config['Z'] == 1
+
+        config['X'] = 5
+        assert config['Y'] == 6
+        assert other['Y'] == 11
+
+    # Test: value is computed on access and memoized.
+    def test_memoize(self):
+        config, calls = self.make()
+
+        assert calls == []
+        assert 'DSN' in config
+        assert config['DSN'] == 'localhost:5432/db'
+        assert config.get('DSN') == 'localhost:5432/db'
+        assert calls == ['DSN']
+
+        # Derived keys are not stored.
+        assert 'DSN' not in list(config)
+
+    # Test: recompute only when inputs are changed.
+    def test_invalidate(self):
+        config, calls = self.make()
+        config['DSN']
+
+        config['OTHER'] = 1
+        config.load_from('dict', dict(HOST='localhost'))
+        assert config['DSN'] == 'localhost:5432/db'
+        assert calls == ['DSN']
+
+        config.load_from('dict', dict(PORT=1))
+        assert config['DSN'] == 'localhost:1/db'
+        assert calls == ['DSN', 'DSN']
+
+        del config['NAME']
+        with pytest.raises(KeyError):
+            config['DSN']
+        config['NAME'] = 'x'
+        assert config['DSN'] == 'localhost:1/x'
+
+    # Test: derived keys depending on derived keys.
+    def test_chain(self):
+        config, calls = self.make()
+        config.derive('URL', lambda c: 'pg://' + c['DSN'])
+        config.derive('OPT', lambda c: c.get('TIMEOUT', 10))
+
+        assert config['URL'] == 'pg://localhost:5432/db'
+        assert config['OPT'] == 10
+
+        config['PORT'] = 1
+        assert config['URL'] == 'pg://localhost:1/db'
+
+        # Missing key is a dependency too.
+        config['TIMEOUT'] = 5
+        assert config['OPT'] == 5
+
+    # Test: explicit value overrides derived one.
+    def test_override(self):
+        config, calls = self.make()
+        config.derive('URL', lambda c: 'pg://' + c['DSN'])
+        config['URL']
+
+        config['DSN'] = 'x'
+        assert config['DSN'] == 'x'
+        assert config['URL'] == 'pg://x'
+
+        del config['DSN']
+        assert config['URL'] == 'pg://localhost:5432/db'
+
+    # Test: unknown and circular keys.
+    def test_errors(self):
+        config = DictConfig()
+        config.derive('A', lambda c: c['B'])
+        config.derive('B', lambda c: c['A'])
+
+        with pytest.raises(KeyError):
+            config['C']
+        assert 'C' not in config
+        with pytest.raises(ConfigSourceError) as e:
+            config['A']
+        assert str(e.value) == 'Circular derived key: A'
+
+
+# Test: apply_batch() protocol.
+class TestApplyBatch(object):
+    class BatchConfig(dict):
+        def __init__(self):
+            super(TestApplyBatch.BatchConfig, self).__init__()
+            self.batches = []
+
+        def __setitem__(self, key, value):
+            raise AssertionError('must not be called')
+
+        def apply_batch(self, values):
+            self.batches.append(values)
+            self.update(values)
+
+    # Test: fallback to update().
+    def test_dict(self):
+        config = dict(A=1)
+        apply_batch(config, dict(B=2))
+        assert config == dict(A=1, B=2)
+
+    # Test: loaders store values with a single batch.
+    @patch.dict('os.environ', MYTEST_ONE='12')
+    def test_loaders(self, tmpdir):
+        class Cfg:
+            ONE = 1
+
+        pyfile = tmpdir.join('myconfig.py')
+        pyfile.write('ONE = 1\nTWO = "hello"\nthree = 3')
+        jsonfile = tmpdir.join('myconfig.json')
+        jsonfile.write('{"ONE": 1, "TWO": "hello", "three": 3}')
+
+        config = self.BatchConfig()
+        load_to(config, 'dict', 'dict', dict(A=1, B=2))
+        load_to(config, 'object', 'dict', Cfg)
+        load_to(config, 'env', 'dict', 'MYTEST_')
+        load_to(config, 'pyfile', 'dict', str(pyfile))
+        load_to(config, 'json', 'dict', str(jsonfile), select='TWO')
+
+        assert config.batches == [
+            dict(A=1, B=2),
+            dict(ONE=1),
+            dict(ONE='12'),
+            dict(ONE=1, TWO='hello'),
+            dict(TWO='hello'),
+        ]
+
+    # Test: batch for sources without selection support.
+    @patch.dict('config_source._config_sources', clear=True)
+    def test_not_selectable(self):
+        @config_source('my')
+        def loader(config):
+            apply_batch(config, dict(ONE=1, TWO=2))
+            return True
+
+        config = self.BatchConfig()
+        load_to(config, 'my', 'dict', select='ONE')
+        assert config.batches == [dict(ONE=1)]
+
+    # Test: DictConfig batch.
+    def test_dict_config(self):
+        calls = []
+        config = DictConfig(schema={'ONE': int})
+        config.derive('X', lambda c: calls.append(1) or c['ONE'])
+        config.apply_batch(dict(ONE=1, TWO=2))
+
+        assert config == dict(ONE=1, TWO=2)
+        assert config['X'] == 1
+
+        config.apply_batch(dict(ONE=1, TWO=3))
+        assert config['X'] == 1
+        assert calls == [1]
+
+        config.apply_batch(dict(ONE='1'))
+        assert config['X'] == '1'
+        assert config.validate(False) == [('ONE', 'expected int, got str')]
+
+
+# Test: DictConfig access tracking.
+class TestAccessTracking(object):
+    # Test: tracking is disabled by default.
+    def test_disabled(self):
+        config = DictConfig()
+        config['A'] = 1
+        assert config['A'] == 1
+        assert config.access_tracker is None
+        assert config.track_access(False) is None
+
+    # Test: hits, misses and sources.
+    def test_track(self, tmpdir):
+        jsonfile = tmpdir.join('myconfig.json')
+        jsonfile.write('{"ONE": 1, "TWO": "hello"}')
+
+        config = DictConfig()
+        config['ZERO'] = 0
+        tracker = config.track_access()
+        assert config.track_access() is tracker
+
+        config.load_from('json', str(jsonfile))
+        config.load_from('dict', dict(THREE=3))
+        config['FOUR'] = 4
+        config.derive('FIVE', lambda c: c['FOUR'] + 1)
+
+        config['ONE']
+        config['ONE']
+        config.get('TWO')
+        'TWO' in config
+        config.get('MISSING')
+        'MISSING' in config
+        config['FIVE']
+        with pytest.raises(KeyError):
+            config['MISSING']
+
+        report = tracker.report(config)
+        assert report == {
+            'keys': {
+                'ZERO': {'hits': 0, 'source': None},
+                'ONE': {'hits': 2, 'source': 'json:%s' % jsonfile},
+                'TWO': {'hits': 2, 'source': 'json:%s' % jsonfile},
+                'THREE': {'hits': 0, 'source': 'dict'},
+                'FOUR': {'hits': 1, 'source': None},
+                'FIVE': {'hits': 1, 'source': None},
+            },
+            'misses': {'MISSING': 3},
+        }
+
+        out = tmpdir.join('report.json')
+        tracker.export(str(out), config)
+        assert json.loads(out.read()) == report
+
+        config.track_access(False)
+        config['ONE']
+        assert tracker.hits['ONE'] == 2
+
+    # Test: sources are remembered for all ways of loading.
+    def test_sources(self, tmpdir):
+        jsonfile = tmpdir.join('myconfig.json')
+        jsonfile.write('{"ONE": 1}')
+        pyfile = tmpdir.join('myconfig.py')
+        pyfile.write('TWO = 2')
+
+        config = DictConfig()
+        tracker = config.track_access()
+        load_multiple_to(config, [
+            {'from': 'json', 'filename': str(jsonfile), 'select': 'ONE'},
+            {'from': 'env', 'prefix': 'MYTEST_NOT_SET_'},
+        ])
+        load_to(config, 'pyfile', 'dict', str(pyfile))
+        load_to(config, 'dict', 'dict', dict(THREE=3), merge='deep')
+
+        assert tracker.sources == {
+            'ONE': 'json:%s' % jsonfile,
+            'TWO': 'pyfile:%s' % pyfile,
+            'THREE': 'dict',
+        }
+        assert config._source is None
+
+    # Test: sources of values loaded in reverse mode.
+    def test_sources_reverse(self, tmpdir):
+        jsonfile = tmpdir.join('myconfig.json')
+        jsonfile.write('{"ONE": 1, "TWO": 1}')
+
+        config = DictConfig()
+        tracker = config.track_access()
+        load_multiple_to(config, [
+            {'from': 'json', 'filename': str(jsonfile)},
+            {'from': 'dict', 'obj': dict(TWO=2)},
+        ], reverse=True)
+
+        assert config == dict(ONE=1, TWO=2)
+        assert tracker.sources == {
+            'ONE': 'json:%s' % jsonfile,
+            'TWO': 'dict',
+        }
+        assert config._source is None
+
+
+# Test: deep_merge() function.
+class TestDeepMerge(object):
+    # Test: merge nested values.
+    def test_merge(self):
+        options = {'TIMEOUT': 1, 'RETRY': [1, 2]}
+        base = {'DB': {'HOST': 'localhost', 'OPTIONS': options}, 'X': 1}
+        override = {'DB': {'HOST': 'db', 'EXTRA': {'A': 1}}, 'Y': {'B': 2}}
+
+        result = deep_merge(base, override)
+        assert result == {
+            'DB': {'HOST': 'db', 'OPTIONS': options, 'EXTRA': {'A': 1}},
+            'X': 1,
+            'Y': {'B': 2},
+        }
+
+        # Arguments are not changed.
+        assert base == {'DB': {'HOST': 'localhost', 'OPTIONS': options},
+                        'X': 1}
+        assert override == {'DB': {'HOST': 'db', 'EXTRA': {'A': 1}},
+                            'Y': {'B': 2}}
+
+        # Untouched subtrees are shared.
+        assert result['DB']['OPTIONS'] is options
+        assert result['DB']['EXTRA'] is override['DB']['EXTRA']
+        assert result['Y'] is override['Y']
+
+    # Test: non-mapping values are replaced.
+    @pytest.mark.parametrize('base,override,result', [
+        ({'A': 1}, 2, 2),
+        (1, {'A': 1}, {'A': 1}),
+        ({'A': {'B': 1}}, {'A': None}, {'A': None}),
+        ({'A': [1]}, {'A': [2]}, {'A': [2]}),
+    ])
+    def test_replace(self, base, override, result):
+        assert deep_merge(base, override) == result
+
+
+# Test: load with deep merge.
+class TestLoadDeepMerge(object):
+    # Test: merge JSON file.
+    def test_json(self, tmpdir):
+        jsonfile = tmpdir.join('override.json')
+        jsonfile.write('{"DB": {"HOST": "db"}, "DEBUG": true}')
+
+        options = {'TIMEOUT': 1}
+        config = DictConfig()
+        config.load_from('dict', {'DB': {'HOST': 'localhost', 'PORT': 1,
+                                         'OPTIONS': options}})
+        config.load_from('json', str(jsonfile), merge='deep')
+
+        assert config == {
+            'DB': {'HOST': 'db', 'PORT': 1, 'OPTIONS': options},
+            'DEBUG': True,
+        }
+        assert config['DB']['OPTIONS'] is options
+
+        # Default mode replaces values.
+        config.load_from('json', str(jsonfile))
+        assert config == {'DB': {'HOST': 'db'}, 'DEBUG': True}
+
+    # Test: merge in load_multiple_to() and for non-batch sources.
+    @patch.dict('config_source._config_sources', clear=True)
+    def test_multiple(self):
+        @config_source('my')
+        def loader(config, value):
+            config['DB'] = value
+            return True
+
+        config = {}
+        load_multiple_to(config, [
+            {'from': 'my', 'value': {'HOST': 'localhost', 'PORT': 1}},
+            {'from': 'my', 'value': {'HOST': 'db'}},
+            {'from': 'my', 'value': {'PORT': 2}, 'select': 'X'},
+        ], merge='deep')
+
+        assert config == {'DB': {'HOST': 'db', 'PORT': 1}}
+
+    # Test: merge into stored values of DictConfig.
+    def test_dict_config(self, tmpdir):
+        filename = str(tmpdir.join('config.cfgidx'))
+        write_indexed({'DB': {'HOST': 'localhost', 'PORT': 1}}, filename)
+
+        config = DictConfig()
+        tracker = config.track_access()
+        config.derive('CACHE', lambda c: {'SIZE': 1})
+        config.load_from('indexed', filename)
+        config.load_from('dict', {'DB': {'HOST': 'db'},
+                                  'CACHE': {'TTL': 2}}, merge='deep')
+
+        assert dict(tracker.hits) == {}
+        assert config.data == {'DB': {'HOST': 'db', 'PORT': 1},
+                               'CACHE': {'TTL': 2}}
+
+    # Test: unknown merge mode.
+    def test_unknown(self):
+        with pytest.raises(ConfigSourceError) as e:
+            load_to({}, 'dict', 'dict', {}, merge='bla')
+        assert str(e.value) == 'Unknown merge mode: bla'
+
+
+# Test: parse_dotenv() function.
+class TestParseDotenv(object):
+    text = (u'# Comment.\n'
+            u'ONE=1\n'
+            u'\n'
+            u'  export TWO = "hello\\n\\"world\\"" # Comment.\n'
+            u"THREE='single # quoted'\r\n"
+            u'FOUR=plain value # comment\n'
+            u'FIVE="multi\n'
+            u'line"\n'
+            u'SIX=\n'
+            u'SEVEN=a#b\n'
+            u'lower=1\n'
+            u'LAST="x"')
+
+    # Test: parse all keys.
+    def test_parse(self):
+        assert parse_dotenv(self.text) == dict(
+            ONE='1',
+            TWO='hello\n"world"',
+            THREE='single # quoted',
+            FOUR='plain value',
+            FIVE='multi\nline',
+            SIX='',
+            SEVEN='a#b',
+            LAST='x',
+        )
+
+    # Test: parse selected keys.
+    def test_select(self):
+        result = parse_dotenv(self.text, KeySelector(['T*', 'FIVE']))
+        assert result == dict(TWO='hello\n"world"', THREE='single # quoted',
+                              FIVE='multi\nline')
+
+    # Test: syntax errors.
+    @pytest.mark.parametrize('text,line', [
+        (u'ONE=1\nTWO\n', 2),
+        (u'ONE="1" x\n', 1),
+    ])
+    def test_error(self, text, line):
+        with pytest.raises(ConfigSourceError) as e:
+            parse_dotenv(text)
+        assert str(e.value) == 'Invalid .env syntax at line %d' % line
+
+
+# Test: parse_toml() function.
+class TestParseToml(object):
+    text = u'\n'.join([
+        u'# Comment.',
+        u'TITLE = "TOML \\u00e9 example"  # Comment.',
+        u'lower = 1',
+        u'INTS = [1, 0x1f, 0o7, 0b11, -2_000, +3]',
+        u'FLOATS = [1.5, -2e3, 6.02e+23, inf]',
+        u'BOOLS = [true, false]',
+        u'ML = """',
+        u'Roses are red\\',
+        u'   Violets"""""',
+        u"LITERAL = 'C:\\path'",
+        u"ML_LITERAL = '''",
+        u"raw \\n text'''",
+        u'DATES = [1979-05-27T07:32:00Z, 1979-05-27T00:32:00.5-07:00,',
+        u'         1979-05-27 07:32:00, 1979-05-27, 07:32:00]',
+        u'INLINE = { X = 1, Y.Z = "2" }',
+        u'NESTED = [ [1, 2], ["a",',
+        u"  'b', ], ]  # Comment.",
+        u'"QUOTED" = 1',
+        u'A.B = 3',
+        u'',
+        u'[DB]',
+        u'HOST = "localhost"',
+        u'',
+        u'[DB.POOL]',
+        u'SIZE = 10',
+        u'',
+        u'[skipped]',
+        u'X = """ [ not a table',
+        u'[ALSO_NOT_A_TABLE] """',
+        u'',
+        u'[[SERVERS]]',
+        u'NAME = "a"',
+        u'[[SERVERS]]',
+        u'NAME = "b"',
+        u'[SERVERS.OPTIONS]',
+        u'Y = 1',
+    ])
+
+    # Test: comments in skipped values.
+    @pytest.mark.parametrize('text,expected', [
+        (u'lower = [ # note ]\n  1, 2\n]\nUPPER = 1', dict(UPPER=1)),
+        (u'low = 1 # """\nUP = 2\nX = """a"""', dict(UP=2, X=u'a')),
+        (u"low = 1 # '''\nUP = 2\nX = '''a'''", dict(UP=2, X=u'a')),
+        (u'low = [1, # ] [ {\n 2] # "\nUP = "#"', dict(UP=u'#')),
+        (u'low = { a = "#" } # }\nUP = 1 # [', dict(UP=1)),
+    ])
+    def test_skip_comments(self, text, expected):
+        assert parse_toml(text) == expected
+        assert parse_toml(text, select=sorted(expected)[:1]) == dict(
+            [sorted(expected.items())[0]])
+
+    # Test: parse document.
+    def test_parse(self):
+        result = parse_toml(self.text)
+        dates = result.pop('DATES')
+
+        assert result == dict(
+            TITLE=u'TOML \u00e9 example',
+            INTS=[1, 31, 7, 3, -2000, 3],
+            FLOATS=[1.5, -2000.0, 6.02e+23, float('inf')],
+            BOOLS=[True, False],
+            ML='Roses are redViolets""',
+            LITERAL='C:\\path',
+            ML_LITERAL='raw \\n text',
+            INLINE={'X': 1, 'Y': {'Z': '2'}},
+            NESTED=[[1, 2], ['a', 'b']],
+            QUOTED=1,
+            A={'B': 3},
+            DB={'HOST': 'localhost', 'POOL': {'SIZE': 10}},
+            SERVERS=[{'NAME': 'a'}, {'NAME': 'b', 'OPTIONS': {'Y': 1}}],
+        )
+        assert dates[2:] == [
+            datetime.datetime(1979, 5, 27, 7, 32),
+            datetime.date(1979, 5, 27),
+            datetime.time(7, 32),
+        ]
+        assert [x.utcoffset() for x in dates[:2]] == [
+            datetime.timedelta(0), datetime.timedelta(hours=-7)]
+        assert dates[1].microsecond == 500000
+
+    # Test: parse selected keys.
+    def test_select(self):
+        result = parse_toml(self.text, KeySelector(['D*', 'TITLE']))
+        assert sorted(result) == ['DATES', 'DB', 'TITLE']
+
+    # Test: syntax errors.
+    @pytest.mark.parametrize('text,msg', [
+        (u'A = 1 2', 'expected end of line at line 1'),
+        (u'A = \n', 'invalid value at line 1'),
+        (u'\nA = [1 2]', "expected ']' at line 2"),
+        (u'A = "x', 'invalid string at line 1'),
+        (u'A = 1\nA = 2', 'duplicate key A at line 2'),
+        (u'A = 1\n[A]', 'duplicate key A at line 2'),
+        (u'= 1', 'invalid key at line 1'),
+    ])
+    def test_error(self, text, msg):
+        with pytest.raises(ConfigSourceError) as e:
+            parse_toml(text)
+        assert str(e.value) == 'Invalid TOML: %s' % msg
+
+
+# Test: parse_ini() function.
+class TestParseIni(object):
+    text = u'\n'.join([
+        u'; Comment.',
+        u'TOP = 1',
+        u'lower = 2',
+        u'[DB]',
+        u'host = localhost',
+        u'port: 5432',
+        u'# Comment.',
+        u'description = multi',
+        u'  line',
+        u'[app]',
+        u'DEBUG = true',
+        u'NAME = x',
+        u'  continued',
+        u'secret = x',
+    ])
+
+    # Test: parse file.
+    def test_parse(self):
+        assert parse_ini(self.text) == dict(
+            TOP='1',
+            DB={'host': 'localhost', 'port': '5432',
+                'description': 'multi\nline'},
+        )
+
+    # Test: parse section.
+    def test_section(self):
+        assert parse_ini(self.text, 'app') == dict(
+            DEBUG='true', NAME='x\ncontinued')
+        assert parse_ini(self.text, 'app', select='N*') == dict(
+            NAME='x\ncontinued')
+
+    # Test: parse selected keys.
+    def test_select(self):
+        assert parse_ini(self.text, select=KeySelector(['DB'])) == dict(
+            DB={'host': 'localhost', 'port': '5432',
+                'description': 'multi\nline'},
+        )
+
+    # Test: syntax errors.
+    def test_error(self):
+        with pytest.raises(ConfigSourceError) as e:
+            parse_ini(u'A = 1\nB\n')
+        assert str(e.value) == 'Invalid INI syntax at line 2'
+
+
+# Test: load from .env, TOML and INI files.
+class TestTextSources(object):
+    @pytest.mark.parametrize('name,text', [
+        ('.env', u'ONE=1\nTWO=hello\nthree=3'),
+        ('config.toml', u'ONE = "1"\nTWO = "hello"\nthree = 3'),
+        ('config.ini', u'ONE = 1\nTWO = hello\nthree = 3'),
+    ])
+    def test_load(self, tmpdir, name, text):
+        f = tmpdir.join(name)
+        f.write_text(text, 'utf-8')
+
+        config = DictConfig()
+        DictConfigLoader(config).load(str(f))
+        assert config == dict(ONE='1', TWO='hello')
+
+        config = DictConfig()
+        source = DictConfigLoader(config).detect_source(str(f))
+        assert config.load_from(source, '%s:/%s' % (source, f),
+                                select='TWO') is True
+        assert config == dict(TWO='hello')
+
+    # Test: load INI section.
+    def test_ini_section(self, tmpdir):
+        f = tmpdir.join('config.ini')
+        f.write_text(u'[app]\nONE = 1', 'utf-8')
+
+        config = DictConfig()
+        config.load_from('ini', str(f), section='app')
+        assert config == dict(ONE='1')
+
+    # Test: missing files.
+    @pytest.mark.parametrize('source', ['dotenv', 'toml', 'ini'])
+    def test_missing(self, tmpdir, source):
+        filename = str(tmpdir.join('missing'))
+        config = DictConfig()
+
+        assert config.load_from(source, filename, silent=True) is False
+        with pytest.raises(IOError):
+            config.load_from(source, filename)
+
+
+# Test: DictConfig lazy namespaces.
+class TestNamespaces(object):
+    @pytest.fixture
+    def calls(self):
+        calls = []
+
+        @config_source('ns_test', force=True, selectable=True)
+        def load(config, data, select=None, fail=False):
+            calls.append(select)
+            if fail and len(calls) == 1:
+                raise ValueError('fail')
+            apply_batch(config, dict((k, v) for k, v in data.items()
+                                     if select is None or select(k)))
+            return True
+
+        yield calls
+        _config_sources['dict'].pop('ns_test', None)
+        configsource._selectable_sources.discard(
+            ('dict', 'ns_test'))
+
+    DATA = dict(DB_HOST='localhost', DB_PORT=5432, CACHE_SIZE=10)
+
+    # Test: namespace is loaded on first access and only once.
+    def test_lazy(self, calls):
+        config = DictConfig()
+        config['VALUE'] = 1
+        config.add_namespace('DB_', 'ns_test', self.DATA)
+        config.add_namespace('CACHE_', 'ns_test', self.DATA)
+
+        assert config['VALUE'] == 1
+        assert calls == []
+
+        assert config['DB_HOST'] == 'localhost'
+        assert len(calls) == 1
+        assert config.get('DB_PORT') == 5432
+        assert config.get('DB_MISSING') is None
+        assert 'DB_USER' not in config
+        assert len(calls) == 1
+        assert config.data == dict(VALUE=1, DB_HOST='localhost', DB_PORT=5432)
+
+        assert 'CACHE_SIZE' in config
+        assert len(calls) == 2
+
+    # Test: explicit select.
+    def test_select(self, calls):
+        config = DictConfig()
+        config.add_namespace('DB_', 'ns_test', self.DATA, select='DB_HOST')
+        assert config.get('DB_PORT') is None
+        assert config.data == dict(DB_HOST='localhost')
+
+    # Test: warmup and iteration load namespaces.
+    def test_warmup(self, calls):
+        config = DictConfig()
+        config.add_namespace('DB_', 'ns_test', self.DATA)
+        config.add_namespace('CACHE_', 'ns_test', self.DATA)
+
+        config.warmup(['CACHE_'])
+        assert config.data == dict(CACHE_SIZE=10)
+        assert len(config) == 3
+        assert len(calls) == 2
+        assert sorted(config) == ['CACHE_SIZE', 'DB_HOST', 'DB_PORT']
+        assert config == self.DATA
+
+    # Test: failed namespace is loaded again on next access.
+    def test_retry(self, calls):
+        config = DictConfig()
+        config.add_namespace('DB_', 'ns_test', self.DATA, fail=True)
+
+        with pytest.raises(ValueError):
+            config.get('DB_HOST')
+        assert config['DB_HOST'] == 'localhost'
+        assert len(calls) == 2
+
+    # Test: deep copy and pickle.
+    def test_copy(self, calls):
+        import copy
+        import pickle
+        config = DictConfig()
+        config['VALUE'] = 1
+        config.add_namespace('DB_', 'ns_test', self.DATA)
+
+        for other in (copy.deepcopy(config),
+                      pickle.loads(pickle.dumps(config))):
+            assert other['DB_PORT'] == 5432
+            assert other.data == dict(VALUE=1, DB_HOST='localhost',
+                                      DB_PORT=5432)
+        assert config.data == dict(VALUE=1)
+
+    # Test: values stored after the namespace is added are kept.
+    def test_explicit(self, calls):
+        config = DictConfig()
+        config['DB_PORT'] = 1
+        config.add_namespace('DB_', 'ns_test', self.DATA)
+        config.add_namespace('CACHE_', 'ns_test', self.DATA)
+        config['DB_HOST'] = 'example.com'
+        assert len(calls) == 1
+        del config['DB_PORT']
+        config.load_from('dict', dict(CACHE_SIZE=20))
+        assert len(calls) == 2
+
+        assert config.data == dict(DB_HOST='example.com', CACHE_SIZE=20)
+
+    # Test: validation loads namespaces with required keys.
+    def test_validate(self, calls):
+        config = DictConfig(schema={'DB_HOST': {'required': True},
+                                    'CACHE_SIZE': int})
+        config.add_namespace('DB_', 'ns_test', self.DATA)
+        config.add_namespace('CACHE_', 'ns_test', self.DATA)
+        assert config.validate() == []
+        assert len(calls) == 1
+        assert config.data == dict(DB_HOST='localhost', DB_PORT=5432)
+
+    # Test: concurrent access loads namespace once.
+    def test_threads(self, calls):
+        @config_source('ns_slow', force=True)
+        def load(config, data):
+            time.sleep(0.05)
+            calls.append(None)
+            config.update(data)
+            return True
+
+        config = DictConfig()
+        config.add_namespace('DB_', 'ns_slow', self.DATA)
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(config.get('DB_PORT')))
+            for _ in range(5)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            _config_sources['dict'].pop('ns_slow', None)
+
+        assert results == [5432] * 5
+        assert len(calls) == 1
+
+
+# Test: indexed files and indexed source.
+class TestIndexed(object):
+    DATA = {
+        'ONE': 1,
+        'TWO': 'hello',
+        u'ТРИ': [1, 2.5, None, True],
+        'DB_HOST': 'localhost',
+        'DB_PORT': 5432,
+        'NESTED': {'a': {'b': 'c'}},
+    }
+
+    @pytest.fixture
+    def filename(self, tmpdir):
+        filename = str(tmpdir.join('config.cfgidx'))
+        write_indexed(self.DATA, filename)
+        return filename
+
+    # Test: mapping over indexed file.
+    def test_file(self, filename):
+        values = IndexedFile(filename)
+        assert len(values) == len(self.DATA)
+        assert sorted(values) == sorted(self.DATA)
+        assert values['NESTED'] == {'a': {'b': 'c'}}
+        assert values[u'ТРИ'] == [1, 2.5, None, True]
+        assert values['NESTED'] is values['NESTED']
+        assert 'ONE' in values
+        assert 'MISSING' not in values
+        assert 1 not in values
+        assert values.get('MISSING') is None
+        assert dict(values) == self.DATA
+
+    # Test: empty config and large config.
+    @pytest.mark.parametrize('count', [0, 1, 1000])
+    def test_sizes(self, tmpdir, count):
+        data = dict(('KEY_%d' % i, i) for i in range(count))
+        filename = str(tmpdir.join('config.cfgidx'))
+        write_indexed(data, filename)
+        values = IndexedFile(filename)
+        assert dict(values) == data
+        assert all(values['KEY_%d' % i] == i for i in range(count))
+
+    # Test: write errors.
+    def test_write_error(self, tmpdir):
+        with pytest.raises(ConfigSourceError):
+            write_indexed({'ONE': object()}, str(tmpdir.join('x')))
+
+    # Test: invalid files.
+    def test_invalid(self, tmpdir):
+        f = tmpdir.join('config.cfgidx')
+        for data in [b'', b'{"ONE": 1}', b'CFGIDX\x09\x00' + b'\x00' * 8]:
+            f.write_binary(data)
+            with pytest.raises(ConfigSourceError):
+                IndexedFile(str(f))
+
+    # Test: values are taken on first access.
+    def test_lazy(self, filename):
+        config = DictConfig()
+        config['ONE'] = 0
+        config['OTHER'] = 0
+        assert config.load_from('indexed', filename) is True
+        # Overridden values are replaced on access.
+        assert config.data == dict(ONE=0, OTHER=0)
+
+        assert config['ONE'] == 1
+        assert 'TWO' in config
+        assert config.get('DB_PORT') == 5432
+        assert config.get('MISSING') is None
+        assert config.data == dict(OTHER=0, ONE=1, DB_PORT=5432)
+
+        config['TWO'] = 2
+        del config['DB_HOST']
+        with pytest.raises(KeyError):
+            del config['DB_HOST']
+        assert 'DB_HOST' not in config
+        assert config['TWO'] == 2
+
+        expected = dict(self.DATA, OTHER=0, TWO=2)
+        del expected['DB_HOST']
+        assert len(config) == len(expected)
+        assert config.data == expected
+        assert config == expected
+
+    # Test: later sources override lazy values.
+    def test_override(self, filename, tmpdir):
+        config = DictConfig()
+        config.load_from('indexed', filename)
+        assert config['ONE'] == 1
+        config.load_from('dict', dict(TWO=2))
+
+        other = str(tmpdir.join('other.cfgidx'))
+        write_indexed(dict(ONE=10, TWO=20), other)
+        config.load_from('indexed', other)
+        assert config['ONE'] == 10
+        assert config['TWO'] == 20
+        assert config['DB_PORT'] == 5432
+
+    # Test: selected keys.
+    def test_select(self, filename):
+        config = DictConfig()
+        config.load_from('indexed', filename, select=['ONE', 'MISSING'])
+        assert config.data == dict(ONE=1)
+
+        config = DictConfig()
+        assert config.load_from('indexed', filename, select='DB_*') is True
+        assert 'ONE' not in config
+        assert config == dict(DB_HOST='localhost', DB_PORT=5432)
+
+        for select in ('NOPE_*', ['MISSING']):
+            config = DictConfig()
+            assert config.load_from('indexed', filename,
+                                    select=select) is False
+            assert config == {}
+
+    # Test: precedence of stored and lazy values.
+    def test_precedence(self, tmpdir):
+        def layer(name, data):
+            path = str(tmpdir.join(name))
+            write_indexed(data, path)
+            config.load_from('indexed', path)
+
+        config = DictConfig()
+        config.update(A=0, B=0)
+        layer('1', dict(A=1, B=1, C=1))
+        config['B'] = 2
+        layer('2', dict(C=3))
+        assert config['A'] == 1
+        assert config['B'] == 2
+        assert config['C'] == 3
+
+        del config['C']
+        assert 'C' not in config
+        layer('3', dict(C=5, A=5))
+        assert config['C'] == 5
+        assert config == dict(A=5, B=2, C=5)
+
+    # Test: derived keys, validation and access tracking.
+    def test_config_features(self, filename):
+        config = DictConfig()
+        config.derive('PORT', lambda c: c.get('DB_PORT', 0))
+        assert config['PORT'] == 0
+        tracker = config.track_access()
+
+        config.load_from('indexed', filename)
+        assert config['PORT'] == 5432
+        assert tracker.sources['DB_PORT'] == 'indexed:' + filename
+
+        config.set_schema({'ONE': str})
+        assert config.validate(raise_error=False) == [
+            ('ONE', 'expected str, got int')]
+        assert config.data == self.DATA
+
+        config = DictConfig(schema={'ONE': str})
+        config.load_from('indexed', filename)
+        assert config.data == self.DATA
+
+    # Test: apply_lazy() for dict config.
+    def test_dict(self, filename):
+        config = {}
+        assert load_to(config, 'indexed', 'dict', filename, select='DB_*')
+        assert config == dict(DB_HOST='localhost', DB_PORT=5432)
+
+        config = {}
+        apply_lazy(config, IndexedFile(filename))
+        assert config == self.DATA
+
+    # Test: missing file.
+    def test_missing(self, tmpdir):
+        filename = str(tmpdir.join('missing'))
+        config = DictConfig()
+        assert config.load_from('indexed', filename, silent=True) is False
+        with pytest.raises(IOError):
+            config.load_from('indexed', filename)
+
+
+# Test: DictConfig interpolation.
+class TestInterpolation(object):
+    # Test: resolve references.
+    def test_resolve(self):
+        config = DictConfig(interpolate=True)
+        config['HOST'] = 'localhost'
+        config['URL'] = 'http://${HOST}:${ PORT }/100%'
+        config['ADDR'] = '${PORT}'
+        config['PORT'] = 8000
+        config['RAW'] = '$${HOST} ${HOST}'
+
+        assert config['URL'] == 'http://localhost:8000/100%'
+        assert config.get('ADDR') == 8000
+        assert config['RAW'] == '${HOST} localhost'
+        assert config.data['URL'] == 'http://${HOST}:${ PORT }/100%'
+        assert dict(config)['URL'] == 'http://localhost:8000/100%'
+
+    # Test: interpolation is disabled by default.
+    def test_disabled(self):
+        config = DictConfig()
+        config['HOST'] = 'localhost'
+        config['URL'] = 'http://${HOST}/'
+        assert config['URL'] == 'http://${HOST}/'
+
+    # Test: resolved values are memoized and invalidated on changes.
+    def test_invalidate(self):
+        config = DictConfig(interpolate=True)
+        config.load_from('dict', dict(HOST='localhost', PORT=80, OTHER=1,
+                                      URL='http://${HOST}:${PORT}/'))
+        url = config['URL']
+        assert url == 'http://localhost:80/'
+
+        config.load_from('dict', dict(PORT=80, OTHER=2))
+        assert config['URL'] is url
+
+        config.load_from('dict', dict(HOST='example.com'))
+        assert config['URL'] == 'http://example.com:80/'
+
+        config['URL'] = '${HOST}'
+        assert config['URL'] == 'example.com'
+        config['URL'] = 'plain'
+        config['HOST'] = 'localhost'
+        assert config['URL'] == 'plain'
+
+        del config['URL']
+        assert 'URL' not in config
+
+    # Test: chains of references are resolved in topological order.
+    def test_chain(self):
+        config = DictConfig(interpolate=True)
+        count = 5000
+        for i in range(count):
+            config['K%d' % i] = '${K%d}' % (i + 1)
+        config['K%d' % count] = 'end'
+        config['BOTH'] = '${K0} ${K2500}'
+
+        assert config['BOTH'] == 'end end'
+        config['K%d' % count] = 'new'
+        assert config['K0'] == 'new'
+
+    # Test: circular references are rejected on store.
+    def test_cycle(self):
+        config = DictConfig(interpolate=True)
+        with pytest.raises(ConfigSourceError) as e:
+            config['A'] = 'x${A}'
+        assert str(e.value) == 'Circular reference: A -> A'
+        assert 'A' not in config
+
+        config['A'] = '${B}'
+        config['B'] = '${C}'
+        with pytest.raises(ConfigSourceError):
+            config['C'] = '${A}'
+        with pytest.raises(ConfigSourceError):
+            config.load_from('dict', dict(C='${D}', D='${B}'))
+        assert 'C' not in config and 'D' not in config
+
+        # Cycle is broken by the same batch.
+        config.load_from('dict', dict(C='${A}', A='a'))
+        assert config['B'] == 'a'
+
+    # Test: undefined references.
+    def test_undefined(self):
+        config = DictConfig(interpolate=True)
+        config['URL'] = 'http://${HOST}/'
+        with pytest.raises(ConfigSourceError):
+            config['URL']
+        config['HOST'] = 'localhost'
+        assert config['URL'] == 'http://localhost/'
+
+    # Test: references to and from derived keys.
+    def test_derived(self):
+        config = DictConfig(interpolate=True)
+        config['HOST'] = 'localhost'
+        config['URL'] = 'http://${DSN}/'
+        config.derive('DSN', lambda c: c['HOST'] + ':' + str(c['PORT']))
+        config.derive('LEN', lambda c: len(c['URL']))
+        config['PORT'] = 80
+
+        assert config['URL'] == 'http://localhost:80/'
+        assert config['LEN'] == 20
+        config['PORT'] = 8000
+        assert config['LEN'] == 22
+
+    # Test: resolved values are validated.
+    def test_validate(self):
+        config = DictConfig(interpolate=True,
+                            schema={'PORT': int, 'URL': str})
+        config['BASE'] = 8000
+        config['PORT'] = '${BASE}'
+        config['URL'] = 'http://${HOST}/'
+        assert config.validate(raise_error=False) == [
+            ('URL', 'Undefined reference in URL: HOST')]
+
+        config['HOST'] = 'localhost'
+        assert config.validate() == []
+
+        config['BASE'] = 'x'
+        assert config.validate(raise_error=False) == [
+            ('PORT', 'expected int, got str')]
+        config['BASE'] = 8080
+        assert config.validate() == []
+
+    # Test: templates from lazy layers are resolved on first read.
+    @pytest.mark.parametrize('track', [False, True])
+    def test_lazy(self, tmpdir, track):
+        filename = str(tmpdir.join('config.cfgidx'))
+        write_indexed({'A': 1, 'URL': 'x${A}', 'P': '${Q}', 'Q': '${P}'},
+                      filename)
+
+        config = DictConfig(interpolate=True)
+        if track:
+            config.track_access()
+        config.load_from('indexed', filename)
+        assert config['URL'] == 'x1'
+        assert config.get('URL') == 'x1'
+        with pytest.raises(ConfigSourceError) as e:
+            config['P']
+        assert 'Circular reference' in str(e.value)
+
+
+# Test: DictConfig fingerprint.
+class TestFingerprint(object):
+    DATA = dict(ONE=1, TWO='two', THREE=[1, 2.5, None],
+                FOUR={'b': 1, 'a': True}, FIVE=datetime.date(2019, 1, 2))
+
+    @staticmethod
+    def fresh(config):
+        other = DictConfig()
+        other.update(config.data)
+        return other.fingerprint()
+
+    # Test: copies maintain their own fingerprints.
+    def test_copy(self):
+        import copy
+        config = DictConfig(schema={'B': int})
+        config.update(A=1, B=2)
+        config.fingerprint()
+
+        other = config.copy()
+        assert isinstance(other, DictConfig)
+        assert other == config
+        del other['B']
+        config['B'] = 3
+        assert config.fingerprint() == self.fresh(config)
+        assert other.fingerprint() == self.fresh(other)
+
+        other = copy.copy(config)
+        other['B'] = 'x'
+        assert config.validate(raise_error=False) == []
+        assert [k for k, _ in other.validate(raise_error=False)] == ['B']
+        assert config.fingerprint() == self.fresh(config)
+
+    # Test: fingerprint doesn't depend on items order.
+    def test_order(self):
+        config1 = DictConfig()
+        config1.load_from('dict', self.DATA)
+        config2 = DictConfig()
+        for key in reversed(sorted(self.DATA)):
+            config2[key] = self.DATA[key]
+        assert config1.fingerprint() == config2.fingerprint()
+        assert len(config1.fingerprint()) == 40
+        assert DictConfig().fingerprint() == '0' * 40
+
+    # Test: fingerprint is maintained on changes.
+    def test_changes(self):
+        config = DictConfig()
+        config.load_from('dict', self.DATA)
+        initial = config.fingerprint()
+
+        config['ONE'] = 2
+        assert config.fingerprint() != initial
+        assert config.fingerprint() == self.fresh(config)
+        config['SIX'] = 6
+        del config['TWO']
+        config.pop('THREE')
+        config.load_from('dict', dict(SEVEN=7, ONE=1))
+        assert config.fingerprint() == self.fresh(config)
+
+        del config['SIX'], config['SEVEN']
+        config.load_from('dict', self.DATA)
+        assert config.fingerprint() == initial
+
+        # No-op reload.
+        config.load_from('dict', self.DATA)
+        assert config.fingerprint() == initial
+
+    # Test: values with different types.
+    def test_types(self):
+        config = DictConfig()
+        config['ONE'] = 1
+        fingerprint = config.fingerprint()
+        config['ONE'] = '1'
+        assert config.fingerprint() != fingerprint
+        config['ONE'] = True
+        assert config.fingerprint() != fingerprint
+
+    # Test: lazy values are included.
+    def test_lazy(self, tmpdir):
+        filename = str(tmpdir.join('config.cfgidx'))
+        write_indexed(dict(ONE=1, TWO=2), filename)
+
+        config = DictConfig()
+        config['ONE'] = 0
+        before = config.fingerprint()
+        config.load_from('indexed', filename)
+        assert config.fingerprint() != before
+        assert config.fingerprint() == self.fresh(config)
+        assert config.data == dict(ONE=1, TWO=2)
+
+        config.load_from('indexed', filename)
+        assert config['ONE'] == 1
+        assert config.fingerprint() == self.fresh(config)
+
+    # Test: fingerprint is the same in other process.
+    def test_process(self):
+        import subprocess
+        config = DictConfig()
+        config.load_from('dict', dict(ONE='1', TWO=[2]))
+        code = ('from config_source import DictConfig;'
+                'c = DictConfig();'
+                'c.update(ONE="1", TWO=[2]);'
+                'print(c.fingerprint())')
+        env = dict(os.environ, PYTHONHASHSEED='123')
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        assert out.decode().strip() == config.fingerprint()
+
+
+# Test: ConfigServer class and daemon source.
+class TestDaemon(object):
+    @pytest.fixture
+    def daemon(self, tmpdir):
+        filename = tmpdir.join('config.json')
+        filename.write('{"ONE": 1, "TWO": "two"}')
+        path = str(tmpdir.join('config.sock'))
+        server = ConfigServer([{'from': 'json', 'filename': str(filename)}],
+                              path, interval=0.05)
+        server.start()
+        yield server, filename
+        server.close()
+        for client in configsource._daemon_clients.values():
+            client.close()
+        configsource._daemon_clients.clear()
+
+    @staticmethod
+    def client(server):
+        return configsource._daemon_clients[server.path]
+
+    # Test: load from daemon.
+    def test_load(self, daemon):
+        server, _ = daemon
+        config = DictConfig()
+        assert config.load_from('daemon', server.path) is True
+        assert config == dict(ONE=1, TWO='two')
+
+        config = DictConfig()
+        config.load_from('daemon', 'daemon://' + server.path, select='TWO')
+        assert config == dict(TWO='two')
+        assert server.version == 1
+
+    # Test: snapshot is cached until the daemon notifies about a change.
+    def test_invalidate(self, daemon):
+        server, filename = daemon
+        load_to({}, 'daemon', 'dict', server.path)
+        client = self.client(server)
+        data = client.get()
+        assert client.get() is data
+
+        # No-op reload.
+        assert server.reload(force=True) is False
+        assert client.get() is data
+
+        filename.write('{"ONE": 1, "TWO": "changed"}')
+        assert server.reload() is True
+        assert client.get() == dict(ONE=1, TWO='changed')
+        assert client.version == server.version == 2
+
+    # Test: the daemon watches sources.
+    def test_watch(self, daemon):
+        server, filename = daemon
+        config = DictConfig()
+        config.load_from('daemon', server.path)
+        filename.write('{"ONE": 1, "TWO": "watched"}')
+
+        deadline = time.time() + 5
+        while config['TWO'] != 'watched' and time.time() < deadline:
+            time.sleep(0.02)
+            config.load_from('daemon', server.path)
+        assert config['TWO'] == 'watched'
+
+        filename.write('{"ONE": ')
+        deadline = time.time() + 5
+        while server.last_error is None and time.time() < deadline:
+            time.sleep(0.02)
+        assert server.last_error is not None
+        config.load_from('daemon', server.path)
+        assert config['TWO'] == 'watched'
+
+    # Test: daemon is not available.
+    def test_missing(self, daemon, tmpdir):
+        server, _ = daemon
+        path = str(tmpdir.join('missing.sock'))
+        assert load_to({}, 'daemon', 'dict', path, silent=True) is False
+        with pytest.raises(IOError):
+            load_to({}, 'daemon', 'dict', path)
+
+        load_to({}, 'daemon', 'dict', server.path)
+        server.close()
+        assert load_to({}, 'daemon', 'dict', server.path,
+                       silent=True) is False
+
+    # Test: client reconnects after the daemon is restarted.
+    def test_restart(self, daemon):
+        server, filename = daemon
+        config = DictConfig()
+        config.load_from('daemon', server.path)
+        server.close()
+
+        filename.write('{"ONE": 1, "TWO": "restarted"}')
+        server.start()
+        config.load_from('daemon', server.path)
+        assert config['TWO'] == 'restarted'
+
+    # Test: clients which don't read notifications are disconnected.
+    def test_slow_client(self, daemon):
+        server, filename = daemon
+        load_to({}, 'daemon', 'dict', server.path)
+        message = b'{"version": 1}\n' * 1000
+        with server._lock:
+            sock, = server._clients
+            for _ in range(10000):
+                if sock not in server._clients:
+                    break
+                server._push(sock, message)
+        assert server._clients == set()
+
+        filename.write('{"ONE": 1, "TWO": "changed"}')
+        server.reload()
+        data = self.client(server).get()
+        assert data == dict(ONE=1, TWO='changed')
+        assert self.client(server).get() is data
+
+    # Test: client which doesn't read the snapshot is disconnected.
+    def test_send_timeout(self, tmpdir):
+        import socket
+        server = ConfigServer([{'from': 'dict', 'obj': {'BIG': 'x' * 10**7}}],
+                              str(tmpdir.join('config.sock')),
+                              interval=60, send_timeout=0.1)
+        server.start()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(server.path)
+            sock.sendall(b'get\n')
+            deadline = time.time() + 5
+            while time.time() < deadline:
+                time.sleep(0.05)
+                with server._lock:
+                    if not server._connections:
+                        break
+            assert server._connections == server._clients == set()
+        finally:
+            sock.close()
+            server.close()
+
+    # Test: values must be JSON serializable.
+    def test_not_serializable(self, tmpdir):
+        server = ConfigServer([{'from': 'dict', 'obj': {'ONE': object()}}],
+                              str(tmpdir.join('config.sock')))
+        with pytest.raises(ConfigSourceError):
+            server.reload()
+
+    # Test: serve command.
+    def test_command(self, tmpdir):
+        spec = tmpdir.join('spec.json')
+        spec.write('[]')
+        path = str(tmpdir.join('config.sock'))
+        with patch.object(ConfigServer, 'serve_forever') as serve:
+            assert main(['serve', str(spec), path, '--interval', '2']) == 0
+        assert serve.call_count == 1
+
+
+# Test: LoadProfiler class and profile_loads() function.
+class TestLoadProfiler(object):
+    @pytest.fixture
+    def slow(self):
+        @config_source('slow_test', force=True)
+        def load(config, delay, nested=False):
+            time.sleep(delay)
+            if nested:
+                load_to(config, 'slow_test', 'dict', 0)
+            config['ONE'] = 1
+            return True
+
+        yield
+        _config_sources['dict'].pop('slow_test', None)
+        profile_loads()
+
+    @staticmethod
+    def captured(directory):
+        names = sorted(os.listdir(directory)) if op.isdir(directory) else []
+        result = []
+        for name in names:
+            if name.endswith('.json'):
+                with open(op.join(directory, name)) as f:
+                    result.append(json.load(f))
+                assert op.isfile(op.join(directory, name[:-5] + '.prof'))
+        return result
+
+    # Test: disabled by default.
+    def test_disabled(self, slow):
+        assert configsource._load_profiler is None
+        profiler = profile_loads('/tmp')
+        assert isinstance(profiler, LoadProfiler)
+        assert configsource._load_profiler is profiler
+        assert profile_loads() is None
+        assert configsource._load_profiler is None
+
+    # Test: slow calls are captured.
+    def test_threshold(self, slow, tmpdir):
+        directory = str(tmpdir.join('profiles'))
+        profile_loads(directory, threshold=0.05)
+        config = {}
+        assert load_to(config, 'slow_test', 'dict', 0) is True
+        assert self.captured(directory) == []
+
+        assert load_to(config, 'slow_test', 'dict', 0.06, nested=True)
+        assert config == dict(ONE=1)
+        info, = self.captured(directory)
+        assert info['source'] == 'slow_test'
+        assert info['args'] == ['0.06']
+        assert info['kwargs'] == {'nested': 'True'}
+        assert info['reason'] == 'threshold'
+        assert info['time'] >= 0.05
+
+        stats = pstats.Stats(op.join(
+            directory, os.listdir(directory)[0][:-5] + '.prof'))
+        assert any(func[2] == 'load' for func in stats.stats)
+
+    # Test: sampled calls.
+    def test_sample(self, slow, tmpdir):
+        directory = str(tmpdir)
+        profiler = profile_loads(directory, sample=50)
+        profiler._random.seed(1)
+        for _ in range(20):
+            load_to({}, 'slow_test', 'dict', 0)
+        captured = self.captured(directory)
+        assert 0 < len(captured) < 20
+        assert all(x['reason'] == 'sample' for x in captured)
+
+        profile_loads(directory, sample=100)
+        load_to({}, 'slow_test', 'dict', 0)
+        assert len(self.captured(directory)) == len(captured) + 1
+
+    # Test: failed loads are captured, save errors are warnings.
+    def test_errors(self, slow, tmpdir):
+        directory = str(tmpdir.join('profiles'))
+        profile_loads(directory, threshold=0)
+        with pytest.raises(TypeError):
+            load_to({}, 'slow_test', 'dict')
+        assert len(self.captured(directory)) == 1
+
+        tmpdir.join('file').write('')
+        profile_loads(str(tmpdir.join('file')), threshold=0)
+        with pytest.warns(UserWarning):
+            assert load_to({}, 'slow_test', 'dict', 0) is True
+
+
+# Test: load from zip and tar archives.
+class TestArchive(object):
+    MEMBERS = {
+        'app/config.json': b'{"ONE": 1, "TWO": "two", "lower": 0}',
+        'app/settings': b'ONE = 1\nTWO = "two"\n',
+        'app/config.py': b'ONE = 1\nTWO = "two"\n',
+        'app/.env': b'ONE=1\nTWO=two',
+        'app/config.toml': b'ONE = 1\nTWO = "two"',
+        'app/config.ini': b'[main]\nONE = 1\nTWO = two',
+    }
+
+    @pytest.fixture(autouse=True)
+    def cache(self):
+        yield
+        configsource._archive_cache.clear()
+
+    @pytest.fixture
+    def zip_file(self, tmpdir):
+        import zipfile
+        filename = str(tmpdir.join('bundle.zip'))
+        with zipfile.ZipFile(filename, 'w') as f:
+            for name, data in self.MEMBERS.items():
+                f.writestr(name, data)
+        return filename
+
+    @pytest.fixture(params=['', ':gz'])
+    def tar_file(self, tmpdir, request):
+        import io
+        import tarfile
+        filename = str(tmpdir.join('bundle.tar'))
+        with tarfile.open(filename, 'w' + request.param) as f:
+            for name, data in self.MEMBERS.items():
+                info = tarfile.TarInfo('./' + name)
+                info.size = len(data)
+                f.addfile(info, io.BytesIO(data))
+        return filename
+
+    # Test: load members by extension.
+    @pytest.mark.parametrize('member,kwargs,expected', [
+        ('app/config.json', {}, dict(ONE=1, TWO='two')),
+        ('/app/config.py', {}, dict(ONE=1, TWO='two')),
+        ('app/settings', {}, dict(ONE=1, TWO='two')),
+        ('app/.env', {}, dict(ONE='1', TWO='two')),
+        ('app/config.toml', {}, dict(ONE=1, TWO='two')),
+        ('app/config.ini', {'section': 'main'}, dict(ONE='1', TWO='two')),
+        ('app/settings', {'member_source': 'toml'}, dict(ONE=1, TWO='two')),
+        ('app/config.json', {'select': 'TWO'}, dict(TWO='two')),
+    ])
+    def test_zip(self, zip_file, member, kwargs, expected):
+        config = DictConfig()
+        url = 'zip://%s!%s' % (zip_file, member)
+        assert config.load_from('zip', url, **kwargs) is True
+        assert config == expected
+
+        config = DictConfig()
+        DictConfigLoader(config).load(url, **kwargs)
+        assert config == expected
+
+    # Test: load from tar archives.
+    def test_tar(self, tar_file):
+        config = DictConfig()
+        config.load_from('tar', 'tar://%s!/app/config.toml' % tar_file)
+        config.load_from('tar', '%s!app/.env' % tar_file, select='TWO')
+        assert config == dict(ONE=1, TWO='two')
+
+    # Test: archive is opened once and reopened when changed.
+    def test_cache(self, zip_file):
+        import zipfile
+        cache = configsource._archive_cache
+        load_from_zip({}, zip_file + '!app/config.json')
+        archive = cache.get(zip_file, 'zip')
+        load_from_zip({}, zip_file + '!app/.env')
+        assert cache.get(zip_file, 'zip') is archive
+
+        os.remove(zip_file)
+        with zipfile.ZipFile(zip_file, 'w') as f:
+            f.writestr('config.json', '{"THREE": 3, "FOUR": 4}')
+        config = {}
+        load_from_zip(config, zip_file + '!config.json')
+        assert config == dict(THREE=3, FOUR=4)
+        assert cache.get(zip_file, 'zip') is not archive
+
+    # Test: archives are closed after reads in progress.
+    def test_evict(self, zip_file, tar_file):
+        cache = configsource._ArchiveCache(size=1)
+        archive = cache.get(zip_file, 'zip')
+        with archive.lock:
+            closer = threading.Thread(target=cache.get,
+                                      args=(tar_file, 'tar'))
+            closer.start()
+            time.sleep(0.05)
+            assert archive.handle is not None
+        closer.join()
+        assert archive.handle is None
+        assert archive.read('app/config.json') is None
+        assert cache.read(zip_file, 'zip', 'app/config.json') == (
+            self.MEMBERS['app/config.json'])
+
+        errors = []
+
+        def read(filename, kind):
+            try:
+                for _ in range(50):
+                    cache.read(filename, kind, 'app/.env')
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+        threads = [threading.Thread(target=read, args=x) for x in
+                   [(zip_file, 'zip'), (tar_file, 'tar')] * 2]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        cache.clear()
+        assert errors == []
+
+    # Test: errors.
+    def test_errors(self, zip_file, tmpdir):
+        for url in [zip_file + '!app/missing.json',
+                    str(tmpdir.join('missing.zip')) + '!config.json']:
+            assert load_from_zip({}, url, silent=True) is False
+            with pytest.raises(IOError):
+                load_from_zip({}, url)
+
+        tmpdir.join('bad.zip').write('bad')
+        with pytest.raises(IOError):
+            load_from_zip({}, str(tmpdir.join('bad.zip')) + '!config.json')
+
+        for url in [zip_file, zip_file + '!', '!config.json']:
+            with pytest.raises(ValueError):
+                load_from_zip({}, url)
+
+        with pytest.raises(ConfigSourceError):
+            load_from_zip({}, zip_file + '!config.cfgidx')
+
+
+# Test: load_multiple_to() in reverse mode.
+class TestLoadReverse(object):
+    SOURCES = [
+        dict(ONE=1, TWO=1, THREE=1),
+        dict(TWO=2, FOUR=2),
+        dict(THREE=3, FOUR=3),
+    ]
+
+    @pytest.fixture
+    def calls(self):
+        calls = []
+
+        @config_source('rev_plain', force=True)
+        def load_plain(config, name, data):
+            calls.append(name)
+            config.update(data)
+            return True
+
+        @config_source('rev_select', force=True, selectable=True)
+        def load_select(config, name, data, select=None):
+            calls.append((name, getattr(select, 'names', None)))
+            apply_batch(config, dict(x for x in data.items()
+                                     if select is None or select(x[0])))
+            return True
+
+        yield calls
+        _config_sources['dict'].pop('rev_plain', None)
+        _config_sources['dict'].pop('rev_select', None)
+        configsource._selectable_sources.discard(('dict', 'rev_select'))
+
+    def sources(self, name='rev_plain'):
+        return [dict({'from': name, 'name': i, 'data': data})
+                for i, data in enumerate(self.SOURCES)]
+
+    # Test: result is the same as in direct order.
+    @pytest.mark.parametrize('name', ['rev_plain', 'rev_select'])
+    def test_same(self, calls, name):
+        direct = dict(ONE=0, FIVE=5)
+        load_multiple_to(direct, self.sources(name))
+
+        config = dict(ONE=0, FIVE=5)
+        assert load_multiple_to(config, self.sources(name), reverse=True)
+        assert config == direct == dict(ONE=1, TWO=2, THREE=3, FOUR=3, FIVE=5)
+
+    # Test: selectable sources receive keys to skip.
+    def test_select(self, calls):
+        config = DictConfig()
+        load_multiple_to(config, self.sources('rev_select'), reverse=True,
+                         select=['ONE', 'TWO', 'FOUR', 'SIX'])
+        assert config == dict(ONE=1, TWO=2, FOUR=3)
+        assert calls == [
+            (2, set(['ONE', 'TWO', 'FOUR', 'SIX'])),
+            (1, set(['ONE', 'TWO', 'SIX'])),
+            (0, set(['ONE', 'SIX'])),
+        ]
+
+    # Test: stop loading when required keys are loaded.
+    def test_required(self, calls):
+        config = {}
+        load_multiple_to(config, self.sources(), reverse=True,
+                         required=['TWO', 'THREE'])
+        assert config == dict(TWO=2, THREE=3, FOUR=3)
+        assert calls == [2, 1]
+
+        del calls[:]
+        config = {}
+        load_multiple_to(config, self.sources(), reverse=True,
+                         select=['THREE', 'FOUR'])
+        assert config == dict(THREE=3, FOUR=3)
+        assert calls == [2]
+
+    # Test: TOML values of loaded keys are skipped.
+    def test_file(self, tmpdir):
+        f = tmpdir.join('config.toml')
+        f.write_text(u'ONE = 1\nTWO = [1, 2]', 'utf-8')
+        config = {}
+        assert load_multiple_to(config, [
+            {'from': 'toml', 'filename': str(f)},
+            {'from': 'dict', 'obj': {'TWO': 'two'}},
+            {'from': 'json', 'filename': 'missing', 'silent': True},
+        ], reverse=True) is False
+        assert config == dict(ONE=1, TWO='two')
+
+    # Test: source with only loaded keys is not failed.
+    @pytest.mark.parametrize('select', [None, 'X', ['X']])
+    def test_overridden(self, select):
+        sources = [{'from': 'dict', 'obj': {'X': 1}},
+                   {'from': 'dict', 'obj': {'X': 2}}]
+        for reverse in (False, True):
+            config = {}
+            assert load_multiple_to(config, [dict(x) for x in sources],
+                                    select=select, reverse=reverse) is True
+            assert config == dict(X=2)
+
+        sources.append({'from': 'dict', 'obj': {'Y': 3}, 'select': 'X'})
+        assert load_multiple_to({}, [dict(x) for x in sources],
+                                reverse=True) is False
+
+    # Test: deep merge is not supported.
+    def test_deep_merge(self):
+        with pytest.raises(ConfigSourceError):
+            load_multiple_to({}, [{'from': 'dict', 'obj': {}}],
+                             reverse=True, merge='deep')